@@ -0,0 +1,59 @@
+import threading
+
+from returndata import decode_words
+
+# ----------------------------------------------------------------------------------
+# AMBIENT (CrocSwap) SWAP MATH
+# CrocQuery.queryPrice returns the curve's sqrt price (priceRoot, Q64.64, quote per base)
+# and queryLiquidity its active liquidity in sqrt(base * quote) units, so a swap inside
+# the active range follows the same constant-liquidity formulas as a Uniswap V3 step.
+# The pool fee (feeRate, hundredths of a basis point = 1e-6 units) comes from
+# queryPoolParams and is taken from the input.
+# ----------------------------------------------------------------------------------
+
+Q64 = 1 << 64
+FEE_DENOMINATOR = 1000000
+DEFAULT_FEE_RATE = 2500   # Used when queryPoolParams is unavailable (0.25%)
+
+# ("amb", base, quote, pool_idx) -> feeRate (pool params change only by governance)
+POOL_FEES = {}
+_FEES_LOCK = threading.Lock()
+
+
+def decode_pool_params(data):
+    """
+    queryPoolParams -> PoolSpecs(schema, feeRate, protocolTake, tickSize, jitThresh, knockoutBits, oracleFlags).
+    Returns feeRate.
+    """
+    return decode_words(data, 2)[1]
+
+
+def get_pool_fee(key):
+    with _FEES_LOCK:
+        return POOL_FEES.get(key)
+
+
+def set_pool_fee(key, fee_rate):
+    with _FEES_LOCK:
+        POOL_FEES[key] = fee_rate
+
+
+def ambient_amount_out(price_root_q64, liquidity, amount_in, base_in, fee_rate=DEFAULT_FEE_RATE):
+    """
+    Exact-input swap against the active curve. base_in=True sells base for quote (price falls).
+    Assumes the active liquidity holds for the whole trade (exact for the ambient/full-range
+    part; concentrated positions can run out earlier, so large sizes are optimistic).
+    """
+    if price_root_q64 <= 0 or liquidity <= 0 or amount_in <= 0: return 0
+    amount = amount_in * (FEE_DENOMINATOR - fee_rate) // FEE_DENOMINATOR
+    if amount <= 0: return 0
+
+    if base_in:
+        # p' = L * p / (L + dx * p); dy = L * (p - p')
+        new_root = liquidity * price_root_q64 * Q64 // (liquidity * Q64 + amount * price_root_q64)
+        return liquidity * (price_root_q64 - new_root) // Q64
+
+    # p' = p + dy / L; dx = L * (1/p - 1/p')
+    new_root = price_root_q64 + amount * Q64 // liquidity
+    return liquidity * Q64 * (new_root - price_root_q64) // (price_root_q64 * new_root)
+
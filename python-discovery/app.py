@@ -6,15 +6,16 @@ from web3_pricing import (
     get_best_quote,
     get_pool_info,
     get_kuru_quote,
-    KURU_MARKETS,
-    w3,
-    mainnet_w3,
+    CONTEXT,
+    register_kuru_api_markets,
     get_token_metadata,
-    get_token_balance
+    start_pool_index_refresh,
+    start_kuru_discovery
 )
-from arbitrage_engine import scan_market, TOKEN_MAP, ADDR_TO_SYM
+from arbitrage_engine import scan_market, TOKEN_MAP, ADDR_TO_SYM, CYCLE_INDEX, CYCLE_INDEX_ENABLED, async_refresh_pairs
 from graph_search import find_arbitrage_path
 from monad_sentinel import monitor_transactions, KNOWN_POOLS
+from pool_state import POOL_STATE_STORE
 import threading
 import datetime
 from collections import deque
@@ -40,6 +41,7 @@ def update_kuru_stats():
         resp = requests.get(KURU_API_URL, headers=headers, timeout=5)
         if resp.status_code == 200:
             data = resp.json().get('data', {}).get('data', [])
+            register_kuru_api_markets(data) # New markets become scannable right away
             for item in data:
                 mkt = item.get('marketaddress', '').lower()
                 if not mkt: continue
@@ -63,15 +65,6 @@ def update_kuru_stats():
     except Exception as e:
         print(f"❌ Kuru Fetch Error: {e}")
 
-# Derive Set of Interest (Tokens traded on Kuru)
-KURU_TOKENS_SET = set()
-for pair in KURU_MARKETS.keys():
-    for addr in pair:
-        KURU_TOKENS_SET.add(addr.lower())
-        KURU_TOKENS_SET.add(addr) # Keep both case variants to be safe
-
-print(f"✅ Active Kuru Tokens: {len(KURU_TOKENS_SET)/2:.0f} assets.")
-
 app = Flask(__name__)
 CORS(app) # Enable CORS for all routes
 
@@ -87,7 +80,7 @@ KNOWN_TOKENS = {
 # Seed Uniswap Pools (Required for Arbitrage Engine, but hidden from Dashboard)
 def seed_uniswap_pools():
     print("🌱 Seeding Uniswap V3 Pools for Arbitrage Graph...")
-    from web3_pricing import get_pool_info, get_token_metadata, get_token_balance
+    from web3_pricing import get_pool_info, get_token_metadata, get_token_balances
     
     # Priority Pairs to Track
     pairs = [
@@ -99,7 +92,8 @@ def seed_uniswap_pools():
     ]
     fees = [500, 3000, 10000]
     
-    count = 0
+    # 1. Find the pools
+    candidates = []
     for sym0, sym1 in pairs:
         addr0 = TOKEN_MAP.get(sym0)
         addr1 = TOKEN_MAP.get(sym1)
@@ -109,54 +103,102 @@ def seed_uniswap_pools():
             try:
                 # get_pool_info returns {address, liquidity, ...} or None
                 info = get_pool_info(addr0, addr1, fee)
-                if info:
-                    pool_addr = info['address']
-                    if pool_addr in KNOWN_POOLS: continue
-                    
-                    # Fetch Metadata
-                    meta0 = get_token_metadata(addr0)
-                    meta1 = get_token_metadata(addr1)
-                    
-                    # Approx TVL (Sync calls)
-                    bal0 = get_token_balance(addr0, pool_addr)
-                    bal1 = get_token_balance(addr1, pool_addr)
-                    
-                    # Simple TVL Algo
-                    tvl = 0
-                    if "USD" in sym0 or "USD" in sym1:
-                        non_usd_bal = bal0 if "USD" in sym1 else bal1
-                        usd_bal = bal1 if "USD" in sym1 else bal0
-                        tvl = usd_bal * 2
-                        if tvl < 100 and non_usd_bal > 0: # If one side empty?
-                             tvl = 0 # Ignore empty pools
-                    else:
-                        # WMON pairs
-                        if "WMON" in sym0: tvl = bal0 * 2 * 0.02 # Approx $0.02 Mon (conservative)
-                        elif "WMON" in sym1: tvl = bal1 * 2 * 0.02
-                    
-                    if tvl < 10: continue # Skip dust pools
-                    
-                    KNOWN_POOLS[pool_addr] = {
-                        "name": f"{sym0}/{sym1} ({fee/10000}%)",
-                        "t0_addr": addr0,
-                        "t1_addr": addr1,
-                        "t0_sym": sym0,
-                        "t1_sym": sym1,
-                        "t0_dec": meta0['decimals'],
-                        "t1_dec": meta1['decimals'],
-                        "tvl": tvl,
-                        "threshold": max(50, tvl * 0.005),
-                        "fee": fee / 10000.0,
-                        "dex": "Uniswap V3"
-                    }
-                    count += 1
+                if info and info['address'] not in KNOWN_POOLS:
+                    candidates.append((sym0, sym1, addr0, addr1, fee, info['address']))
             except Exception as e:
                 print(f"Failed to seed {sym0}/{sym1}: {e}")
+    
+    # 2. Approx TVL: every pool's reserves in one batched read
+    balances = get_token_balances(
+        (addr, pool_addr) for _, _, addr0, addr1, _, pool_addr in candidates for addr in (addr0, addr1)
+    )["balances"]
+    
+    count = 0
+    seeded = []
+    for sym0, sym1, addr0, addr1, fee, pool_addr in candidates:
+        meta0 = get_token_metadata(addr0)
+        meta1 = get_token_metadata(addr1)
+        bal0 = balances.get((addr0.lower(), pool_addr.lower()), 0.0)
+        bal1 = balances.get((addr1.lower(), pool_addr.lower()), 0.0)
+        
+        # Simple TVL Algo
+        tvl = 0
+        if "USD" in sym0 or "USD" in sym1:
+            non_usd_bal = bal0 if "USD" in sym1 else bal1
+            usd_bal = bal1 if "USD" in sym1 else bal0
+            tvl = usd_bal * 2
+            if tvl < 100 and non_usd_bal > 0: # If one side empty?
+                 tvl = 0 # Ignore empty pools
+        else:
+            # WMON pairs
+            if "WMON" in sym0: tvl = bal0 * 2 * 0.02 # Approx $0.02 Mon (conservative)
+            elif "WMON" in sym1: tvl = bal1 * 2 * 0.02
+        
+        if tvl < 10: continue # Skip dust pools
+        
+        KNOWN_POOLS[pool_addr] = {
+            "name": f"{sym0}/{sym1} ({fee/10000}%)",
+            "t0_addr": addr0,
+            "t1_addr": addr1,
+            "t0_sym": sym0,
+            "t1_sym": sym1,
+            "t0_dec": meta0['decimals'],
+            "t1_dec": meta1['decimals'],
+            "tvl": tvl,
+            "threshold": max(50, tvl * 0.005),
+            "fee": fee / 10000.0,
+            "fee_tier": fee,
+            "dex": "Uniswap V3"
+        }
+        seeded.append((addr0, addr1, fee))
+        count += 1
                 
     print(f"✅ Seeded {count} Uniswap Pools for Graph (Hidden from Dashboard).")
+    
+    # Snapshot tick/liquidity state for all seeded pools in one pass (kept live by the Sentinel)
+    from web3_pricing import LOCAL_V3_PRICING, load_v3_pool_states
+    if LOCAL_V3_PRICING and seeded:
+        try:
+            loaded = load_v3_pool_states(seeded)
+            print(f"✅ Loaded {loaded} Pool State Snapshots.")
+        except Exception as e:
+            print(f"Failed to load pool states: {e}")
+
+def warm_up():
+    """
+    Builds the pricing context, seeds pools and starts the discovery threads.
+    Runs in the background so Flask binds right away (routes work meanwhile, with fewer pools).
+    """
+    CONTEXT.warm_up()
+    
+    # Set of Interest (Tokens traded on Kuru): KURU_REGISTRY.has_token, grows with market discovery
+    registry = CONTEXT.kuru_registry
+    print(f"✅ Active Kuru Tokens: {len(registry.tokens())} assets ({len(registry)} markets).")
+    
+    seed_uniswap_pools()
+    
+    # Keep the Uniswap V3 pool index and the Kuru market registry current (logs, saved to disk)
+    start_pool_index_refresh()
+    start_kuru_discovery()
+
+_warm_up_started = False
+_warm_up_lock = threading.Lock()
+
+def start_warm_up():
+    """
+    Launches warm_up() once per process, however the app is served (__main__ or a WSGI server).
+    """
+    global _warm_up_started
+    with _warm_up_lock:
+        if _warm_up_started: return
+        _warm_up_started = True
+    t = threading.Thread(target=warm_up, daemon=True)
+    t.start()
+    print("🔥 Warm-up Thread Launched.")
 
-# Run Seeding
-seed_uniswap_pools()
+@app.before_request
+def ensure_warm_up():
+    start_warm_up()
 
 # Global Event Log
 RECENT_EVENTS = deque(maxlen=50)
@@ -178,10 +220,15 @@ def start_background_sentinel():
                     t0 = event['token0']['address']
                     t1 = event['token1']['address']
                     
-                    if t0 in KURU_TOKENS_SET or t1 in KURU_TOKENS_SET:
+                    if CONTEXT.kuru_registry.has_token(t0) or CONTEXT.kuru_registry.has_token(t1):
                         RECENT_EVENTS.appendleft(event)
                     # else:
                         # print(f"DEBUG: Ignored feed event {event['pool']} (Not Kuru)")
+                    
+                    # The pool moved: re-score only the indexed cycles through it (task on the sentinel loop)
+                    pair = (event['token0']['symbol'], event['token1']['symbol'])
+                    if CYCLE_INDEX_ENABLED and CYCLE_INDEX.has_pair(*pair):
+                        return async_refresh_pairs([pair])
             except Exception as e:
                 print(f"Callback Error: {e}")
 
@@ -240,7 +287,7 @@ def find_arbitrage():
                         # KURU RELAXED FILTER: 
                         # Monitor if AT LEAST ONE token is a Kuru asset
                         # (e.g. Someone buying MON on Uni with ETH -> We want to see it)
-                        if t0_addr not in KURU_TOKENS_SET and t1_addr not in KURU_TOKENS_SET:
+                        if not CONTEXT.kuru_registry.has_token(t0_addr) and not CONTEXT.kuru_registry.has_token(t1_addr):
                             # Both matched tokens are NOT on Kuru -> Ignore
                             # print(f"DEBUG: Skipping {t0['symbol']}/{t1['symbol']} (No Kuru Asset)")
                             continue
@@ -422,6 +469,34 @@ def get_events():
         "data": list(RECENT_EVENTS)
     })
 
+@app.route('/pool_states', methods=['GET'])
+def get_pool_states():
+    # Served straight from memory (Sentinel keeps it current from Swap/Mint/Burn logs)
+    states = []
+    for addr, p in list(KNOWN_POOLS.items()):
+        snap = POOL_STATE_STORE.snapshot(addr)
+        if not snap: continue
+        snap["name"] = p.get('name')
+        snap["dex"] = p.get('dex')
+        states.append(snap)
+    
+    return jsonify({
+        "success": True,
+        "data": states
+    })
+
+@app.route('/cycle_index', methods=['GET'])
+def get_cycle_index():
+    # Running top-K of the incremental cycle index (scans + Sentinel refreshes keep it current)
+    k = request.args.get('k', 20, type=int)
+    return jsonify({
+        "success": True,
+        "data": {
+            "stats": CYCLE_INDEX.stats(),
+            "ranking": CYCLE_INDEX.top_k(k)
+        }
+    })
+
 @app.route('/pools', methods=['GET'])
 def get_pools():
     # 1. Update Stats from Kuru API
@@ -461,6 +536,9 @@ def get_pools():
 if __name__ == '__main__':
     print("Starting Python Discovery Service on port 5001...")
     
+    # Seed pools / load caches in the background
+    start_warm_up()
+    
     # Start Sentinel
     start_background_sentinel()
     
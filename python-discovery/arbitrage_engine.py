@@ -1,5 +1,10 @@
-from web3 import Web3
-from web3_pricing import get_bulk_quotes, get_pool_info
+from web3_pricing import get_bulk_quotes, get_pool_info, get_quote_curves
+from quote_curve import CURVE_STEPS
+from trade_sizing import optimal_size, venue_curve, leg_ranges, SIZING_STEPS
+from cycle_finder import find_negative_cycles, rotate_cycle, cycle_rate, MAX_CYCLE_HOPS
+from cycle_index import CycleIndex, INDEX_MAX_HOPS, INDEX_TOP_K
+from graph_matrix import RateMatrix, edge_venues, venue_key, pivot_two_hop, pivot_three_hop, two_hop_products, three_hop_products, top_k
+import numpy as np
 import time
 import json
 import random
@@ -77,6 +82,36 @@ PRICE_CACHE = {
 # Scan Tiers (Target USDT Value)
 TIERS = [1, 10, 100]
 
+# Curve Mode: each edge is quoted once along a size ladder (see quote_curve.py) and the
+# tiers below are interpolated from it, so finer tiers cost no extra RPC calls.
+CURVE_SCAN = False
+CURVE_TIERS = [1, 2, 5, 10, 20, 50, 100]
+CURVE_LADDER_SPAN = 2 # Ladder runs from min(tier)/SPAN to max(tier)*SPAN
+
+# Cycle Search: Bellman-Ford over -log(rate) finds profitable cycles through any token and
+# up to CYCLE_MAX_HOPS hops (the WMON 2/3-hop loops below only see cycles through WMON).
+CYCLE_SEARCH = True
+CYCLE_MAX_HOPS = MAX_CYCLE_HOPS
+CYCLE_GAS_PER_HOP = 150000
+
+# Matrix Backend: tier graphs packed into one NumPy rate array (see graph_matrix.py) and
+# every 2/3-hop cycle product computed by broadcasting instead of nested loops.
+MATRIX_BACKEND = True
+MATRIX_TOP_K = 20 # Best non-pivot 2/3-hop cycles reported per tier
+
+# Trade Sizing: the best ranked cycles get every leg quoted along a size ladder (two extra
+# bulk passes for all of them) and are sized to the input with the best net profit, between
+# SIZING_MIN_USD and SIZING_MAX_USD instead of only at the tiers (see trade_sizing.py).
+TRADE_SIZING = True
+SIZING_TOP_N = 5 # Distinct cycles sized per scan
+SIZING_MIN_USD = 1
+SIZING_MAX_USD = 10000
+
+# Incremental Index: every scan's tier graphs are merged into CYCLE_INDEX (cycle_index.py),
+# which maps each edge to the cycles through it. refresh_pairs re-quotes a few pairs (e.g.
+# the pool of a sentinel swap) and re-scores only the cycles through them.
+CYCLE_INDEX_ENABLED = True
+
 def update_price_cache(results, requests):
     """
     Updates PRICE_CACHE based on the latest scan results relative to USDT.
@@ -131,6 +166,155 @@ def calculate_net_profit(amount_in_usd, profit_pct, gas_estimate=200000):
     net_profit_usd = gross_profit_usd - gas_cost_usd
     return net_profit_usd, gas_cost_usd
 
+def _best_venue_pair(graph, a, b):
+    """
+    (a -> b quote, b -> a quote) with the best rate product on two different venues, or None.
+    Edges of a multigraph carry every venue's quote, so e.g. a Kuru buy / Uniswap sell is
+    found even when Uniswap has the best rate in both directions.
+    """
+    best = None
+    for edge1 in edge_venues(graph[a][b]):
+        for edge2 in edge_venues(graph[b][a]):
+            # FILTER: Arbitrage must be between different markets (or at least different fee tiers)
+            # Strict Mode: Prevent Same-DEX wash trading (e.g. Kuru -> Kuru on same pair)
+            if venue_key(edge1) == venue_key(edge2): continue
+            product = edge1['rate'] * edge2['rate']
+            if best is None or product > best[0]:
+                best = (product, edge1, edge2)
+    return best[1:] if best else None
+
+def _spatial_opportunity(graph, pivot, intermediate, tier_value, pool_info_map=None):
+    """
+    pivot -> intermediate -> pivot on the best pair of distinct venues, or None if filtered out.
+    """
+    pair = _best_venue_pair(graph, pivot, intermediate)
+    if not pair: return None
+    edge1, edge2 = pair
+
+    rate1 = edge1['rate']
+    rate2 = edge2['rate']
+    final_rate = rate1 * rate2
+    profit_pct = (final_rate - 1) * 100
+    
+    # SANITY CHECK: Ignore absurd profits (> 500%) -> Likely Data Error
+    if profit_pct > 500:
+         # print(f"⚠️ Ignored absurd profit: {profit_pct:.2f}% ({pivot}->{intermediate})")
+         return None
+    
+    if profit_pct <= -100: return None
+    net_profit, gas_cost = calculate_net_profit(tier_value, profit_pct, gas_estimate=300000)
+    
+    # FILTER: Ignore results where loss exceeds principal (e.g. liquidity dry + gas)
+    # RELAXED for Debugging: Allow valid paths even if loss is high
+    if net_profit <= -tier_value * 10:
+        return None
+
+    # Construct Detailed Path Log
+    # E.g. "Uniswap V3 (3000): Swap 100 WMON -> 3.5 USDC"
+    
+    # Input Amount for first leg
+    leg1_in = tier_value / PRICE_CACHE.get(pivot, 1.0) # Approx units
+    leg1_out = leg1_in * rate1
+    leg2_out = leg1_out * rate2
+    
+    return {
+        "strategy": f"Spatial (${tier_value})",
+        "path": f"{pivot} -> {intermediate} -> {pivot}",
+        "token": pivot,
+        "token_pair": f"{pivot}/{intermediate}",
+        "cycle": [pivot, intermediate],
+        "venues": [venue_key(edge1), venue_key(edge2)],
+        "profit_pct": profit_pct,
+        "net_profit_usd": net_profit,
+        "logs": [
+            f"Step 1: {edge1.get('dex')} ({edge1.get('fee')}): Swap {pivot} -> {intermediate}",
+            f"   Rate: {rate1:.6f} | Est. Out: {leg1_out:.4f}",
+            f"Step 2: {edge2.get('dex')} ({edge2.get('fee')}): Swap {intermediate} -> {pivot}",
+            f"   Rate: {rate2:.6f} | Est. Out: {leg2_out:.4f}",
+            f"⛽ Gas: ${gas_cost:.4f} | 💵 Net Profit: ${net_profit:.4f}",
+            f"🌊 Pool Liquidity ({pivot}/{intermediate}): {get_pool_meta(pool_info_map, pivot, intermediate, 'tvl')}",
+            f"🛑 Whale Alert Threshold: > {get_pool_meta(pool_info_map, pivot, intermediate, 'threshold')}",
+            f"🆚 Comparison: Uniswap V3 (Monad) ({profit_pct:.4f}%) vs Simulated DEX B ({profit_pct - 0.06:.4f}%)"
+        ],
+        "details": {
+             "dex1": edge1.get('dex'),
+             "dex2": edge2.get('dex')
+        }
+    }
+
+def _triangular_opportunity(graph, pivot, b, c, tier_value):
+    """
+    pivot -> b -> c -> pivot, or None if filtered out.
+    """
+    edges = [graph[pivot][b], graph[b][c], graph[c][pivot]]
+    rate1, rate2, rate3 = (edge['rate'] for edge in edges)
+    final_rate = rate1 * rate2 * rate3
+    profit_pct = (final_rate - 1) * 100
+    
+    if profit_pct <= -100: return None
+    net_profit, gas_cost = calculate_net_profit(tier_value, profit_pct, gas_estimate=450000)
+    
+    # FILTER: Ignore results where loss exceeds principal
+    if net_profit <= -tier_value:
+        return None
+    
+    return {
+        "strategy": f"Triangular (${tier_value})",
+        "path": f"{pivot} -> {b} -> {c} -> {pivot}",
+        "token": pivot,
+        "cycle": [pivot, b, c],
+        "venues": [venue_key(edge) for edge in edges],
+        "profit_pct": profit_pct,
+        "net_profit_usd": net_profit,
+        "logs": [
+            f"Step 1: {pivot} -> {b} (Rate: {rate1:.6f})",
+            f"Step 2: {b} -> {c} (Rate: {rate2:.6f})",
+            f"Step 3: {c} -> {pivot} (Rate: {rate3:.6f})",
+            f"💰 Est. Gas Cost: ${gas_cost:.4f}",
+            f"💵 Net Profit: ${net_profit:.4f}"
+        ]
+    }
+
+def _cycle_opportunity(graph, cycle, tier_value):
+    """
+    Any cycle (tuple of tokens, start not repeated), or None if filtered out.
+    Round trips (2 hops) use the best pair of distinct venues, longer cycles each leg's best.
+    """
+    hops = len(cycle)
+    if hops == 2:
+        pair = _best_venue_pair(graph, cycle[0], cycle[1])
+        if not pair: return None
+        edges = list(pair)
+    else:
+        edges = [graph[t_in][cycle[(i + 1) % hops]] for i, t_in in enumerate(cycle)]
+    rate = 1.0
+    for edge in edges:
+        rate *= edge['rate']
+    profit_pct = (rate - 1) * 100
+    if profit_pct > 500: return None # Likely Data Error
+    
+    net_profit, gas_cost = calculate_net_profit(tier_value, profit_pct, gas_estimate=CYCLE_GAS_PER_HOP * hops)
+    if net_profit <= -tier_value: return None
+    
+    start = cycle[0]
+    logs = []
+    for i, (t_in, edge) in enumerate(zip(cycle, edges)):
+        t_out = cycle[(i + 1) % hops]
+        logs.append(f"Step {i + 1}: {edge.get('dex')} ({edge.get('fee')}): {t_in} -> {t_out} (Rate: {edge['rate']:.6f})")
+    logs.append(f"💰 Est. Gas Cost: ${gas_cost:.4f}")
+    logs.append(f"💵 Net Profit: ${net_profit:.4f}")
+    
+    return {
+        "strategy": f"Cycle {hops}-Hop (${tier_value})",
+        "path": " -> ".join(tuple(cycle) + (start,)),
+        "token": start,
+        "cycle": list(cycle),
+        "venues": [venue_key(edge) for edge in edges],
+        "profit_pct": profit_pct,
+        "net_profit_usd": net_profit,
+        "logs": logs
+    }
+
 def analyze_graph_for_tier(graph, tier_value, pool_info_map=None):
     """
     Finds arbitrage cycles in a specific tier's graph.
@@ -141,106 +325,184 @@ def analyze_graph_for_tier(graph, tier_value, pool_info_map=None):
     # 1. Spatial (2-Hop)
     for intermediate in graph[pivot]:
         if intermediate not in graph: continue
-        
-        edge1 = graph[pivot].get(intermediate)
-        edge2 = graph[intermediate].get(pivot)
-        
-        if edge1 and edge2:
-            # FILTER: Arbitrage must be between different markets (or at least different fee tiers)
-            # Strict Mode: Prevent Same-DEX wash trading (e.g. Kuru -> Kuru on same pair)
-            if edge1.get('dex') == edge2.get('dex') and edge1.get('fee') == edge2.get('fee'):
-                continue
-
-            rate1 = edge1['rate']
-            rate2 = edge2['rate']
-            final_rate = rate1 * rate2
-            profit_pct = (final_rate - 1) * 100
-            
-            # SANITY CHECK: Ignore absurd profits (> 500%) -> Likely Data Error
-            if profit_pct > 500:
-                 # print(f"⚠️ Ignored absurd profit: {profit_pct:.2f}% ({pivot}->{intermediate})")
-                 continue
-            
-            if profit_pct > -100:
-                net_profit, gas_cost = calculate_net_profit(tier_value, profit_pct, gas_estimate=300000)
-                
-                # FILTER: Ignore results where loss exceeds principal (e.g. liquidity dry + gas)
-                # RELAXED for Debugging: Allow valid paths even if loss is high
-                if net_profit <= -tier_value * 10:
-                    continue 
-
-                # Construct Detailed Path Log
-                # E.g. "Uniswap V3 (3000): Swap 100 WMON -> 3.5 USDC"
-                
-                # Input Amount for first leg
-                leg1_in = tier_value / PRICE_CACHE.get(pivot, 1.0) # Approx units
-                leg1_out = leg1_in * rate1
-                leg2_out = leg1_out * rate2
-                
-                opportunities.append({
-                    "strategy": f"Spatial (${tier_value})",
-                    "path": f"{pivot} -> {intermediate} -> {pivot}",
-                    "token": pivot,
-                    "token_pair": f"{pivot}/{intermediate}",
-                    "profit_pct": profit_pct,
-                    "net_profit_usd": net_profit,
-                    "logs": [
-                        f"Step 1: {edge1.get('dex')} ({edge1.get('fee')}): Swap {pivot} -> {intermediate}",
-                        f"   Rate: {rate1:.6f} | Est. Out: {leg1_out:.4f}",
-                        f"Step 2: {edge2.get('dex')} ({edge2.get('fee')}): Swap {intermediate} -> {pivot}",
-                        f"   Rate: {rate2:.6f} | Est. Out: {leg2_out:.4f}",
-                        f"⛽ Gas: ${gas_cost:.4f} | 💵 Net Profit: ${net_profit:.4f}",
-                        f"🌊 Pool Liquidity ({pivot}/{intermediate}): {get_pool_meta(pool_info_map, pivot, intermediate, 'tvl')}",
-                        f"🛑 Whale Alert Threshold: > {get_pool_meta(pool_info_map, pivot, intermediate, 'threshold')}",
-                        f"🆚 Comparison: Uniswap V3 (Monad) ({profit_pct:.4f}%) vs Simulated DEX B ({profit_pct - 0.06:.4f}%)"
-                    ],
-                    "details": {
-                         "dex1": edge1.get('dex'),
-                         "dex2": edge2.get('dex')
-                    }
-                })
+        if pivot not in graph[intermediate]: continue
+        opp = _spatial_opportunity(graph, pivot, intermediate, tier_value, pool_info_map)
+        if opp: opportunities.append(opp)
                 
     # 2. Triangular (3-Hop)
     for b in graph[pivot]:
         if b not in graph: continue
         for c in graph[b]:
             if c == pivot or c not in graph: continue
-            
-            edge1 = graph[pivot].get(b)
-            edge2 = graph[b].get(c)
-            edge3 = graph[c].get(pivot)
-            
-            if edge1 and edge2 and edge3:
-                rate1 = edge1['rate']
-                rate2 = edge2['rate']
-                rate3 = edge3['rate']
-                final_rate = rate1 * rate2 * rate3
-                profit_pct = (final_rate - 1) * 100
-                
-                if profit_pct > -100:
-                    net_profit, gas_cost = calculate_net_profit(tier_value, profit_pct, gas_estimate=450000)
-                    
-                    # FILTER: Ignore results where loss exceeds principal
-                    if net_profit <= -tier_value:
-                        continue
-                    
-                    opportunities.append({
-                        "strategy": f"Triangular (${tier_value})",
-                        "path": f"{pivot} -> {b} -> {c} -> {pivot}",
-                        "token": pivot,
-                        "profit_pct": profit_pct,
-                        "net_profit_usd": net_profit,
-                        "logs": [
-                            f"Step 1: {pivot} -> {b} (Rate: {rate1:.6f})",
-                            f"Step 2: {b} -> {c} (Rate: {rate2:.6f})",
-                            f"Step 3: {c} -> {pivot} (Rate: {rate3:.6f})",
-                            f"💰 Est. Gas Cost: ${gas_cost:.4f}",
-                            f"💵 Net Profit: ${net_profit:.4f}"
-                        ]
-                    })
+            if pivot not in graph[c]: continue
+            opp = _triangular_opportunity(graph, pivot, b, c, tier_value)
+            if opp: opportunities.append(opp)
+    
+    # 3. Negative Cycles (any token, up to CYCLE_MAX_HOPS)
+    if CYCLE_SEARCH:
+        opportunities.extend(analyze_cycles_for_tier(graph, tier_value, pivot))
                     
     return opportunities
 
+def _matrix_net_profit(tier_value, products, gas_estimate):
+    """
+    calculate_net_profit for a whole array of cycle rate products.
+    """
+    _, gas_cost = calculate_net_profit(tier_value, 0, gas_estimate=gas_estimate)
+    return tier_value * (products - 1) - gas_cost
+
+def analyze_matrix_for_tier(matrix, graph, tier_value, pool_info_map=None):
+    """
+    analyze_graph_for_tier on the array backend (graph_matrix.py). Products, filters and
+    net profits of every 2/3-hop cycle are computed by broadcasting; only the MATRIX_TOP_K
+    best cycles of each kind are turned into opportunity dicts.
+    Returns (opportunities, count) where count includes the cycles that were not built.
+    """
+    opportunities = []
+    count = 0
+    pivot = "WMON"
+    t = matrix.tier_index[tier_value]
+    rates = matrix.rates[t:t + 1]
+    venue_rates = matrix.venue_rates[t:t + 1]
+    p = matrix.index.get(pivot)
+    
+    if p is not None:
+        # 1. Spatial (2-Hop): best pair of distinct venues, <= 500% (same filters as the loops)
+        spatial = pivot_two_hop(venue_rates, p)[0]
+        net = _matrix_net_profit(tier_value, spatial, 300000)
+        ok = (spatial > 0) & (spatial <= 6.0) & (net > -tier_value * 10)
+        count += int(ok.sum())
+        for _, (b,) in top_k(np.where(ok, net, -np.inf), MATRIX_TOP_K, -np.inf):
+            opp = _spatial_opportunity(graph, pivot, matrix.tokens[b], tier_value, pool_info_map)
+            if opp: opportunities.append(opp)
+        
+        # 2. Triangular (3-Hop)
+        triangular = pivot_three_hop(rates, p)[0]
+        net = _matrix_net_profit(tier_value, triangular, 450000)
+        ok = (triangular > 0) & (net > -tier_value)
+        count += int(ok.sum())
+        for _, (b, c) in top_k(np.where(ok, net, -np.inf), MATRIX_TOP_K, -np.inf):
+            opp = _triangular_opportunity(graph, pivot, matrix.tokens[b], matrix.tokens[c], tier_value)
+            if opp: opportunities.append(opp)
+    
+    # 3. Profitable 2/3-hop cycles elsewhere (pivot rows/columns zeroed: reported above)
+    others = rates.copy()
+    venue_others = venue_rates.copy()
+    if p is not None:
+        others[:, p, :] = 0.0
+        others[:, :, p] = 0.0
+        venue_others[:, :, p, :] = 0.0
+        venue_others[:, :, :, p] = 0.0
+    for hops, products in ((2, two_hop_products(venue_others)), (3, three_hop_products(others))):
+        # Filters run on the few profitable entries only, not on the whole n^3 array
+        profitable = products > 1.0
+        values = products[profitable]
+        ok = (values <= 6.0) & (_matrix_net_profit(tier_value, values, CYCLE_GAS_PER_HOP * hops) > -tier_value)
+        products[profitable] = np.where(ok, values, 0.0)
+        count += int(ok.sum())
+        for _, idx in top_k(products, MATRIX_TOP_K, 1.0):
+            opp = _cycle_opportunity(graph, matrix.symbols(idx[1:]), tier_value)
+            if opp: opportunities.append(opp)
+    
+    # 4. Longer cycles (4+ hops) from the cycle search
+    if CYCLE_SEARCH:
+        longer = analyze_cycles_for_tier(graph, tier_value, pivot, min_hops=4)
+        count += len(longer)
+        opportunities.extend(longer)
+    
+    return opportunities, count
+
+def analyze_cycles_for_tier(graph, tier_value, pivot="WMON", min_hops=2):
+    """
+    Profitable cycles found by cycle_finder that the pivot loops do not already cover
+    (cycles avoiding the pivot, or longer than 3 hops). Cycles shorter than min_hops are skipped.
+    """
+    opportunities = []
+    
+    for found in find_negative_cycles(graph, max_hops=CYCLE_MAX_HOPS):
+        cycle = rotate_cycle(found['cycle'], pivot)
+        hops = found['hops']
+        if hops < min_hops: continue
+        if cycle[0] == pivot and hops <= 3: continue # Already reported as Spatial / Triangular
+        opp = _cycle_opportunity(graph, cycle, tier_value)
+        if opp: opportunities.append(opp)
+        
+    return opportunities
+
+
+def _cycle_net_profit(graph, cycle, tier_value):
+    """
+    CYCLE_INDEX score: net profit of a cycle at a tier (round trips on two distinct venues).
+    """
+    hops = len(cycle)
+    if hops == 2:
+        pair = _best_venue_pair(graph, cycle[0], cycle[1])
+        if not pair: return None
+        rate = pair[0]['rate'] * pair[1]['rate']
+    else:
+        rate = cycle_rate(graph, cycle)
+    if rate <= 0: return None
+    net_profit, _ = calculate_net_profit(tier_value, (rate - 1) * 100, gas_estimate=CYCLE_GAS_PER_HOP * hops)
+    return net_profit
+
+def _indexed_opportunity(graph, cycle, tier_value, pivot="WMON"):
+    """
+    CYCLE_INDEX description: the same opportunity dict a scan reports for the cycle.
+    """
+    cycle = rotate_cycle(cycle, pivot)
+    if cycle[0] == pivot and len(cycle) == 2:
+        return _spatial_opportunity(graph, pivot, cycle[1], tier_value)
+    if cycle[0] == pivot and len(cycle) == 3:
+        return _triangular_opportunity(graph, pivot, cycle[1], cycle[2], tier_value)
+    return _cycle_opportunity(graph, cycle, tier_value)
+
+CYCLE_INDEX = CycleIndex(_cycle_net_profit, _indexed_opportunity)
+
+def _refresh_result(snapshot, requests, start_time):
+    if not snapshot: return None # Nothing fetched: keep the indexed edges as they are
+    results = snapshot.get("results", {})
+    update_price_cache(results, requests)
+    rescored = CYCLE_INDEX.update(build_tier_graphs(results, requests), requests)
+    print(f"  ♻️ Re-scored {rescored}/{len(CYCLE_INDEX)} cycles from {len(requests)} refreshed quotes.")
+    return {
+        "rescored": rescored,
+        "cycles": len(CYCLE_INDEX),
+        "ranking": CYCLE_INDEX.top_k(INDEX_TOP_K),
+        "network_ms": snapshot.get("network_ms", 0),
+        "total_time": time.time() - start_time
+    }
+
+def refresh_pairs(pairs):
+    """
+    Incremental re-evaluation: re-quotes both directions of every (symbol_a, symbol_b) pair
+    at every tier it was scanned with, and re-scores only the indexed cycles through them.
+    Returns {"rescored", "cycles", "ranking" (running top-K), "network_ms", "total_time"}.
+    """
+    start_time = time.time()
+    requests = CYCLE_INDEX.requests_for(pairs)
+    if not requests: return None
+    snapshot = get_bulk_quotes(requests, return_by_index=True)
+    return _refresh_result(snapshot, requests, start_time)
+
+_REFRESHING = set() # Pairs with an async refresh in flight (a burst of swaps re-quotes once)
+
+async def async_refresh_pairs(pairs):
+    """
+    refresh_pairs for asyncio callers (e.g. a sentinel callback). Pairs already being
+    refreshed are skipped.
+    """
+    from async_pricing import async_get_bulk_quotes
+    
+    start_time = time.time()
+    keys = {tuple(sorted(pair)) for pair in pairs} - _REFRESHING
+    requests = CYCLE_INDEX.requests_for(keys)
+    if not requests: return None
+    _REFRESHING.update(keys)
+    try:
+        snapshot = await async_get_bulk_quotes(requests, return_by_index=True)
+    finally:
+        _REFRESHING.difference_update(keys)
+    return _refresh_result(snapshot, requests, start_time)
 
 def get_pool_meta(pool_map, t1, t2, field):
     if not pool_map: return "Unknown"
@@ -254,26 +516,24 @@ def get_pool_meta(pool_map, t1, t2, field):
         return val
     return "Unknown"
 
-def scan_market(override_tokens=None, override_decimals=None, pool_info_map=None):
+def _has_market(t_in, t_out, target_map, pool_info_map=None):
     """
-    Dynamic Multi-Tier Scan:
-    1. Calculate amounts for each token to match $1, $10, $100.
-    2. Fetch ALL tiers in ONE Multicall.
-    3. Analyze each tier separately.
+    True if Kuru lists the pair or pool_info_map knows a pool for it.
     """
-    print(f"🌍 Starting Dynamic Multi-Tier Scan...")
-    start_time = time.time()
+    from web3_pricing import find_kuru_market
     
-    # 0. determine token set
-    if override_tokens and len(override_tokens) > 1:
-        print(f"  🔹 Using Dynamic Token Set: {override_tokens}")
-        # print(f"  🔹 Using Dynamic Token Set: {list(override_tokens.keys())}")
-        target_map = override_tokens
-        target_decimals = override_decimals or {}
-    else:
-        target_map = TOKEN_MAP
-        target_decimals = TOKEN_DECIMALS
+    # Check Kuru (registry is keyed by normalized address)
+    if find_kuru_market(target_map[t_in], target_map[t_out]):
+        return True
+    
+    # Check Uniswap (pool_info_map)
+    return bool(pool_info_map) and tuple(sorted([t_in, t_out])) in pool_info_map
 
+def build_scan_requests(target_map, target_decimals, pool_info_map=None):
+    """
+    Builds the multi-tier quote requests for every pair that Kuru or a known pool can price.
+    Returns (requests, req_tier_map).
+    """
     # 1. Build Requests for All Pairs & Tiers
     tokens = list(target_map.keys())
     requests = []
@@ -299,22 +559,7 @@ def scan_market(override_tokens=None, override_decimals=None, pool_info_map=None
                 if t_in == t_out: continue
                 
                 # FILTER: Must be in Kuru OR Known Pools
-                from web3_pricing import KURU_MARKETS
-                
-                # Check Kuru (Handle Checksum)
-                addr_a = Web3.to_checksum_address(target_map[t_in])
-                addr_b = Web3.to_checksum_address(target_map[t_out])
-                kuru_key = frozenset([addr_a, addr_b])
-                in_kuru = kuru_key in KURU_MARKETS
-                
-                # Check Uniswap (pool_info_map)
-                in_uni = False
-                if pool_info_map:
-                    uni_key = tuple(sorted([t_in, t_out]))
-                    if uni_key in pool_info_map:
-                        in_uni = True
-                        
-                if not in_kuru and not in_uni:
+                if not _has_market(t_in, t_out, target_map, pool_info_map):
                     # Skip if neither DEX has this pair
                     continue
 
@@ -332,19 +577,231 @@ def scan_market(override_tokens=None, override_decimals=None, pool_info_map=None
             
     print(f"  > Generated {len(requests)} requests ({len(tokens)*(len(tokens)-1)} Edges * {len(TIERS)} Tiers).")
     
-    # 2. Fetch Snapshot
-    print(f"  > Fetching Market Snapshot (Multicall)...")
-    snapshot = get_bulk_quotes(requests, return_by_index=True)
-    results = snapshot.get("results", {}) # Keyed by req_idx
-    network_ms = snapshot.get("network_ms", 0)
+    return requests, req_tier_map
+
+def build_curve_edges(target_map, target_decimals, pool_info_map=None, tiers=None):
+    """
+    Curve mode: one edge per tradable pair, with a ladder range (raw units) wide enough
+    to interpolate every tier in `tiers` (default CURVE_TIERS).
+    """
+    tiers = tiers or CURVE_TIERS
+    tokens = list(target_map.keys())
+    low_usd = min(tiers) / CURVE_LADDER_SPAN
+    high_usd = max(tiers) * CURVE_LADDER_SPAN
+    edges = []
     
-    print(f"  ✅ Snapshot received in {network_ms:.0f}ms.")
+    for t_in in tokens:
+        price_in = PRICE_CACHE.get(t_in, 0.000001) or 0.000001
+        dec = target_decimals.get(t_in, 18)
+        min_raw = max(int(low_usd / price_in * (10**dec)), 1000)
+        max_raw = max(int(high_usd / price_in * (10**dec)), min_raw)
+        
+        for t_out in tokens:
+            if t_in == t_out: continue
+            if not _has_market(t_in, t_out, target_map, pool_info_map): continue
+            edges.append({
+                "tokenInSymbol": t_in,
+                "tokenOutSymbol": t_out,
+                "tokenIn": target_map[t_in],
+                "tokenOut": target_map[t_out],
+                "minAmount": min_raw,
+                "maxAmount": max_raw
+            })
+            
+    print(f"  > Generated {len(edges)} curve edges x {CURVE_STEPS} sizes (covers {len(tiers)} tiers).")
+    return edges
+
+def tier_snapshot_from_curves(curve_snapshot, edges, target_decimals, tiers=None):
+    """
+    Evaluates the edge curves at every tier size (no RPC) and returns (requests, snapshot)
+    in the same shape as build_scan_requests + get_bulk_quotes, so analyze_snapshot is reused.
+    """
+    tiers = tiers or CURVE_TIERS
+    requests = []
+    results = {}
     
-    # 3. Update Price Cache
-    update_price_cache(results, requests)
+    for edge, curve in zip(edges, curve_snapshot.get("curves", [])):
+        if not curve: continue
+        t_in = edge['tokenInSymbol']
+        price_in = PRICE_CACHE.get(t_in, 0.000001) or 0.000001
+        dec = target_decimals.get(t_in, 18)
+        
+        for target_usdt in tiers:
+            amount_readable = target_usdt / price_in
+            raw_amt = int(amount_readable * (10**dec))
+            if raw_amt <= 0 or not curve.covers(raw_amt): continue
+            quote = curve.quote_at(raw_amt)
+            if not quote or quote['amountOut'] <= 0: continue
+            
+            req_idx = len(requests)
+            requests.append({
+                "tokenInSymbol": t_in,
+                "tokenOutSymbol": edge['tokenOutSymbol'],
+                "tokenIn": edge['tokenIn'],
+                "tokenOut": edge['tokenOut'],
+                "amountIn": raw_amt,
+                "amountReadable": amount_readable,
+                "tier": target_usdt
+            })
+            results[req_idx] = quote
+            
+    snapshot = {"results": results, "network_ms": curve_snapshot.get("network_ms", 0), "block": curve_snapshot.get("block")}
+    return requests, snapshot
+
+def _usd_to_raw(usd, token, target_decimals):
+    price = PRICE_CACHE.get(token, 0.000001) or 0.000001
+    return max(int(usd / price * (10**target_decimals.get(token, 18))), 1)
+
+def _sizing_candidates(opps):
+    """
+    Up to SIZING_TOP_N distinct cycles (same tokens, same venues) of opps with a positive
+    gross edge, best first. Returns [((cycle, venues), [opps of that cycle])].
+    """
+    groups = {}
+    for opp in sorted(opps, key=lambda x: x['net_profit_usd'], reverse=True):
+        if not opp.get('cycle') or opp['profit_pct'] <= 0: continue
+        key = (tuple(opp['cycle']), tuple(opp['venues']))
+        groups.setdefault(key, []).append(opp)
+    return list(groups.items())[:SIZING_TOP_N]
+
+def _ladder_edge(t_in, t_out, target_map, min_raw, max_raw):
+    return {
+        "tokenInSymbol": t_in,
+        "tokenOutSymbol": t_out,
+        "tokenIn": target_map[t_in],
+        "tokenOut": target_map[t_out],
+        "minAmount": min_raw,
+        "maxAmount": max(max_raw, min_raw)
+    }
+
+def build_sizing_edges(candidates, target_map, target_decimals, coarse=None):
+    """
+    Ladder edges for the sizing passes. Returns (edges, leg_index) with
+    leg_index[(candidate idx, leg idx)] = edge index.
+    First pass (coarse=None): one edge per distinct leg, covering SIZING_MIN_USD to
+    SIZING_MAX_USD widened by CURVE_LADDER_SPAN (later legs' inputs drift with the rates).
+    Refinement (coarse = first-pass sizings): each leg's chained range inside the bracket.
+    """
+    edges = []
+    leg_index = {}
+    shared = {}
+    for cand_idx, ((cycle, _), _) in enumerate(candidates):
+        if coarse is not None and not coarse[cand_idx]: continue
+        if coarse is not None: ranges = coarse[cand_idx]['leg_ranges']
+        for i, t_in in enumerate(cycle):
+            t_out = cycle[(i + 1) % len(cycle)]
+            if t_in not in target_map or t_out not in target_map: continue
+            if coarse is not None:
+                leg_index[(cand_idx, i)] = len(edges)
+                edges.append(_ladder_edge(t_in, t_out, target_map, *ranges[i]))
+                continue
+            if (t_in, t_out) not in shared:
+                shared[(t_in, t_out)] = len(edges)
+                edges.append(_ladder_edge(t_in, t_out, target_map,
+                                          _usd_to_raw(SIZING_MIN_USD / CURVE_LADDER_SPAN, t_in, target_decimals),
+                                          _usd_to_raw(SIZING_MAX_USD * CURVE_LADDER_SPAN, t_in, target_decimals)))
+            leg_index[(cand_idx, i)] = shared[(t_in, t_out)]
+    return edges, leg_index
+
+def size_candidates(candidates, leg_index, curve_snapshot, target_decimals, coarse=None):
+    """
+    Sizes every candidate from the leg curves of one pass (no RPC), within
+    SIZING_MIN_USD..SIZING_MAX_USD or, for the refinement, within the coarse bracket.
+    Returns one trade_sizing.optimal_size result (plus "leg_ranges") or None per candidate.
+    """
+    curves = curve_snapshot.get("curves", [])
+    sized = []
+    for cand_idx, ((cycle, venues), _) in enumerate(candidates):
+        hops = len(cycle)
+        start = cycle[0]
+        if start not in PRICE_CACHE or (coarse is not None and not coarse[cand_idx]):
+            sized.append(None)
+            continue
+        legs = []
+        for i in range(hops):
+            edge_idx = leg_index.get((cand_idx, i))
+            curve = curves[edge_idx] if edge_idx is not None and edge_idx < len(curves) else None
+            # Round trips stay on their two distinct venues; longer cycles take the best venue per size
+            if curve and hops == 2: curve = venue_curve(curve, venues[i])
+            legs.append(curve)
+        
+        if coarse is None:
+            lo = _usd_to_raw(SIZING_MIN_USD, start, target_decimals)
+            hi = _usd_to_raw(SIZING_MAX_USD, start, target_decimals)
+        else:
+            lo, hi = coarse[cand_idx]['bracket']
+        usd_per_unit = PRICE_CACHE[start] / (10**target_decimals.get(start, 18))
+        _, gas_usd = calculate_net_profit(0, 0, gas_estimate=CYCLE_GAS_PER_HOP * hops)
+        result = optimal_size(legs, usd_per_unit, gas_usd, lo, hi)
+        if result: result['leg_ranges'] = leg_ranges(legs, *result['bracket'])
+        sized.append(result)
+    return sized
+
+def apply_trade_sizing(result, candidates, coarse, fine):
+    """
+    Attaches the refined sizing (the coarse one where refinement failed) as "sizing" and a
+    log line to every opportunity of each candidate; the best opportunity's goes to "best".
+    """
+    count = 0
+    for (_, opps), first, second in zip(candidates, coarse, fine or [None] * len(candidates)):
+        sizing = second if second and (not first or second['net_profit_usd'] >= first['net_profit_usd']) else first
+        if not sizing: continue
+        sizing = {k: v for k, v in sizing.items() if k != 'leg_ranges'}
+        count += 1
+        for opp in opps:
+            opp['sizing'] = sizing
+            opp['logs'].append(f"📐 Optimal Size: ${sizing['size_usd']:,.2f} -> Net Profit: ${sizing['net_profit_usd']:.4f} ({sizing['profit_pct']:.4f}%)")
+    if count: print(f"  📐 Sized {count} cycles.")
+    if result['ranking']: result['best']['sizing'] = result['ranking'][0].get('sizing')
+    return result
+
+def size_opportunities(result, target_map, target_decimals):
+    """
+    Sizing stage of a scan: sizes the best ranked cycles in place with two bulk passes
+    (get_quote_curves) shared by all of them: a wide ladder, then one inside each bracket.
+    """
+    candidates = _sizing_candidates(result['ranking'])
+    if not candidates: return result
+    edges, leg_index = build_sizing_edges(candidates, target_map, target_decimals)
+    print(f"  > Sizing {len(candidates)} cycles ({len(edges)} legs x {SIZING_STEPS} sizes)...")
+    coarse = size_candidates(candidates, leg_index, get_quote_curves(edges, SIZING_STEPS), target_decimals)
     
-    # 4. Separate Results by Tier and Build Graphs
-    # graphs[tier_value][tokenIn][tokenOut] = data
+    edges, leg_index = build_sizing_edges(candidates, target_map, target_decimals, coarse)
+    fine = size_candidates(candidates, leg_index, get_quote_curves(edges, SIZING_STEPS), target_decimals, coarse) if edges else None
+    return apply_trade_sizing(result, candidates, coarse, fine)
+
+async def async_size_opportunities(result, target_map, target_decimals):
+    """
+    size_opportunities for asyncio callers.
+    """
+    from async_pricing import async_get_quote_curves
+    
+    candidates = _sizing_candidates(result['ranking'])
+    if not candidates: return result
+    edges, leg_index = build_sizing_edges(candidates, target_map, target_decimals)
+    print(f"  > Sizing {len(candidates)} cycles ({len(edges)} legs x {SIZING_STEPS} sizes, async)...")
+    curves = await async_get_quote_curves(edges, SIZING_STEPS)
+    coarse = size_candidates(candidates, leg_index, curves, target_decimals)
+    
+    edges, leg_index = build_sizing_edges(candidates, target_map, target_decimals, coarse)
+    fine = None
+    if edges:
+        curves = await async_get_quote_curves(edges, SIZING_STEPS)
+        fine = size_candidates(candidates, leg_index, curves, target_decimals, coarse)
+    return apply_trade_sizing(result, candidates, coarse, fine)
+
+def _resolve_scan_tokens(override_tokens, override_decimals):
+    if override_tokens and len(override_tokens) > 1:
+        print(f"  🔹 Using Dynamic Token Set: {override_tokens}")
+        # print(f"  🔹 Using Dynamic Token Set: {list(override_tokens.keys())}")
+        return override_tokens, override_decimals or {}
+    return TOKEN_MAP, TOKEN_DECIMALS
+
+def build_tier_graphs(results, requests):
+    """
+    graphs[tier_value][tokenIn][tokenOut] = best venue's data + "venues" (every venue's quote)
+    from get_bulk_quotes results keyed by req_idx.
+    """
     tier_graphs = defaultdict(lambda: defaultdict(dict))
     
     for req_idx, quote in results.items():
@@ -352,26 +809,59 @@ def scan_market(override_tokens=None, override_decimals=None, pool_info_map=None
         tier = req['tier']
         t_in = req['tokenInSymbol']
         t_out = req['tokenOutSymbol']
-        
-        amount_out_raw = quote['amountOut']
         dec_out = TOKEN_DECIMALS.get(t_out, 18)
-        readable_out = amount_out_raw / (10**dec_out)
         
-        rate = readable_out / req['amountReadable']
+        # Multigraph: keep the alternatives get_bulk_quotes ranked, not just the winner
+        venues = []
+        for venue_quote in quote.get('all_quotes') or [quote]:
+            readable_out = venue_quote['amountOut'] / (10**dec_out)
+            venues.append({
+                "rate": readable_out / req['amountReadable'],
+                "fee": venue_quote.get('fee', 3000),
+                "dex": venue_quote.get('dex', 'Unknown'),
+                "venue": venue_quote.get('venue'),
+                "strategy": venue_quote.get('strategy', 'Unknown')
+            })
+        best = max(venues, key=lambda v: v['rate'])
         
-        tier_graphs[tier][t_in][t_out] = {
-            "rate": rate,
-            "fee": quote.get('fee', 3000),
-            "dex": quote.get('dex', 'Unknown'),
-            "strategy": quote.get('strategy', 'Unknown')
-        }
+        tier_graphs[tier][t_in][t_out] = dict(best, venues=venues)
+    return tier_graphs
+
+def analyze_snapshot(snapshot, requests, tokens, pool_info_map, start_time, tiers=None):
+    """
+    Turns a get_bulk_quotes snapshot (keyed by req_idx) into the scan_market result.
+    """
+    tiers = tiers or TIERS
+    results = snapshot.get("results", {}) # Keyed by req_idx
+    network_ms = snapshot.get("network_ms", 0)
+    
+    print(f"  ✅ Snapshot received in {network_ms:.0f}ms.")
+    
+    # 3. Update Price Cache
+    update_price_cache(results, requests)
+    
+    # 4. Separate Results by Tier and Build Graphs
+    tier_graphs = build_tier_graphs(results, requests)
+    if CYCLE_INDEX_ENABLED:
+        CYCLE_INDEX.update(tier_graphs, requests)
         
     # 5. Analyze Each Tier
     all_opps = []
     best_by_tier = {}
     
-    for tier in TIERS:
-        opps = analyze_graph_for_tier(tier_graphs[tier], tier, pool_info_map)
+    total_found = 0
+    matrix = RateMatrix.from_graphs(tier_graphs, tiers) if MATRIX_BACKEND else None
+    for tier in tiers:
+        if matrix is not None:
+            opps, found = analyze_matrix_for_tier(matrix, tier_graphs[tier], tier, pool_info_map)
+        else:
+            opps = analyze_graph_for_tier(tier_graphs[tier], tier, pool_info_map)
+            found = len(opps)
+        total_found += found
+        if CYCLE_INDEX_ENABLED:
+            # Longer cycles are only enumerated by the cycle search: keep them indexed too
+            for opp in opps:
+                if len(opp.get('cycle', ())) > INDEX_MAX_HOPS: CYCLE_INDEX.track(tier, opp['cycle'])
         opps.sort(key=lambda x: x['net_profit_usd'], reverse=True)
         if opps:
             best_by_tier[tier] = opps[0]
@@ -403,8 +893,8 @@ def scan_market(override_tokens=None, override_decimals=None, pool_info_map=None
     
     return {
         "total_scanned": len(tokens),
-        "count": len(all_opps),
-        "tiers_scanned": TIERS,
+        "count": total_found,
+        "tiers_scanned": tiers,
         "best_by_tier": best_by_tier,
         "best": {
             "token": "WMON",
@@ -421,3 +911,70 @@ def scan_market(override_tokens=None, override_decimals=None, pool_info_map=None
 if __name__ == "__main__":
     res = scan_market()
     print(json.dumps(res, indent=2))
+
+def scan_market(override_tokens=None, override_decimals=None, pool_info_map=None, curve_mode=None):
+    """
+    Dynamic Multi-Tier Scan:
+    1. Calculate amounts for each token to match $1, $10, $100.
+    2. Fetch ALL tiers in ONE Multicall.
+    3. Analyze each tier separately.
+    4. Size the best cycles between SIZING_MIN_USD and SIZING_MAX_USD (TRADE_SIZING).
+    curve_mode (default CURVE_SCAN): quote a size ladder per edge instead and analyze CURVE_TIERS.
+    """
+    print(f"🌍 Starting Dynamic Multi-Tier Scan...")
+    start_time = time.time()
+    
+    # 0. determine token set
+    target_map, target_decimals = _resolve_scan_tokens(override_tokens, override_decimals)
+
+    if CURVE_SCAN if curve_mode is None else curve_mode:
+        # 1/2. One ladder of sizes per edge, tiers read off the curves
+        edges = build_curve_edges(target_map, target_decimals, pool_info_map)
+        print(f"  > Fetching Quote Curves (Multicall)...")
+        curves = get_quote_curves(edges)
+        requests, snapshot = tier_snapshot_from_curves(curves, edges, target_decimals)
+        result = analyze_snapshot(snapshot, requests, list(target_map.keys()), pool_info_map, start_time, CURVE_TIERS)
+    else:
+        # 1. Build Requests for All Pairs & Tiers
+        requests, _ = build_scan_requests(target_map, target_decimals, pool_info_map)
+        
+        # 2. Fetch Snapshot
+        print(f"  > Fetching Market Snapshot (Multicall)...")
+        snapshot = get_bulk_quotes(requests, return_by_index=True)
+        
+        result = analyze_snapshot(snapshot, requests, list(target_map.keys()), pool_info_map, start_time)
+    
+    # 4. Size the best cycles (one more bulk pass)
+    if TRADE_SIZING:
+        size_opportunities(result, target_map, target_decimals)
+    return result
+
+async def async_scan_market(override_tokens=None, override_decimals=None, pool_info_map=None, curve_mode=None):
+    """
+    scan_market for asyncio callers (e.g. the sentinel loop): same arguments and result,
+    the snapshot is fetched with async_pricing.async_get_bulk_quotes on the running loop.
+    """
+    from async_pricing import async_get_bulk_quotes, async_get_quote_curves
+    
+    print(f"🌍 Starting Dynamic Multi-Tier Scan (async)...")
+    start_time = time.time()
+    
+    target_map, target_decimals = _resolve_scan_tokens(override_tokens, override_decimals)
+    
+    if CURVE_SCAN if curve_mode is None else curve_mode:
+        edges = build_curve_edges(target_map, target_decimals, pool_info_map)
+        print(f"  > Fetching Quote Curves (Async Multicall)...")
+        curves = await async_get_quote_curves(edges)
+        requests, snapshot = tier_snapshot_from_curves(curves, edges, target_decimals)
+        result = analyze_snapshot(snapshot, requests, list(target_map.keys()), pool_info_map, start_time, CURVE_TIERS)
+    else:
+        requests, _ = build_scan_requests(target_map, target_decimals, pool_info_map)
+        
+        print(f"  > Fetching Market Snapshot (Async Multicall)...")
+        snapshot = await async_get_bulk_quotes(requests, return_by_index=True)
+        
+        result = analyze_snapshot(snapshot, requests, list(target_map.keys()), pool_info_map, start_time)
+    
+    if TRADE_SIZING:
+        await async_size_opportunities(result, target_map, target_decimals)
+    return result
@@ -0,0 +1,144 @@
+import asyncio
+import time
+
+import aiohttp
+
+from web3_pricing import (
+    RPC_ROUTER, MULTICALL3_ADDRESS, MULTICALL_PLANNER, HEAD_BLOCK,
+    prepare_bulk, build_bulk_calls, aggregate_bulk_results
+)
+from chunk_planner import async_fetch_with_split
+from quote_curve import CURVE_STEPS, expand_ladder_requests, curves_from_snapshot
+from calldata import encode_try_aggregate
+from returndata import decode_try_aggregate
+
+# ----------------------------------------------------------------------------------
+# ASYNC PRICING PIPELINE (AsyncWeb3)
+# Same stages as web3_pricing.get_bulk_quotes (build -> fetch -> aggregate), but the
+# fetch phase runs as coroutines on the caller's event loop over one pooled HTTP session,
+# so the sentinel loop can price without spawning a thread pool per scan.
+# ----------------------------------------------------------------------------------
+
+ASYNC_MAX_CONCURRENCY = 8    # In-flight eth_calls per event loop
+ASYNC_POOL_SIZE = 16         # Keep-alive connections in the shared session
+ASYNC_TIMEOUT = 10           # Seconds (matches the sync provider)
+
+# Event loop -> Future resolving to the client dict (sessions are bound to their loop)
+_CLIENTS = {}
+
+
+async def _create_client():
+    from web3 import AsyncWeb3 # Loaded with the first client, not on import
+    from rpc_provider import RoutedAsyncHTTPProvider
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=ASYNC_POOL_SIZE, ttl_dns_cache=300),
+        timeout=aiohttp.ClientTimeout(total=ASYNC_TIMEOUT)
+    )
+    # Endpoint picked per request by the shared router (failover, lagging nodes, stats)
+    provider = RoutedAsyncHTTPProvider(RPC_ROUTER, session)
+    return {
+        "w3": AsyncWeb3(provider),
+        "session": session,
+        "semaphore": asyncio.Semaphore(ASYNC_MAX_CONCURRENCY)
+    }
+
+
+async def get_async_client():
+    """
+    Returns the AsyncWeb3 client for the running loop (created once, then reused).
+    """
+    loop = asyncio.get_running_loop()
+    fut = _CLIENTS.get(loop)
+    if fut is None:
+        fut = asyncio.ensure_future(_create_client())
+        _CLIENTS[loop] = fut
+    try:
+        return await asyncio.shield(fut)
+    except Exception:
+        _CLIENTS.pop(loop, None)
+        raise
+
+
+async def close_async_pricing():
+    """
+    Closes the pooled session of the running loop (call before the loop shuts down).
+    """
+    fut = _CLIENTS.pop(asyncio.get_running_loop(), None)
+    if fut is None or not fut.done() or fut.exception(): return
+    await fut.result()["session"].close()
+
+
+async def async_call_try_aggregate(calls, block_identifier='latest', copy=True):
+    """
+    Async twin of web3_pricing.call_try_aggregate. Concurrency is bounded per loop.
+    """
+    client = await get_async_client()
+    async with client["semaphore"]:
+        raw = await client["w3"].eth.call(
+            {"to": MULTICALL3_ADDRESS, "data": encode_try_aggregate(calls)}, block_identifier
+        )
+    return decode_try_aggregate(raw, copy=copy)
+
+
+async def async_get_scan_block():
+    """
+    Async twin of web3_pricing.get_scan_block (shares HEAD_BLOCK with the sync path).
+    """
+    block = HEAD_BLOCK.get()
+    if block is None:
+        try:
+            client = await get_async_client()
+            async with client["semaphore"]:
+                block = await client["w3"].eth.block_number
+            HEAD_BLOCK.note(block)
+        except Exception as e:
+            print(f"⚠️ Could not pin scan block: {e}")
+            return None
+    return block
+
+
+async def async_get_bulk_quotes(requests, return_by_index=False, dexes=None):
+    """
+    asyncio version of web3_pricing.get_bulk_quotes. Same arguments, same result shape.
+    """
+    # 0/1. Adapter warm-up + calldata pinned to one block (blocking RPC/CPU work stays off the loop)
+    await asyncio.to_thread(prepare_bulk, requests, dexes)
+    block = await async_get_scan_block()
+    plan = await asyncio.to_thread(build_bulk_calls, requests, block=block, dexes=dexes)
+    total_calls = plan.calls
+
+    if not plan.has_work():
+        return {}
+    block_param = 'latest' if block is None else block
+
+    async def fetch(calls):
+        return await async_call_try_aggregate(calls, block_param, copy=False)
+
+    # 2. Concurrent Chunk Execution (planner is shared with the sync path)
+    call_kinds = plan.call_kinds()
+    chunks = MULTICALL_PLANNER.plan(call_kinds)
+    print(f"    (Splitting {len(total_calls)} calls into {len(chunks)} async batches...)")
+
+    t0 = time.time()
+    chunk_results = await asyncio.gather(*(
+        async_fetch_with_split(fetch, total_calls, call_kinds, MULTICALL_PLANNER, start, end)
+        for start, end in chunks
+    ))
+    network_ms = (time.time() - t0) * 1000
+    if total_calls: MULTICALL_PLANNER.finish_scan()
+
+    all_results = [None] * len(total_calls)
+    for (start, _), results in zip(chunks, chunk_results):
+        all_results[start:start + len(results)] = results
+
+    # 3. Decode & Aggregate
+    return aggregate_bulk_results(requests, plan, all_results, return_by_index, network_ms)
+
+
+async def async_get_quote_curves(edges, steps=CURVE_STEPS):
+    """
+    asyncio version of web3_pricing.get_quote_curves.
+    """
+    requests, owners = expand_ladder_requests(edges, steps)
+    snapshot = await async_get_bulk_quotes(requests, return_by_index=True) if requests else {}
+    return curves_from_snapshot(edges, requests, owners, snapshot)
@@ -0,0 +1,173 @@
+from eth_utils import keccak
+
+# ----------------------------------------------------------------------------------
+# PRECOMPILED CALLDATA TEMPLATES
+# Selector + static words are computed once per function; each call only splices
+# addresses / integers into a copy of a preallocated bytearray. Replaces
+# contract.encode_abi / build_transaction in the quoting hot loops.
+# ----------------------------------------------------------------------------------
+
+WORD = 32
+_ADDRESS_CACHE = {}
+
+
+def function_selector(signature):
+    return keccak(text=signature)[:4]
+
+
+def address_bytes(address):
+    """
+    20-byte form of a hex address (cached: the same handful of tokens repeat in every scan).
+    """
+    raw = _ADDRESS_CACHE.get(address)
+    if raw is None:
+        raw = bytes.fromhex(address[2:] if address.startswith(('0x', '0X')) else address)
+        if len(raw) != 20:
+            raise ValueError(f"Invalid address: {address}")
+        _ADDRESS_CACHE[address] = raw
+    return raw
+
+
+def _flatten_types(arg_str):
+    """
+    Splits 'address,(uint256,uint24),bool' into flat static types. Static tuples are
+    ABI-encoded inline, so flattening them keeps the word layout identical.
+    """
+    types, depth, current = [], 0, ""
+    for ch in arg_str:
+        if ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        if ch == ',' and depth == 0:
+            types.append(current)
+            current = ""
+        else:
+            current += ch
+    if current: types.append(current)
+
+    flat = []
+    for t in types:
+        if t.startswith('('):
+            flat.extend(_flatten_types(t[1:-1]))
+        else:
+            flat.append(t)
+    return flat
+
+
+class StaticCallTemplate:
+    """
+    Calldata template for functions whose arguments are all static (address/uint/int/bool).
+    """
+
+    def __init__(self, signature):
+        self.signature = signature
+        self.selector = function_selector(signature)
+        arg_str = signature[signature.index('(') + 1:signature.rindex(')')]
+        self.types = _flatten_types(arg_str) if arg_str else []
+        for t in self.types:
+            if t.endswith(']') or t in ('bytes', 'string'):
+                raise ValueError(f"Dynamic type '{t}' not supported in {signature}")
+        self._template = bytes(self.selector) + bytes(WORD * len(self.types))
+        self._writers = [self._writer_for(t, 4 + i * WORD) for i, t in enumerate(self.types)]
+
+    @staticmethod
+    def _writer_for(abi_type, offset):
+        if abi_type == 'address':
+            start = offset + 12
+            def write(buf, value):
+                buf[start:start + 20] = address_bytes(value)
+        elif abi_type.startswith('int'):
+            def write(buf, value):
+                buf[offset:offset + WORD] = (int(value) % (1 << 256)).to_bytes(WORD, 'big')
+        else:  # uintN / bool
+            def write(buf, value):
+                buf[offset:offset + WORD] = int(value).to_bytes(WORD, 'big')
+        return write
+
+    def encode(self, *args):
+        if len(args) != len(self._writers):
+            raise ValueError(f"{self.signature} expects {len(self._writers)} args, got {len(args)}")
+        buf = bytearray(self._template)
+        for write, value in zip(self._writers, args):
+            write(buf, value)
+        return bytes(buf)
+
+
+# --- Templates used by pricing ---
+
+QUOTE_EXACT_INPUT_SINGLE = StaticCallTemplate("quoteExactInputSingle((address,address,uint256,uint24,uint160))")
+AMBIENT_QUERY_PRICE = StaticCallTemplate("queryPrice(address,address,uint256)")
+AMBIENT_QUERY_LIQUIDITY = StaticCallTemplate("queryLiquidity(address,address,uint256)")
+AMBIENT_QUERY_POOL_PARAMS = StaticCallTemplate("queryPoolParams(address,address,uint256)")
+KURU_BEST_BID_ASK = StaticCallTemplate("bestBidAsk()")
+KURU_GET_L2_BOOK = StaticCallTemplate("getL2Book()")
+KURU_GET_MARKET_PARAMS = StaticCallTemplate("getMarketParams()")
+FACTORY_GET_POOL = StaticCallTemplate("getPool(address,address,uint24)")
+POOL_SLOT0 = StaticCallTemplate("slot0()")
+POOL_LIQUIDITY = StaticCallTemplate("liquidity()")
+POOL_TICK_SPACING = StaticCallTemplate("tickSpacing()")
+POOL_TICK_BITMAP = StaticCallTemplate("tickBitmap(int16)")
+POOL_TICKS = StaticCallTemplate("ticks(int24)")
+MULTICALL_GET_BLOCK_NUMBER = StaticCallTemplate("getBlockNumber()")
+ERC20_SYMBOL = StaticCallTemplate("symbol()")
+ERC20_DECIMALS = StaticCallTemplate("decimals()")
+ERC20_BALANCE_OF = StaticCallTemplate("balanceOf(address)")
+MULTICALL_GET_ETH_BALANCE = StaticCallTemplate("getEthBalance(address)")
+
+TRY_AGGREGATE_SELECTOR = function_selector("tryAggregate(bool,(address,bytes)[])")
+
+
+def encode_quote_exact_input_single(token_in, token_out, amount_in, fee, sqrt_price_limit_x96=0):
+    return QUOTE_EXACT_INPUT_SINGLE.encode(token_in, token_out, amount_in, fee, sqrt_price_limit_x96)
+
+
+def _as_bytes(call_data):
+    if isinstance(call_data, (bytes, bytearray)): return call_data
+    if isinstance(call_data, str):
+        return bytes.fromhex(call_data[2:] if call_data.startswith('0x') else call_data)
+    return bytes(call_data)
+
+
+def encode_try_aggregate(calls, require_success=False):
+    """
+    ABI-encodes Multicall3.tryAggregate(bool, (address,bytes)[]) into one preallocated buffer.
+    calls: list of {"target": address, "callData": bytes|hex} dicts or (target, callData) tuples.
+    """
+    n = len(calls)
+    targets, payloads = [], []
+    for call in calls:
+        if isinstance(call, dict):
+            target, data = call["target"], call["callData"]
+        else:
+            target, data = call
+        targets.append(address_bytes(target))
+        payloads.append(_as_bytes(data))
+
+    # Element i = address word + offset word + length word + padded data
+    sizes = [3 * WORD + ((len(d) + WORD - 1) // WORD) * WORD for d in payloads]
+    array_start = 4 + 2 * WORD             # selector + bool + array offset
+    elements_start = array_start + WORD + n * WORD  # length word + offsets
+    buf = bytearray(elements_start + sum(sizes))
+
+    buf[0:4] = TRY_AGGREGATE_SELECTOR
+    if require_success: buf[4 + WORD - 1] = 1
+    buf[4 + WORD:4 + 2 * WORD] = (2 * WORD).to_bytes(WORD, 'big')
+    buf[array_start:array_start + WORD] = n.to_bytes(WORD, 'big')
+
+    rel = n * WORD  # Offsets are relative to the first offset word
+    pos = elements_start
+    for i in range(n):
+        head = array_start + WORD + i * WORD
+        buf[head:head + WORD] = rel.to_bytes(WORD, 'big')
+
+        data = payloads[i]
+        buf[pos + 12:pos + WORD] = targets[i]
+        buf[pos + WORD:pos + 2 * WORD] = (2 * WORD).to_bytes(WORD, 'big')
+        buf[pos + 2 * WORD:pos + 3 * WORD] = len(data).to_bytes(WORD, 'big')
+        buf[pos + 3 * WORD:pos + 3 * WORD + len(data)] = data
+
+        rel += sizes[i]
+        pos += sizes[i]
+
+    return bytes(buf)
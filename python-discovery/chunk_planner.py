@@ -0,0 +1,192 @@
+import threading
+import time
+from collections import deque
+
+# ----------------------------------------------------------------------------------
+# ADAPTIVE MULTICALL CHUNK PLANNER
+# Sizes tryAggregate chunks from per-call gas estimates (QuoterV2 gasEstimate) and
+# observed latency instead of a fixed BATCH_SIZE. Failed chunks (gas cap / timeout)
+# shrink the gas budget; clean scans slowly grow it back. State persists across scans.
+# ----------------------------------------------------------------------------------
+
+DEFAULT_GAS_CAP = 30_000_000     # Conservative eth_call gas cap for public RPCs
+DEFAULT_CALL_GAS = 120_000       # Prior for call kinds we have not measured yet
+DEFAULT_WORKERS = 8
+
+GAS_EMA_ALPHA = 0.2
+BUDGET_GROWTH = 1.1              # Budget probe factor after a scan without failures
+BUDGET_SHRINK = 0.5              # Budget factor after a chunk fails
+MIN_BUDGET = 500_000
+LATENCY_SAMPLES = 64
+MAX_SPLIT_DEPTH = 4              # 40 calls -> at most 16 sub-chunks when the RPC is down
+
+
+class ChunkPlanner:
+    """
+    Learns how much gas a multicall chunk can carry on this RPC and how latency scales
+    with chunk gas, then plans chunks that are as large as safe but still spread the
+    work across the worker pool.
+    """
+
+    def __init__(self, gas_cap=DEFAULT_GAS_CAP, max_workers=DEFAULT_WORKERS, max_calls_per_chunk=250, gas_priors=None):
+        self._lock = threading.Lock()
+        self.gas_cap = gas_cap
+        self.gas_budget = gas_cap * 0.6
+        self.max_workers = max_workers
+        self.max_calls_per_chunk = max_calls_per_chunk
+        self.gas_priors = dict(gas_priors or {})
+        self.call_gas = {}  # call kind -> EMA of gas used
+        self.latency = deque(maxlen=LATENCY_SAMPLES)  # (chunk_gas, ms)
+        self._failed_this_scan = False
+
+    # --- Measurements ---
+
+    def estimate_gas(self, kind):
+        gas = self.call_gas.get(kind)
+        if gas is None: gas = self.gas_priors.get(kind, DEFAULT_CALL_GAS)
+        return gas
+
+    def record_gas(self, kind, gas_used):
+        if not gas_used or gas_used <= 0: return
+        with self._lock:
+            prev = self.call_gas.get(kind)
+            self.call_gas[kind] = gas_used if prev is None else prev + GAS_EMA_ALPHA * (gas_used - prev)
+
+    def record_chunk(self, chunk_gas, latency_ms, ok, n_calls=2):
+        with self._lock:
+            if ok:
+                self.latency.append((chunk_gas, latency_ms))
+            elif n_calls > 1:
+                self._failed_this_scan = True
+                # The cap sits somewhere below this chunk: never plan this large again
+                self.gas_budget = max(MIN_BUDGET, min(self.gas_budget, chunk_gas * BUDGET_SHRINK))
+
+    def finish_scan(self):
+        """
+        Called once per scan: grow the budget back toward the cap after a clean run.
+        """
+        with self._lock:
+            if not self._failed_this_scan:
+                self.gas_budget = min(self.gas_cap, self.gas_budget * BUDGET_GROWTH)
+            self._failed_this_scan = False
+
+    def latency_model(self):
+        """
+        Least-squares fit of latency_ms = base_ms + ms_per_gas * chunk_gas over recent chunks.
+        """
+        samples = list(self.latency)
+        if len(samples) < 4: return None
+        n = len(samples)
+        mean_g = sum(g for g, _ in samples) / n
+        mean_t = sum(t for _, t in samples) / n
+        var_g = sum((g - mean_g) ** 2 for g, _ in samples)
+        if var_g == 0: return None
+        slope = sum((g - mean_g) * (t - mean_t) for g, t in samples) / var_g
+        slope = max(slope, 0.0)
+        base = max(mean_t - slope * mean_g, 0.0)
+        return base, slope
+
+    # --- Planning ---
+
+    def target_chunk_gas(self, total_gas):
+        """
+        Gas per chunk: spread across workers, but never so small that the round trip
+        dominates (chunk compute time should at least match the fixed RPC overhead).
+        """
+        target = total_gas / max(1, self.max_workers)
+        model = self.latency_model()
+        if model:
+            base_ms, ms_per_gas = model
+            if ms_per_gas > 0:
+                target = max(target, base_ms / ms_per_gas)
+        return max(1, min(self.gas_budget, target))
+
+    def plan(self, kinds):
+        """
+        kinds: call kind per call (in order). Returns list of (start, end) index ranges.
+        """
+        if not kinds: return []
+        gas = [self.estimate_gas(k) for k in kinds]
+        target = self.target_chunk_gas(sum(gas))
+
+        chunks = []
+        start, acc = 0, 0
+        for i, g in enumerate(gas):
+            if i > start and (acc + g > target or i - start >= self.max_calls_per_chunk):
+                chunks.append((start, i))
+                start, acc = i, 0
+            acc += g
+        chunks.append((start, len(gas)))
+        return chunks
+
+    def chunk_gas(self, kinds):
+        return sum(self.estimate_gas(k) for k in kinds)
+
+    def workers(self, n_chunks):
+        return max(1, min(self.max_workers, n_chunks))
+
+    def stats(self):
+        model = self.latency_model()
+        return {
+            "gas_budget": int(self.gas_budget),
+            "call_gas": {k: int(v) for k, v in self.call_gas.items()},
+            "latency_base_ms": round(model[0], 2) if model else None,
+            "latency_ms_per_mgas": round(model[1] * 1e6, 3) if model else None
+        }
+
+
+def fetch_with_split(fetch, calls, kinds, planner, start=0, end=None, depth=0):
+    """
+    Runs fetch(calls[start:end]) and, when the chunk fails (exception or short/empty
+    result, e.g. the eth_call gas cap), splits it in half and retries each side.
+    Returns one (success, returnData) per call.
+    """
+    if end is None: end = len(calls)
+    chunk = calls[start:end]
+    chunk_gas = planner.chunk_gas(kinds[start:end])
+
+    t0 = time.perf_counter()
+    try:
+        result = fetch(chunk)
+        ok = result is not None and len(result) == len(chunk)
+    except Exception:
+        result, ok = None, False
+    planner.record_chunk(chunk_gas, (time.perf_counter() - t0) * 1000, ok, n_calls=end - start)
+
+    if ok: return list(result)
+    if end - start <= 1 or depth >= MAX_SPLIT_DEPTH:
+        return [(False, b"")] * (end - start)
+
+    mid = start + (end - start) // 2
+    return (fetch_with_split(fetch, calls, kinds, planner, start, mid, depth + 1) +
+            fetch_with_split(fetch, calls, kinds, planner, mid, end, depth + 1))
+
+
+async def async_fetch_with_split(fetch, calls, kinds, planner, start=0, end=None, depth=0):
+    """
+    asyncio twin of fetch_with_split: fetch is a coroutine function. Halves are retried concurrently.
+    """
+    import asyncio
+
+    if end is None: end = len(calls)
+    chunk = calls[start:end]
+    chunk_gas = planner.chunk_gas(kinds[start:end])
+
+    t0 = time.perf_counter()
+    try:
+        result = await fetch(chunk)
+        ok = result is not None and len(result) == len(chunk)
+    except Exception:
+        result, ok = None, False
+    planner.record_chunk(chunk_gas, (time.perf_counter() - t0) * 1000, ok, n_calls=end - start)
+
+    if ok: return list(result)
+    if end - start <= 1 or depth >= MAX_SPLIT_DEPTH:
+        return [(False, b"")] * (end - start)
+
+    mid = start + (end - start) // 2
+    left, right = await asyncio.gather(
+        async_fetch_with_split(fetch, calls, kinds, planner, start, mid, depth + 1),
+        async_fetch_with_split(fetch, calls, kinds, planner, mid, end, depth + 1)
+    )
+    return left + right
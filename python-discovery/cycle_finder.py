@@ -0,0 +1,196 @@
+import math
+
+# ----------------------------------------------------------------------------------
+# NEGATIVE-CYCLE ARBITRAGE SEARCH (Bellman-Ford / SPFA over -log(rate))
+# A cycle is profitable when the product of its rates is > 1, i.e. when the sum of
+# -log(rate) along it is negative.
+#   1. SPFA from every token at once (only re-relaxing tokens whose distance changed)
+#      proves whether any negative cycle exists; most scans stop here.
+#   2. Otherwise every simple cycle of up to MAX_CYCLE_HOPS hops is enumerated exactly,
+#      source by source, with a depth-first search over simple paths. A hop-limited
+#      Bellman-Ford backwards from the source bounds the cheapest way home from every
+#      token, so branches that can no longer close a profitable cycle are cut early.
+# Each source only explores tokens not handled as a source before it, so every cycle is
+# found once; cycles are stored rotation-free (lowest token first) with their exact rate.
+# ----------------------------------------------------------------------------------
+
+MAX_CYCLE_HOPS = 5          # Longer cycles cost too much gas to be worth executing
+MIN_CYCLE_PROFIT = 0.0      # Minimum gross edge (0.001 = 0.1%) for a cycle to be reported
+MAX_CYCLES = 200            # Best cycles returned per graph
+
+
+def build_log_edges(graph):
+    """
+    {token_in: {token_out: {"rate", ...}}} -> {token_in: [(token_out, -log(rate))]}.
+    Edges without a positive rate are dropped.
+    """
+    edges = {}
+    for t_in, outs in graph.items():
+        for t_out, edge in outs.items():
+            rate = edge.get('rate', 0) if isinstance(edge, dict) else edge
+            if t_in == t_out or not rate or rate <= 0: continue
+            edges.setdefault(t_in, []).append((t_out, -math.log(rate)))
+    return edges
+
+
+def canonical_cycle(cycle):
+    """
+    Rotation of a cycle (list of tokens, first not repeated) that starts at its lowest token.
+    """
+    start = min(range(len(cycle)), key=lambda i: cycle[i])
+    return tuple(cycle[start:] + cycle[:start])
+
+
+def rotate_cycle(cycle, start):
+    """
+    The same cycle starting at `start` (unchanged if `start` is not on it).
+    """
+    cycle = list(cycle)
+    if start not in cycle: return tuple(cycle)
+    i = cycle.index(start)
+    return tuple(cycle[i:] + cycle[:i])
+
+
+def cycle_rate(graph, cycle):
+    """
+    Product of the rates along a cycle (0 if an edge is missing).
+    """
+    rate = 1.0
+    for i, t_in in enumerate(cycle):
+        edge = graph.get(t_in, {}).get(cycle[(i + 1) % len(cycle)])
+        if not edge: return 0.0
+        rate *= edge.get('rate', 0) if isinstance(edge, dict) else edge
+    return rate
+
+
+def _pred_cycles(pred, starts):
+    """
+    Cycles of the predecessor graph reachable backwards from `starts`.
+    Each token is walked at most once per call (O(tokens)).
+    """
+    cycles = []
+    state = {}  # token -> walk id that visited it
+    for walk_id, start in enumerate(starts):
+        node = start
+        path = []
+        while node is not None and node not in state:
+            state[node] = walk_id
+            path.append(node)
+            node = pred.get(node)
+        if node is None or state[node] != walk_id: continue  # Reached a root or an older walk
+        # node is on the current walk twice: the cycle is the path from its first visit, reversed
+        cycle = path[path.index(node):]
+        cycles.append(cycle[::-1])
+    return cycles
+
+
+def _first_cycle(edges, nodes):
+    """
+    SPFA from a virtual source linked to every token: relaxes until the predecessor graph
+    contains a cycle (always negative) and returns it, or None once distances settle.
+    """
+    dist = {node: 0.0 for node in nodes}
+    active = sorted(nodes)
+    pred = {}
+
+    # Without a negative cycle distances settle within len(nodes) rounds
+    for _ in range(len(nodes) + 1):
+        if not active: return None
+        changed = []
+        in_changed = set()
+        for t_in in active:
+            base = dist[t_in]
+            for t_out, weight in edges.get(t_in, ()):
+                candidate = base + weight
+                if candidate < dist[t_out] - 1e-12:
+                    dist[t_out] = candidate
+                    pred[t_out] = t_in
+                    if t_out not in in_changed:
+                        in_changed.add(t_out)
+                        changed.append(t_out)
+        cycles = _pred_cycles(pred, changed)
+        if cycles: return cycles[0]
+        active = changed
+    return None
+
+
+def _reverse_edges(edges):
+    reverse = {}
+    for t_in, outs in edges.items():
+        for t_out, weight in outs:
+            reverse.setdefault(t_out, []).append((t_in, weight))
+    return reverse
+
+
+def _return_bounds(reverse, source, max_hops, excluded):
+    """
+    Hop-limited Bellman-Ford towards `source`: bounds[k][token] is the weight of the
+    cheapest walk of at most k hops from token back to source. Walks may repeat tokens,
+    so this never overestimates the way home of a simple path.
+    """
+    best = {source: 0.0}
+    bounds = [best]
+    for _ in range(max_hops):
+        nxt = dict(best)
+        for t_out, dist in best.items():
+            for t_in, weight in reverse.get(t_out, ()):
+                if t_in in excluded: continue
+                if dist + weight < nxt.get(t_in, math.inf): nxt[t_in] = dist + weight
+        bounds.append(nxt)
+        best = nxt
+    return bounds
+
+
+def _cycles_through(edges, reverse, source, max_hops, threshold, excluded=()):
+    """
+    Every simple cycle through `source` of 2..max_hops hops whose weight is below -threshold
+    and which avoids the `excluded` tokens (sources already handled). Exact: a branch is
+    only cut when even the cheapest walk home (_return_bounds) cannot make it profitable.
+    Returns token lists starting at source.
+    """
+    bounds = _return_bounds(reverse, source, max_hops, excluded)
+    cycles = []
+    stack = [(source, 0.0, [source])]
+    while stack:
+        node, dist, path = stack.pop()
+        hops = len(path)  # Hops of the path once the next edge is taken
+        for t_out, weight in edges.get(node, ()):
+            total = dist + weight
+            if t_out == source:
+                if hops > 1 and total < -threshold: cycles.append(path)
+                continue
+            if hops >= max_hops or t_out in excluded or t_out in path: continue
+            home = bounds[max_hops - hops].get(t_out)
+            if home is None or total + home >= -threshold: continue
+            stack.append((t_out, total, path + [t_out]))
+    return cycles
+
+
+def find_negative_cycles(graph, sources=None, max_hops=MAX_CYCLE_HOPS, min_profit=MIN_CYCLE_PROFIT,
+                         max_cycles=MAX_CYCLES):
+    """
+    Profitable cycles of a rate graph ({token_in: {token_out: {"rate", ...}}}).
+    sources: tokens whose cycles are extracted (None: every token).
+    Returns [{"cycle": (tokens...), "rate": product, "hops": n}] best-first, one entry per
+    cycle regardless of rotation.
+    """
+    edges = build_log_edges(graph)
+    nodes = set(edges)
+    for outs in edges.values():
+        nodes.update(t_out for t_out, _ in outs)
+
+    # Quiet markets have no negative cycle at all: one SPFA pass proves it
+    if not nodes or _first_cycle(edges, nodes) is None: return []
+
+    found = {}
+    threshold = math.log1p(min_profit)
+    reverse = _reverse_edges(edges)
+    done = set()  # Sources handled: their cycles are all found already
+    for source in sorted(nodes if sources is None else set(sources) & nodes):
+        for cycle in _cycles_through(edges, reverse, source, max_hops, threshold, done):
+            key = canonical_cycle(cycle)
+            if key not in found: found[key] = cycle_rate(graph, key)
+        done.add(source)
+
+    ranked = sorted(found.items(), key=lambda item: item[1], reverse=True)
+    return [{"cycle": cycle, "rate": rate, "hops": len(cycle)} for cycle, rate in ranked[:max_cycles]]
@@ -0,0 +1,181 @@
+import bisect
+import threading
+from collections import defaultdict
+
+from cycle_finder import canonical_cycle
+
+# ----------------------------------------------------------------------------------
+# INCREMENTAL CYCLE INDEX
+# A scan rebuilds every tier graph and re-scores every cycle, even when the sentinel saw
+# one swap in one pool. CycleIndex keeps the tier graphs merged across scans, every cycle
+# over them, and a reverse index edge -> cycles through it. Fresh quotes for a few edges
+# (a refreshed pair after a swap, or a whole scan) re-score only the cycles through those
+# edges, and a running ranking (sorted list, bisect) keeps the top-K current, so the cost
+# of an update follows the number of cycles touched, not the size of the market.
+# Scores are plain net profits; opportunity dicts are only built for the top-K.
+# ----------------------------------------------------------------------------------
+
+INDEX_MAX_HOPS = 3   # Cycles enumerated around a new edge (longer ones are added with track())
+INDEX_TOP_K = 20     # Opportunities returned by top_k() by default
+
+
+class CycleIndex:
+    """
+    score(graph, cycle, tier) -> net profit (USD) or None: run on every touched cycle.
+    describe(graph, cycle, tier) -> opportunity dict or None: run for the top-K only.
+    Cycles are keyed (tier, canonical cycle); edges (tier, token_in, token_out).
+    """
+
+    def __init__(self, score, describe, max_hops=INDEX_MAX_HOPS):
+        self.score = score
+        self.describe = describe
+        self.max_hops = max_hops
+        self._lock = threading.Lock()
+        self.graphs = defaultdict(lambda: defaultdict(dict))  # tier -> token_in -> token_out -> edge
+        self.requests = defaultdict(dict)  # (token_in, token_out) -> {tier: quote request behind the edge}
+        self.edge_cycles = defaultdict(set)  # edge key -> cycle keys through it
+        self.cycles = set()                # Every tracked cycle key
+        self.scores = {}                   # cycle key -> net profit (ranked cycles only)
+        self.ranking = []                  # Sorted [(-net profit, cycle key)]
+        self.last_rescored = 0             # Cycles re-scored by the last update
+
+    def __len__(self):
+        return len(self.cycles)
+
+    # --- Cycles ---
+
+    def _cycle_edges(self, tier, cycle):
+        return [(tier, t_in, cycle[(i + 1) % len(cycle)]) for i, t_in in enumerate(cycle)]
+
+    def _cycles_around(self, tier, t_in, t_out):
+        """
+        Simple cycles of 2..max_hops hops that use the edge t_in -> t_out.
+        """
+        graph = self.graphs[tier]
+        found = []
+        stack = [(t_out, [t_in, t_out])]
+        while stack:
+            node, path = stack.pop()
+            for nxt in graph.get(node, ()):
+                if nxt == t_in:
+                    found.append(path)
+                elif nxt not in path and len(path) < self.max_hops:
+                    stack.append((nxt, path + [nxt]))
+        return found
+
+    def _add_cycle(self, tier, cycle):
+        key = (tier, canonical_cycle(list(cycle)))
+        if key in self.cycles: return None
+        self.cycles.add(key)
+        for edge_key in self._cycle_edges(tier, key[1]):
+            self.edge_cycles[edge_key].add(key)
+        return key
+
+    def _drop_cycle(self, key):
+        self._rank(key, None)
+        self.cycles.discard(key)
+        for edge_key in self._cycle_edges(*key):
+            keys = self.edge_cycles.get(edge_key)
+            if keys is not None: keys.discard(key)
+
+    def _rank(self, key, value):
+        old = self.scores.pop(key, None)
+        if old is not None:
+            del self.ranking[bisect.bisect_left(self.ranking, (-old, key))]
+        if value is not None:
+            self.scores[key] = value
+            bisect.insort(self.ranking, (-value, key))
+
+    def _rescore(self, keys):
+        for key in keys:
+            tier, cycle = key
+            graph = self.graphs[tier]
+            if any(t_out not in graph.get(t_in, {}) for _, t_in, t_out in self._cycle_edges(tier, cycle)):
+                self._drop_cycle(key) # An edge is gone; re-enumerated if it comes back
+                continue
+            self._rank(key, self.score(graph, cycle, tier))
+
+    # --- Updates ---
+
+    def _remove_edge(self, edge_key):
+        tier, t_in, t_out = edge_key
+        if self.graphs[tier].get(t_in, {}).pop(t_out, None) is None: return
+        for key in list(self.edge_cycles.pop(edge_key, ())):
+            self._drop_cycle(key)
+
+    def update(self, tier_graphs, requests=()):
+        """
+        Merges fresh edges ({tier: {token_in: {token_out: edge}}}) and re-scores only the
+        cycles through them; new edges bring in every cycle they close. requests are the
+        quote requests behind the edges (kept for requests_for); an edge whose request got
+        no quote this time is removed with its cycles. Returns the number of cycles re-scored.
+        """
+        with self._lock:
+            touched = set()
+            for req in requests:
+                edge_key = (req['tier'], req['tokenInSymbol'], req['tokenOutSymbol'])
+                self.requests[edge_key[1:]][edge_key[0]] = req
+                if edge_key[2] not in tier_graphs.get(edge_key[0], {}).get(edge_key[1], {}):
+                    self._remove_edge(edge_key)
+
+            for tier, graph in tier_graphs.items():
+                for t_in, outs in graph.items():
+                    for t_out, edge in outs.items():
+                        is_new = t_out not in self.graphs[tier][t_in]
+                        self.graphs[tier][t_in][t_out] = edge
+                        if is_new:
+                            for cycle in self._cycles_around(tier, t_in, t_out):
+                                self._add_cycle(tier, cycle)
+                        touched.add((tier, t_in, t_out))
+
+            keys = set()
+            for edge_key in touched:
+                keys.update(self.edge_cycles.get(edge_key, ()))
+            self._rescore(keys)
+            self.last_rescored = len(keys)
+            return len(keys)
+
+    def track(self, tier, cycle):
+        """
+        Adds a cycle longer than max_hops (e.g. one found by cycle_finder) to the index.
+        """
+        with self._lock:
+            key = self._add_cycle(tier, cycle)
+            if key: self._rescore([key])
+
+    # --- Queries ---
+
+    def has_pair(self, token_a, token_b):
+        with self._lock:
+            return any(token_b in graph.get(token_a, {}) or token_a in graph.get(token_b, {})
+                       for graph in self.graphs.values())
+
+    def requests_for(self, pairs):
+        """
+        The quote requests behind both directions of every (token_a, token_b) pair, all tiers.
+        """
+        with self._lock:
+            return [req for token_a, token_b in pairs for pair in ((token_a, token_b), (token_b, token_a))
+                    for req in self.requests.get(pair, {}).values()]
+
+    def top_k(self, k=INDEX_TOP_K):
+        """
+        The k best cycles as opportunity dicts, best first (cycles describe() rejects are skipped).
+        """
+        with self._lock:
+            opportunities = []
+            for _, (tier, cycle) in self.ranking:
+                if len(opportunities) >= k: break
+                opp = self.describe(self.graphs[tier], cycle, tier)
+                if opp: opportunities.append(opp)
+            return opportunities
+
+    def stats(self):
+        with self._lock:
+            return {
+                "tiers": sorted(self.graphs),
+                "edges": sum(len(outs) for graph in self.graphs.values() for outs in graph.values()),
+                "cycles": len(self.cycles),
+                "ranked": len(self.ranking),
+                "last_rescored": self.last_rescored
+            }
@@ -0,0 +1,304 @@
+from eth_utils import to_checksum_address
+
+from ambient_math import ambient_amount_out, decode_pool_params, get_pool_fee, set_pool_fee, DEFAULT_FEE_RATE as AMBIENT_DEFAULT_FEE_RATE
+from calldata import (
+    encode_quote_exact_input_single,
+    AMBIENT_QUERY_PRICE, AMBIENT_QUERY_LIQUIDITY, AMBIENT_QUERY_POOL_PARAMS
+)
+from returndata import decode_quoter_result, decode_uint
+
+# ----------------------------------------------------------------------------------
+# DEX ADAPTERS
+# A venue plugs into bulk quoting by describing three steps, and nothing else:
+#   plan_request() -> answers it can give without RPC, or the eth_calls it needs
+#   decode()       -> turns one call's return data into venue state
+#   finish()       -> prices every request from that state (no RPC)
+# build_bulk_calls asks each enabled adapter for its calls and merges them into ONE
+# call list, so every venue rides in the same multicall chunks, sized by one planner.
+# Call kinds ("UNI", "AMB_PRICE", ...) are unique per adapter and route results back.
+# ----------------------------------------------------------------------------------
+
+# name -> adapter
+DEX_ADAPTERS = {}
+# call kind -> adapter
+_KIND_ADAPTERS = {}
+
+
+def register_adapter(adapter):
+    for kind in adapter.gas_priors:
+        owner = _KIND_ADAPTERS.get(kind)
+        if owner is not None and owner.name != adapter.name:
+            raise ValueError(f"Call kind {kind} already belongs to adapter {owner.name}")
+        _KIND_ADAPTERS[kind] = adapter
+    DEX_ADAPTERS[adapter.name] = adapter
+    return adapter
+
+
+def get_adapters(names):
+    return [DEX_ADAPTERS[name] for name in names if name in DEX_ADAPTERS]
+
+
+def adapter_for_kind(kind):
+    return _KIND_ADAPTERS.get(kind)
+
+
+class BulkPlan:
+    """
+    Calls + bookkeeping of one bulk scan, shared by all adapters.
+    call_map[call_idx] = (req_idxs, kind, param); states[adapter name] is the adapter's
+    scratch space for the scan ("jobs" priced in finish(), "known" venue state, ...).
+    """
+
+    def __init__(self, adapters, block=None, cache=None, planner=None):
+        self.adapters = list(adapters)
+        self.block = block
+        self.cache = cache
+        self.planner = planner
+        self.calls = []
+        self.call_map = {}
+        self.local_results = {}   # req_idx -> quotes priced without a call (local state / cache)
+        self.states = {}
+        self._requested = {}      # (kind, param) -> call index, for calls shared between requests
+        self._claimed = set()     # Venue keys (pool, pair, market) already handled in this plan
+
+    def state(self, adapter):
+        state = self.states.get(adapter.name)
+        if state is None:
+            state = self.states[adapter.name] = {"jobs": [], "known": {}}
+        return state
+
+    def add_call(self, target, call_data, req_idx, kind, param):
+        """
+        Appends one eth_call, or attaches req_idx to the identical call already planned.
+        """
+        key = (kind, param)
+        call_idx = self._requested.get(key)
+        if call_idx is not None:
+            self.call_map[call_idx][0].append(req_idx)
+            return call_idx
+        call_idx = len(self.calls)
+        self.calls.append({"target": target, "callData": call_data})
+        self.call_map[call_idx] = ([req_idx], kind, param)
+        self._requested[key] = call_idx
+        return call_idx
+
+    def attach(self, kind, param, req_idx):
+        """
+        Adds req_idx to an identical call already planned. False if there is none.
+        """
+        call_idx = self._requested.get((kind, param))
+        if call_idx is None: return False
+        self.call_map[call_idx][0].append(req_idx)
+        return True
+
+    def claim(self, key):
+        """
+        True the first time a venue key is seen (its reads are planned once per scan).
+        """
+        if key in self._claimed: return False
+        self._claimed.add(key)
+        return True
+
+    def add_local(self, req_idx, quote):
+        self.local_results.setdefault(req_idx, []).append(quote)
+
+    def cache_get(self, key):
+        if self.cache is None: return False, None
+        return self.cache.get(self.block, key)
+
+    def cache_put(self, key, value):
+        if self.cache is not None: self.cache.put(self.block, key, value)
+
+    def has_work(self):
+        """
+        False when there is nothing to fetch and nothing to price (the scan can return early).
+        """
+        if self.calls or self.local_results: return True
+        return any(state["jobs"] for state in self.states.values())
+
+    def call_kinds(self):
+        return [self.call_map[i][1] for i in range(len(self.calls))]
+
+
+class DexAdapter:
+    """
+    Base adapter. gas_priors maps each call kind the adapter emits to its gas prior
+    (seeds the chunk planner before real gas is measured).
+    """
+
+    name = None
+    label = None
+    gas_priors = {}
+    swap_gas = 150000
+
+    def prepare(self, requests):
+        """
+        Optional blocking warm-up before planning (pool snapshots, metadata, ...).
+        """
+        return None
+
+    def plan_request(self, plan, req_idx, token_in, token_out, amount_in):
+        raise NotImplementedError
+
+    def decode(self, plan, kind, param, req_idxs, success, return_data, results):
+        raise NotImplementedError
+
+    def finish(self, plan, results):
+        """
+        Prices the jobs recorded at plan time from the venue state gathered in decode().
+        """
+        return None
+
+    def quote(self, amount_out, fee, strategy, gas=None, source=None, venue=None):
+        """
+        venue: id of the pool / book that priced it ("<name>:<fee>" unless the adapter has
+        several pools per pair with the same fee, e.g. Ambient pool indexes).
+        """
+        quote = {
+            "dex": self.label,
+            "venue": venue or f"{self.name}:{fee}",
+            "strategy": strategy,
+            "fee": fee,
+            "amountOut": amount_out,
+            "gas": self.swap_gas if gas is None else gas
+        }
+        if source: quote["source"] = source
+        return quote
+
+
+# ----------------------------------------------------------------------------------
+# CONCENTRATED LIQUIDITY (QuoterV2.quoteExactInputSingle per fee tier)
+# Uniswap V3 and its forks (PancakeSwap V3, ...). fee_filter drops tiers without a pool
+# and local_quote prices from in-memory pool state when it is current.
+# ----------------------------------------------------------------------------------
+
+class V3QuoterAdapter(DexAdapter):
+
+    def __init__(self, name, label, short, quoter, fee_tiers, kind, gas_prior=120000,
+                 fee_filter=None, local_quote=None, prepare=None):
+        self.name = name
+        self.label = label
+        self.short = short
+        self.quoter = to_checksum_address(quoter)
+        self.fee_tiers = list(fee_tiers)
+        self.kind = kind
+        self.gas_priors = {kind: gas_prior}
+        self.fee_filter = fee_filter
+        self.local_quote = local_quote
+        self._prepare = prepare
+
+    def prepare(self, requests):
+        if self._prepare: self._prepare(requests, self.fee_tiers)
+
+    def _quote(self, fee, amount_out, gas, source=None):
+        return self.quote(amount_out, fee, f"{self.short} ({fee})", gas, source)
+
+    def plan_request(self, plan, req_idx, token_in, token_out, amount_in):
+        tiers = self.fee_filter(token_in, token_out, self.fee_tiers) if self.fee_filter else self.fee_tiers
+        for fee in tiers:
+            if self.local_quote:
+                local = self.local_quote(token_in, token_out, amount_in, fee)
+                if local:
+                    amount_out, gas, _ = local
+                    if amount_out > 0: plan.add_local(req_idx, self._quote(fee, amount_out, gas, "local"))
+                    continue
+
+            key = (self.name, token_in.lower(), token_out.lower(), fee, amount_in)
+            hit, cached = plan.cache_get(key)
+            if hit:
+                plan.add_local(req_idx, self._quote(fee, cached[0], cached[1], "cache"))
+                continue
+            if plan.attach(self.kind, key, req_idx): continue
+            try:
+                call_data = encode_quote_exact_input_single(token_in, token_out, amount_in, fee)
+            except Exception:
+                continue
+            plan.add_call(self.quoter, call_data, req_idx, self.kind, key)
+
+    def decode(self, plan, kind, key, req_idxs, success, return_data, results):
+        if not success or not return_data: return
+        amount_out, _, _, gas = decode_quoter_result(return_data)
+        if plan.planner: plan.planner.record_gas(kind, gas) # Feeds chunk sizing for the next scan
+        plan.cache_put(key, (amount_out, gas))
+        if amount_out > 0:
+            for req_idx in req_idxs:
+                results.setdefault(req_idx, []).append(self._quote(key[3], amount_out, gas))
+
+
+# ----------------------------------------------------------------------------------
+# AMBIENT (CrocQuery curve price + liquidity per pool; swap math in ambient_math.py)
+# ----------------------------------------------------------------------------------
+
+class AmbientAdapter(DexAdapter):
+    name = "amb"
+    label = "Ambient"
+    gas_priors = {"AMB_PRICE": 25000, "AMB_LIQ": 25000, "AMB_PARAMS": 25000}
+    min_liquidity = 1000   # Curves thinner than this are ignored
+
+    def __init__(self, query_address, pool_idxs):
+        self.query = to_checksum_address(query_address)
+        self.pool_idxs = list(pool_idxs)
+
+    def plan_request(self, plan, req_idx, token_in, token_out, amount_in):
+        state = plan.state(self)
+        # Base/quote are sorted by address
+        base, quote = (token_in, token_out) if int(token_in, 16) < int(token_out, 16) else (token_out, token_in)
+        for pool_idx in self.pool_idxs:
+            key = ("amb", base.lower(), quote.lower(), pool_idx)
+            state["jobs"].append((req_idx, key, token_in, amount_in))
+            if not plan.claim(key): continue
+
+            # Pool fee (read once per pool, not per block)
+            if get_pool_fee(key) is None:
+                plan.add_call(self.query, AMBIENT_QUERY_POOL_PARAMS.encode(base, quote, pool_idx), req_idx, "AMB_PARAMS", key)
+
+            hit, cached = plan.cache_get(key)
+            if hit:
+                state["known"][key] = cached
+                continue
+            plan.add_call(self.query, AMBIENT_QUERY_PRICE.encode(base, quote, pool_idx), req_idx, "AMB_PRICE", key)
+            plan.add_call(self.query, AMBIENT_QUERY_LIQUIDITY.encode(base, quote, pool_idx), req_idx, "AMB_LIQ", key)
+
+    def decode(self, plan, kind, key, req_idxs, success, return_data, results):
+        if kind == "AMB_PARAMS":
+            # A pool without readable params keeps the default fee (not re-queried every scan)
+            try:
+                fee_rate = decode_pool_params(return_data) if success else AMBIENT_DEFAULT_FEE_RATE
+            except Exception:
+                fee_rate = AMBIENT_DEFAULT_FEE_RATE
+            set_pool_fee(key, fee_rate)
+            return
+        if not success or not return_data: return
+        partial = plan.state(self).setdefault("partial", {}).setdefault(key, {})
+        partial["price_q64" if kind == "AMB_PRICE" else "liq"] = decode_uint(return_data)
+
+    def finish(self, plan, results):
+        state = plan.state(self)
+        for key, data in state.get("partial", {}).items():
+            if 'price_q64' in data and 'liq' in data:
+                state["known"][key] = (data['price_q64'], data['liq'])
+                plan.cache_put(key, state["known"][key])
+
+        # Curve state of the pool swapped locally for each request's size
+        for req_idx, key, token_in, amount_in in state["jobs"]:
+            price_root, liq = state["known"].get(key, (0, 0))
+            if price_root <= 0 or liq <= self.min_liquidity: continue
+            fee_rate = get_pool_fee(key)
+            if fee_rate is None: fee_rate = AMBIENT_DEFAULT_FEE_RATE
+            # Base is the lower address (key[1])
+            amount_out = ambient_amount_out(price_root, liq, amount_in, token_in.lower() == key[1], fee_rate)
+            if amount_out > 0:
+                results.setdefault(req_idx, []).append(self.quote(amount_out, fee_rate, f"Ambient ({key[3]})",
+                                                                 venue=f"{self.name}:{key[3]}"))
+
+
+# ----------------------------------------------------------------------------------
+# CONSTANT PRODUCT (Uniswap V2 forks)
+# x*y=k output with the fork's fee. No V2 fork is quoted yet (no verified Monad
+# factory); the formula prices the constant-product venues of the sizing benchmark.
+# ----------------------------------------------------------------------------------
+
+def v2_amount_out(amount_in, reserve_in, reserve_out, fee_bps=30):
+    if amount_in <= 0 or reserve_in <= 0 or reserve_out <= 0: return 0
+    amount_in_with_fee = amount_in * (10000 - fee_bps)
+    return amount_in_with_fee * reserve_out // (reserve_in * 10000 + amount_in_with_fee)
@@ -0,0 +1,162 @@
+import numpy as np
+
+# ----------------------------------------------------------------------------------
+# TIER GRAPHS AS ARRAYS
+# Every tier graph of a scan ({token_in: {token_out: {"rate", "dex", "fee", ...}}}) packed
+# into one (tiers x n x n) rate array (0 = no quote), so 2-hop and 3-hop cycle products
+# for all tiers come out of a few broadcast multiplies instead of nested Python loops.
+# Index convention: rates[t, i, j] is the i -> j rate in tier t.
+#
+# Multigraph: an edge may carry every venue's quote ("venues": [edge, ...], one per
+# venue id). Those go to venue_rates[t, v, i, j]; rates keeps the best venue per edge.
+# Only 2-hop round trips need the venue axis (both legs on the same venue is a wash
+# trade); longer cycles have no cross-leg constraint, so their best product is exactly
+# the product of each leg's best venue and they stay on the collapsed array.
+# ----------------------------------------------------------------------------------
+
+
+def edge_venues(edge):
+    """
+    The per-venue quotes of a graph edge (the edge itself for a plain graph).
+    """
+    return edge.get('venues') or [edge]
+
+
+def venue_key(edge):
+    """
+    Venue id of a quote: the adapter's "venue" (one per pool / book), else "<dex>:<fee>".
+    """
+    return edge.get('venue') or f"{edge.get('dex')}:{edge.get('fee')}"
+
+
+class RateMatrix:
+    """
+    tokens[i] <-> index[token], venue_keys[v] <-> venue_index[venue_key(quote)];
+    rates has shape (len(tiers), n, n) and venue_rates (len(tiers), len(venues), n, n).
+    """
+
+    def __init__(self, tokens, tiers, venues=()):
+        self.tokens = list(tokens)
+        self.index = {token: i for i, token in enumerate(self.tokens)}
+        self.tiers = list(tiers)
+        self.tier_index = {tier: t for t, tier in enumerate(self.tiers)}
+        self.venue_keys = list(venues)
+        self.venue_index = {venue: v for v, venue in enumerate(self.venue_keys)}
+        n = len(self.tokens)
+        self.rates = np.zeros((len(self.tiers), n, n))
+        self.venue_rates = np.zeros((len(self.tiers), len(self.venue_keys), n, n))
+
+    @classmethod
+    def from_graphs(cls, tier_graphs, tiers):
+        """
+        Tokens and venues are indexed in first-seen order; every quote lands in one scatter.
+        """
+        index, venue_index = {}, {}
+        coords, rates = [], []
+        for t, tier in enumerate(tiers):
+            for t_in, outs in tier_graphs.get(tier, {}).items():
+                i = index.setdefault(t_in, len(index))
+                for t_out, edge in outs.items():
+                    j = index.setdefault(t_out, len(index))
+                    for quote in edge.get('venues') or (edge,):
+                        v = venue_index.setdefault(venue_key(quote), len(venue_index))
+                        coords.append((t, v, i, j))
+                        rates.append(quote['rate'])
+
+        matrix = cls(index, tiers, venue_index)
+        if coords:
+            np.maximum.at(matrix.venue_rates, tuple(np.array(coords).T), rates)
+            matrix.rates = matrix.venue_rates.max(axis=1)
+        return matrix
+
+    def set_edge(self, tier, t_in, t_out, rate, venue):
+        t, i, j = self.tier_index[tier], self.index[t_in], self.index[t_out]
+        v = self.venue_index[venue]
+        self.venue_rates[t, v, i, j] = max(self.venue_rates[t, v, i, j], rate)
+        self.rates[t, i, j] = max(self.rates[t, i, j], rate)
+
+    def symbols(self, idx):
+        return tuple(self.tokens[i] for i in idx)
+
+
+def _top_two(venue_rates):
+    """
+    Best rate, second-best rate and best venue of every edge (axis 1 = venues).
+    """
+    if venue_rates.shape[1] < 2:
+        pad = np.zeros((venue_rates.shape[0], 2 - venue_rates.shape[1]) + venue_rates.shape[2:])
+        venue_rates = np.concatenate([venue_rates, pad], axis=1)
+    order = np.argsort(venue_rates, axis=1)
+    top = np.take_along_axis(venue_rates, order[:, -2:], axis=1)
+    return top[:, 1], top[:, 0], order[:, -1]
+
+
+def _cross_venue_best(forward, backward):
+    """
+    Best forward * backward product over venue pairs with v1 != v2: the two best legs if
+    their venues differ, else the better of swapping either one for its runner-up.
+    O(venues) per edge instead of O(venues^2).
+    """
+    f1, f2, fv = _top_two(forward)
+    b1, b2, bv = _top_two(backward)
+    return np.where(fv == bv, np.maximum(f1 * b2, f2 * b1), f1 * b1)
+
+
+def two_hop_products(venue_rates):
+    """
+    P[t, i, j] = best rate(i -> j) * rate(j -> i) with the two legs on different venues,
+    each cycle once (i < j).
+    """
+    return np.triu(_cross_venue_best(venue_rates, venue_rates.transpose(0, 1, 3, 2)), k=1)
+
+
+_CANONICAL_MASKS = {}  # n -> (n, n, n) array: 1.0 where (i, j, k) is a cycle's canonical form, else 0.0
+
+def _canonical_mask(n):
+    mask = _CANONICAL_MASKS.get(n)
+    if mask is None:
+        idx = np.arange(n)
+        i, j, k = idx[:, None, None], idx[None, :, None], idx[None, None, :]
+        mask = _CANONICAL_MASKS[n] = ((i < j) & (i < k) & (j != k)).astype(float)
+    return mask
+
+def three_hop_products(rates):
+    """
+    P[t, i, j, k] = rate(i -> j) * rate(j -> k) * rate(k -> i), each cycle once: i is its
+    lowest index and j != k (both directions of a triangle are kept).
+    """
+    products = rates[:, :, :, None] * rates[:, None, :, :]
+    products *= rates.transpose(0, 2, 1)[:, :, None, :]
+    products *= _canonical_mask(rates.shape[-1]) # Multiplying beats boolean-index assignment
+    return products
+
+
+def pivot_two_hop(venue_rates, p):
+    """
+    P[t, b] = best rate(p -> b) * rate(b -> p) with the two legs on different venues.
+    """
+    return _cross_venue_best(venue_rates[:, :, p, :], venue_rates[:, :, :, p])
+
+
+def pivot_three_hop(rates, p):
+    """
+    P[t, b, c] = rate(p -> b) * rate(b -> c) * rate(c -> p); zero when b, c or p coincide.
+    """
+    products = rates[:, p, :, None] * rates * rates[:, None, :, p]
+    products[:, p, :] = 0.0
+    products[:, :, p] = 0.0
+    return products
+
+
+def top_k(products, k, min_value=0.0):
+    """
+    The k largest entries above min_value as [(value, index tuple)], best first.
+    argpartition keeps this linear in the number of candidates; only the k survivors are sorted.
+    """
+    flat = products.ravel()
+    candidates = np.flatnonzero(flat > min_value)
+    if k <= 0 or candidates.size == 0: return []
+    if candidates.size > k:
+        candidates = candidates[np.argpartition(flat[candidates], -k)[-k:]]
+    candidates = candidates[np.argsort(flat[candidates])[::-1]]
+    return [(float(flat[c]), np.unravel_index(c, products.shape)) for c in candidates]
@@ -0,0 +1,189 @@
+import threading
+
+from returndata import ReturnDataError, decode_words
+
+# ----------------------------------------------------------------------------------
+# KURU L2 ORDER BOOK
+# getL2Book() returns every resting price level of a market in one eth_call:
+#   bytes = [blockNumber][bid price, bid size]... [0][ask price, ask size]...
+# Prices are in the market's pricePrecision (quote per base), sizes in its sizePrecision
+# (base units); both come from getMarketParams(), which never changes for a market.
+# Walking the levels gives the exact fill for any size instead of top-of-book.
+# ----------------------------------------------------------------------------------
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+BPS = 10000
+
+# market (lower) -> params dict (static per market, fetched once)
+MARKET_PARAMS = {}
+_PARAMS_LOCK = threading.Lock()
+
+
+def decode_market_params(data):
+    """
+    getMarketParams() -> (pricePrecision, sizePrecision, baseAsset, baseAssetDecimals,
+    quoteAsset, quoteAssetDecimals, tickSize, minSize, maxSize, takerFeeBps, makerFeeBps)
+    """
+    w = decode_words(data, 11)
+    return {
+        "price_precision": w[0],
+        "size_precision": w[1],
+        "base": "0x" + w[2].to_bytes(32, 'big')[12:].hex(),
+        "base_decimals": w[3],
+        "quote": "0x" + w[4].to_bytes(32, 'big')[12:].hex(),
+        "quote_decimals": w[5],
+        "tick_size": w[6],
+        "min_size": w[7],
+        "max_size": w[8],
+        "taker_fee_bps": w[9],
+        "maker_fee_bps": w[10]
+    }
+
+
+def get_market_params(market):
+    with _PARAMS_LOCK:
+        return MARKET_PARAMS.get(market.lower())
+
+
+def set_market_params(market, params):
+    with _PARAMS_LOCK:
+        MARKET_PARAMS[market.lower()] = params
+
+
+def parse_l2_book(data):
+    """
+    Decodes the getL2Book() return (ABI `bytes`). Returns (block, bids, asks), where bids are
+    (price, size) best-first (descending) and asks best-first (ascending).
+    """
+    data = memoryview(data)
+    if len(data) < 64:
+        raise ReturnDataError(f"getL2Book response too short ({len(data)} bytes)")
+    offset = int.from_bytes(data[0:32], 'big')
+    length = int.from_bytes(data[offset:offset + 32], 'big')
+    body = data[offset + 32:offset + 32 + length]
+    if len(body) < length or length < 32:
+        raise ReturnDataError("getL2Book payload truncated")
+
+    words = [int.from_bytes(body[i:i + 32], 'big') for i in range(0, length - length % 32, 32)]
+    block = words[0]
+    bids, asks = [], []
+    side = bids
+    i = 1
+    while i < len(words):
+        price = words[i]
+        if price == 0 and side is asks: break
+        if price == 0:
+            side = asks  # Zero price separates bids from asks
+            i += 1
+            continue
+        if i + 1 >= len(words): break
+        size = words[i + 1]
+        if price > 0 and size > 0: side.append((price, size))
+        i += 2
+
+    bids.sort(key=lambda lvl: lvl[0], reverse=True)
+    asks.sort(key=lambda lvl: lvl[0])
+    return block, bids, asks
+
+
+class KuruBook:
+    """
+    L2 snapshot of one market at one block. `native` is the wrapped token that stands in for
+    a native-asset side (market params report address(0) for MON).
+    """
+
+    def __init__(self, market, params, bids, asks, block=None, native=None):
+        self.market = market.lower()
+        self.params = params
+        self.bids = bids
+        self.asks = asks
+        self.block = block
+        base, quote = params["base"], params["quote"]
+        if native:
+            if base == ZERO_ADDRESS: base = native.lower()
+            if quote == ZERO_ADDRESS: quote = native.lower()
+        self.base = base
+        self.quote = quote
+
+    @property
+    def best_bid(self):
+        return self.bids[0][0] if self.bids else 0
+
+    @property
+    def best_ask(self):
+        return self.asks[0][0] if self.asks else 0
+
+    def sells_base(self, token_in):
+        """
+        True if token_in is the base asset (fills against bids), False if the quote asset, None otherwise.
+        """
+        t = token_in.lower()
+        if t == self.base: return True
+        if t == self.quote: return False
+        return None
+
+    def fill(self, token_in, amount_in):
+        """
+        Walks the book for amount_in (raw units of token_in) after the taker fee.
+        Returns {"amountOut", "filled", "avgPrice", "levels", "complete"} (avgPrice is quote per
+        base, human units), or None if token_in is not on this market.
+        """
+        sells_base = self.sells_base(token_in)
+        if sells_base is None or amount_in <= 0: return None
+
+        p = self.params
+        pp, sp = p["price_precision"], p["size_precision"]
+        base_unit = 10 ** p["base_decimals"]
+        quote_unit = 10 ** p["quote_decimals"]
+        # quote_raw = base_raw * price * quote_unit / (pp * base_unit)
+        scale_num, scale_den = quote_unit, pp * base_unit
+
+        remaining = amount_in
+        amount_out = 0
+        levels = 0
+        if sells_base:
+            for price, size in self.bids:
+                level_base = size * base_unit // sp
+                take = min(remaining, level_base)
+                amount_out += take * price * scale_num // scale_den
+                remaining -= take
+                levels += 1
+                if remaining == 0: break
+        else:
+            for price, size in self.asks:
+                level_base = size * base_unit // sp
+                level_cost = -(-level_base * price * scale_num // scale_den)  # Ceil: what the level costs in quote
+                levels += 1
+                if remaining >= level_cost:
+                    amount_out += level_base
+                    remaining -= level_cost
+                else:
+                    amount_out += remaining * scale_den // (price * scale_num)
+                    remaining = 0
+                if remaining == 0: break
+
+        filled = amount_in - remaining
+        amount_out = amount_out * (BPS - p.get("taker_fee_bps", 0)) // BPS
+
+        avg_price = 0.0
+        if filled > 0 and amount_out > 0:
+            if sells_base:
+                avg_price = (amount_out / quote_unit) / (filled / base_unit)
+            else:
+                avg_price = (filled / quote_unit) / (amount_out / base_unit)
+
+        return {
+            "amountOut": amount_out,
+            "filled": filled,
+            "avgPrice": avg_price,
+            "levels": levels,
+            "complete": remaining == 0
+        }
+
+    def amount_out(self, token_in, amount_in):
+        """
+        Output for a full fill of amount_in, or 0 if the book is too thin (no partial quotes).
+        """
+        result = self.fill(token_in, amount_in)
+        if not result or not result["complete"]: return 0
+        return result["amountOut"]
@@ -0,0 +1,178 @@
+import json
+import os
+import threading
+
+# ----------------------------------------------------------------------------------
+# KURU MARKET REGISTRY
+# One place that knows every Kuru market, indexed by normalized (lower-case) address:
+#   pair (tokenA, tokenB) -> market, market -> pair, and each market's base/quote side.
+# Orientation is decided once at registration (quote = first token found in the
+# quote priority list, e.g. USDC > MON) and replaced by the on-chain base/quote as soon
+# as getMarketParams has been read, so pricing never re-derives it per call.
+# Saved to disk (with the last block covered by log discovery) so startup is instant.
+# ----------------------------------------------------------------------------------
+
+REGISTRY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "kuru_markets.json")
+REGISTRY_VERSION = 1
+
+
+def _pair_key(token_a, token_b):
+    a, b = token_a.lower(), token_b.lower()
+    return (a, b) if a < b else (b, a)
+
+
+class KuruRegistry:
+    """
+    Thread-safe market index. Entries: {"market", "tokens", "base", "quote"}; base/quote are
+    None when neither token is a known quote asset and the market params are not loaded yet.
+    """
+
+    def __init__(self, quote_priority=(), path=REGISTRY_PATH, router=None):
+        self._lock = threading.Lock()
+        self.quote_priority = [t.lower() for t in quote_priority]
+        self.path = path
+        self.router = router.lower() if router else None
+        self._by_pair = {}    # (token_lo, token_hi) -> entry
+        self._by_market = {}  # market -> entry
+        self._tokens = set()
+        self.last_block = None  # Last block covered by the market-creation log sync
+        self._dirty = False
+
+    def _orient(self, key):
+        for quote in self.quote_priority:
+            if quote in key:
+                return (key[1] if key[0] == quote else key[0]), quote
+        return None, None
+
+    def register(self, token_a, token_b, market, base=None, quote=None, source="seed"):
+        """
+        Adds or updates a market. Returns True if the registry changed.
+        """
+        key = _pair_key(token_a, token_b)
+        if base is None or quote is None:
+            base, quote = self._orient(key)
+        else:
+            base, quote = base.lower(), quote.lower()
+        entry = {"market": market, "tokens": key, "base": base, "quote": quote, "source": source}
+        with self._lock:
+            old = self._by_pair.get(key)
+            if old and old["market"].lower() == market.lower() and (old["base"], old["quote"]) == (base, quote):
+                return False
+            if old and old["market"].lower() != market.lower():
+                self._by_market.pop(old["market"].lower(), None)
+            self._by_pair[key] = entry
+            self._by_market[market.lower()] = entry
+            self._tokens.update(key)
+            self._dirty = True
+        return True
+
+    def seed(self, markets):
+        """
+        markets: {frozenset({tokenA, tokenB}): market} (the KURU_MARKETS layout).
+        """
+        for pair, market in markets.items():
+            token_a, token_b = tuple(pair)
+            if market.lower() in self._by_market: continue
+            self.register(token_a, token_b, market)
+        return len(self._by_market)
+
+    def set_last_block(self, block):
+        with self._lock:
+            if block is not None and block != self.last_block:
+                self.last_block = block
+                self._dirty = True
+
+    # --- Persistence ---
+
+    def load(self):
+        try:
+            if not os.path.exists(self.path): return 0
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if data.get("version") != REGISTRY_VERSION or data.get("router") != self.router: return 0
+            for m in data.get("markets", []):
+                a, b = m["tokens"]
+                self.register(a, b, m["market"], m.get("base"), m.get("quote"), m.get("source", "disk"))
+            with self._lock:
+                self.last_block = data.get("last_block")
+                self._dirty = False
+            return len(self._by_market)
+        except Exception as e:
+            print(f"⚠️ Failed to load Kuru registry: {e}")
+            return 0
+
+    def save(self, force=False):
+        with self._lock:
+            if not (self._dirty or force): return False
+            data = {
+                "version": REGISTRY_VERSION,
+                "router": self.router,
+                "last_block": self.last_block,
+                "markets": [dict(e, tokens=list(e["tokens"])) for e in self._by_market.values()]
+            }
+            self._dirty = False
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)  # Atomic: readers never see a half-written file
+            return True
+        except Exception as e:
+            print(f"⚠️ Failed to save Kuru registry: {e}")
+            with self._lock: self._dirty = True
+            return False
+
+    def set_orientation(self, market, base, quote):
+        """
+        Pins base/quote from the market's own params (getMarketParams).
+        """
+        with self._lock:
+            entry = self._by_market.get(market.lower())
+            if entry and base.lower() in entry["tokens"] and quote.lower() in entry["tokens"]:
+                if (entry["base"], entry["quote"]) != (base.lower(), quote.lower()): self._dirty = True
+                entry["base"], entry["quote"] = base.lower(), quote.lower()
+
+    # --- Lookups (O(1)) ---
+
+    def market_for(self, token_a, token_b):
+        entry = self._by_pair.get(_pair_key(token_a, token_b))
+        return entry["market"] if entry else None
+
+    def entry_for_market(self, market):
+        return self._by_market.get(market.lower()) if market else None
+
+    def pair_for(self, market):
+        """
+        (tokenA, tokenB) of a market address (lower-case), or None if it is not a Kuru market.
+        """
+        entry = self.entry_for_market(market)
+        return entry["tokens"] if entry else None
+
+    def is_market(self, address):
+        return bool(address) and address.lower() in self._by_market
+
+    def sells_base(self, token_in, token_out):
+        """
+        True if token_in is the base of its market (trade hits the bid). False for the quote side,
+        or when the orientation is unknown (the legacy top-of-book default).
+        """
+        entry = self._by_pair.get(_pair_key(token_in, token_out))
+        return bool(entry) and entry["base"] == token_in.lower()
+
+    def has_token(self, token):
+        return bool(token) and token.lower() in self._tokens
+
+    def tokens(self):
+        with self._lock:
+            return set(self._tokens)
+
+    def markets(self):
+        with self._lock:
+            return {key: entry["market"] for key, entry in self._by_pair.items()}
+
+    def __len__(self):
+        return len(self._by_market)
+
+    def __contains__(self, pair):
+        token_a, token_b = tuple(pair)
+        return _pair_key(token_a, token_b) in self._by_pair
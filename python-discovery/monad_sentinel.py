@@ -2,8 +2,9 @@ import asyncio
 import json
 import datetime
 from collections import deque
-from web3 import AsyncWeb3, WebSocketProvider
-from web3_pricing import get_pool_info, get_token_balance, get_token_metadata
+from web3_pricing import get_pool_info, get_token_balance, get_token_metadata, HEAD_BLOCK, HEAD_FROM_SENTINEL
+from pool_state import POOL_STATE_STORE, MINT_TOPIC_V3, BURN_TOPIC_V3
+from async_pricing import close_async_pricing
 
 # Monad Mainnet Configuration
 WSS_URL = "wss://rpc.monad.xyz" 
@@ -27,6 +28,9 @@ POOL_ABI_V2 = [
 # Cache dynamically found pools
 KNOWN_POOLS = {}
 
+# In-flight async callback tasks (e.g. async_scan_market scheduled from a swap)
+CALLBACK_TASKS = set()
+
 async def resolve_and_cache_pool(w3, pool_addr):
     """
     Dynamically resolves pool tokens, calculates TVL, sets threshold, and caches it.
@@ -34,29 +38,21 @@ async def resolve_and_cache_pool(w3, pool_addr):
     if pool_addr in KNOWN_POOLS: return KNOWN_POOLS[pool_addr]
     
     # Check Kuru Markets First
-    from web3_pricing import KURU_MARKETS, get_token_metadata, get_token_balance
+    from web3_pricing import KURU_REGISTRY, get_token_metadata, get_token_balances, resolve_token_metadata
     
     dex_source = "Uniswap V3" # Default
     fee_pct = 0.3
     pool_data = None
     
     # Check if this address is a known Kuru Market
-    is_kuru = False
-    kuru_pair = None
-    
-    for pair, mkt_addr in KURU_MARKETS.items():
-        if mkt_addr.lower() == pool_addr.lower():
-            is_kuru = True
-            kuru_pair = list(pair)
-            dex_source = "Kuru"
-            fee_pct = 0.0 # Orderbook
-            break
+    kuru_pair = KURU_REGISTRY.pair_for(pool_addr)
             
-    if is_kuru and kuru_pair:
+    if kuru_pair:
         t0_addr = kuru_pair[0]
         t1_addr = kuru_pair[1]
         
-        # Metadata
+        # Metadata (one bulk lookup for whatever the store is missing, off the event loop)
+        await asyncio.to_thread(resolve_token_metadata, [t0_addr, t1_addr], False)
         meta0 = get_token_metadata(t0_addr)
         meta1 = get_token_metadata(t1_addr)
         
@@ -87,6 +83,7 @@ async def resolve_and_cache_pool(w3, pool_addr):
         # Optimistic: Try V3 first
         pool_contract = w3.eth.contract(address=pool_addr, abi=POOL_ABI_V3)
         
+        fee = None
         try:
             t0_addr = await pool_contract.functions.token0().call()
             t1_addr = await pool_contract.functions.token1().call()
@@ -100,11 +97,13 @@ async def resolve_and_cache_pool(w3, pool_addr):
             t1_addr = await pool_contract.functions.token1().call()
             fee_pct = 0.3
         
+        await asyncio.to_thread(resolve_token_metadata, [t0_addr, t1_addr], False)
         meta0 = get_token_metadata(t0_addr)
         meta1 = get_token_metadata(t1_addr)
         
-        bal0 = get_token_balance(t0_addr, pool_addr)
-        bal1 = get_token_balance(t1_addr, pool_addr)
+        balances = (await asyncio.to_thread(get_token_balances, [(t0_addr, pool_addr), (t1_addr, pool_addr)]))["balances"]
+        bal0 = balances.get((t0_addr.lower(), pool_addr.lower()), 0.0)
+        bal1 = balances.get((t1_addr.lower(), pool_addr.lower()), 0.0)
         
         tvl = 0
         if "USD" in meta0['symbol']: tvl = bal0 * 2
@@ -130,19 +129,36 @@ async def resolve_and_cache_pool(w3, pool_addr):
             "tvl": tvl,
             "threshold": threshold,
             "fee": fee_pct,
+            "fee_tier": fee,
             "dex": dex_source
         }
         
         KNOWN_POOLS[pool_addr] = pool_data
         print(f"[{datetime.datetime.now()}] 🆕 Discovered {pool_data['name']} on {dex_source} (TVL ${tvl:,.0f})")
+        
+        # Track V3 pool state in memory (Swap/Mint/Burn logs keep it current from here on)
+        if fee is not None:
+            await asyncio.to_thread(track_pool_state, t0_addr, t1_addr, fee)
         return pool_data
         
     except Exception as e:
         return None
 
+def track_pool_state(t0_addr, t1_addr, fee):
+    """
+    Loads the V3 snapshot for a pool into POOL_STATE_STORE (blocking, run via asyncio.to_thread).
+    """
+    from web3_pricing import LOCAL_V3_PRICING, load_v3_pool_states
+    if not LOCAL_V3_PRICING: return
+    try:
+        load_v3_pool_states([(t0_addr, t1_addr, fee)])
+    except Exception as e:
+        print(f"Pool State Load Error: {e}")
+
 async def monitor_transactions(callback=None):
     print(f"[{datetime.datetime.now()}] 🛡️ Sentinel Starting (Dynamic Discovery Mode)...")
     
+    from web3 import AsyncWeb3, WebSocketProvider
     async with AsyncWeb3(WebSocketProvider(WSS_URL)) as w3:
         if await w3.is_connected():
              print(f"[{datetime.datetime.now()}] ✅ Connected to Mainnet!")
@@ -151,8 +167,9 @@ async def monitor_transactions(callback=None):
              return
 
         try:
-            # Subscribe to V3, V2, and Kuru topics
-            await w3.eth.subscribe("logs", {"topics": [[SWAP_TOPIC_V3, SWAP_TOPIC_V2, KURU_TOPIC]]})
+            # Subscribe to V3, V2, and Kuru topics (+ V3 Mint/Burn for the pool state store)
+            await w3.eth.subscribe("logs", {"topics": [[SWAP_TOPIC_V3, SWAP_TOPIC_V2, KURU_TOPIC, MINT_TOPIC_V3, BURN_TOPIC_V3]]})
+            POOL_STATE_STORE.mark_live()
             print(f"[{datetime.datetime.now()}] 📡 Listening for Swaps, includes Kuru events...")
 
             recent_events_local = deque(maxlen=100)
@@ -173,6 +190,15 @@ async def monitor_transactions(callback=None):
                     pool_addr = real_log.get('address', None)
                     if not pool_addr: continue
                     
+                    # Logs double as a head-block feed, so scans can pin their block without a round trip
+                    # (same chain only; pinned once the pricing node has reported that block too)
+                    if HEAD_FROM_SENTINEL: HEAD_BLOCK.note(real_log.get('blockNumber'), confirmed=False)
+                    
+                    # 0. Keep in-memory V3 pool state current (Swap/Mint/Burn)
+                    if is_v3 or topic0_clean in (MINT_TOPIC_V3[2:], BURN_TOPIC_V3[2:]):
+                        POOL_STATE_STORE.apply_log(real_log)
+                        if not is_v3: continue # Liquidity events only feed the store
+                    
                     # 1. Resolve Pool (Dynamic)
                     pool_data = await resolve_and_cache_pool(w3, pool_addr)
                     if not pool_data: continue
@@ -346,7 +372,13 @@ async def monitor_transactions(callback=None):
                     # Add to local history safely
                     recent_events_local.appendleft(event)
                         
-                    if callback: callback(event)
+                    if callback:
+                        # Async callbacks (e.g. async_scan_market) run as tasks on this loop
+                        result = callback(event)
+                        if asyncio.iscoroutine(result):
+                            task = asyncio.create_task(result)
+                            CALLBACK_TASKS.add(task) # Keep a reference until done
+                            task.add_done_callback(CALLBACK_TASKS.discard)
                         
                     # Notify console
                     if is_whale:
@@ -360,6 +392,9 @@ async def monitor_transactions(callback=None):
 
         except Exception as e:
             print(f"Conn Error: {e}")
+        finally:
+            POOL_STATE_STORE.mark_live(False)
+            await close_async_pricing()
 
 def main():
     try:
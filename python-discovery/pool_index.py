@@ -0,0 +1,182 @@
+import json
+import os
+import threading
+import time
+
+from eth_utils import to_checksum_address
+
+# ----------------------------------------------------------------------------------
+# UNISWAP V3 POOL INDEX
+# Persistent (token0, token1, fee) -> pool address map, so quote builders only emit
+# calls for fee tiers that actually have a pool. Filled in bulk (factory.getPool via
+# Multicall) and kept current from the factory's PoolCreated logs; saved to disk.
+# ----------------------------------------------------------------------------------
+
+POOL_CREATED_TOPIC = "0x783cca1c0412dd0d695e784568c96da2e9c22ff989357a2e8b1d9b2b4e6b7118"
+
+INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "uniswap_pool_index.json")
+INDEX_VERSION = 1
+MISSING_TTL = 6 * 3600   # Re-check "no pool" answers after this long (logs normally catch creations first)
+
+
+def pool_key(token_a, token_b, fee):
+    a, b = token_a.lower(), token_b.lower()
+    if int(a, 16) > int(b, 16): a, b = b, a
+    return (a, b, int(fee))
+
+
+def _encode_key(key):
+    return f"{key[0]}:{key[1]}:{key[2]}"
+
+
+def _decode_key(text):
+    a, b, fee = text.split(":")
+    return (a, b, int(fee))
+
+
+class PoolIndex:
+    """
+    Thread-safe pool-existence index. A key maps to the pool address, or None when the
+    factory returned address(0) (checked at `checked[key]`). Keys never looked up are unknown.
+    """
+
+    def __init__(self, factory, path=INDEX_PATH, missing_ttl=MISSING_TTL):
+        self._lock = threading.Lock()
+        self.factory = factory.lower()
+        self.path = path
+        self.missing_ttl = missing_ttl
+        self._pools = {}     # key -> address (checksum) or None
+        self._checked = {}   # key -> unix time of the getPool answer (missing keys only)
+        self.last_block = None  # Last block covered by the PoolCreated log sync
+        self._dirty = False
+
+    # --- Persistence ---
+
+    def load(self):
+        try:
+            if not os.path.exists(self.path): return 0
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if data.get("version") != INDEX_VERSION or data.get("factory") != self.factory: return 0
+            with self._lock:
+                for k, addr in data.get("pools", {}).items():
+                    self._pools[_decode_key(k)] = addr
+                for k, ts in data.get("missing", {}).items():
+                    key = _decode_key(k)
+                    self._pools[key] = None
+                    self._checked[key] = ts
+                self.last_block = data.get("last_block")
+            return len(self._pools)
+        except Exception as e:
+            print(f"⚠️ Failed to load pool index: {e}")
+            return 0
+
+    def save(self, force=False):
+        with self._lock:
+            if not (self._dirty or force): return False
+            data = {
+                "version": INDEX_VERSION,
+                "factory": self.factory,
+                "last_block": self.last_block,
+                "pools": {_encode_key(k): v for k, v in self._pools.items() if v},
+                "missing": {_encode_key(k): self._checked.get(k, 0) for k, v in self._pools.items() if v is None}
+            }
+            self._dirty = False
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)  # Atomic: readers never see a half-written file
+            return True
+        except Exception as e:
+            print(f"⚠️ Failed to save pool index: {e}")
+            with self._lock: self._dirty = True
+            return False
+
+    # --- Queries ---
+
+    def lookup(self, token_a, token_b, fee):
+        """
+        Returns (known, address). known=False means never checked (or the "missing" answer expired).
+        """
+        key = pool_key(token_a, token_b, fee)
+        with self._lock:
+            if key not in self._pools: return False, None
+            addr = self._pools[key]
+            if addr is None and time.time() - self._checked.get(key, 0) > self.missing_ttl:
+                return False, None
+            return True, addr
+
+    def exists(self, token_a, token_b, fee):
+        """
+        False only when the index knows there is no pool (unknown keys count as possible).
+        """
+        known, addr = self.lookup(token_a, token_b, fee)
+        return addr is not None or not known
+
+    def existing_fees(self, token_a, token_b, fee_tiers):
+        return [fee for fee in fee_tiers if self.exists(token_a, token_b, fee)]
+
+    def unknown_keys(self, pairs):
+        """
+        pairs: iterable of (tokenA, tokenB, fee). Returns the distinct keys that need a getPool lookup.
+        """
+        keys = []
+        seen = set()
+        for a, b, fee in pairs:
+            key = pool_key(a, b, fee)
+            if key in seen: continue
+            seen.add(key)
+            if not self.lookup(*key)[0]: keys.append(key)
+        return keys
+
+    def pools(self):
+        with self._lock:
+            return {k: v for k, v in self._pools.items() if v}
+
+    def stats(self):
+        with self._lock:
+            live = sum(1 for v in self._pools.values() if v)
+            return {"pools": live, "missing": len(self._pools) - live, "last_block": self.last_block}
+
+    # --- Updates ---
+
+    def set_pool(self, key, address):
+        with self._lock:
+            if key not in self._pools or self._pools[key] != address:
+                self._pools[key] = address
+                self._dirty = True
+            if address is None:
+                self._checked[key] = time.time()
+                self._dirty = True
+            else:
+                self._checked.pop(key, None)
+
+    def apply_pool_created(self, log):
+        """
+        PoolCreated(address indexed token0, address indexed token1, uint24 indexed fee, int24 tickSpacing, address pool)
+        """
+        topics = log.get('topics', [])
+        if len(topics) < 4: return False
+        t0 = "0x" + _topic_bytes(topics[1])[-20:].hex()
+        t1 = "0x" + _topic_bytes(topics[2])[-20:].hex()
+        fee = int.from_bytes(_topic_bytes(topics[3]), 'big')
+        data = _topic_bytes(log.get('data'))
+        if len(data) < 64: return False
+        pool = to_checksum_address("0x" + data[44:64].hex())
+        self.set_pool(pool_key(t0, t1, fee), pool)
+        return True
+
+    def set_last_block(self, block):
+        with self._lock:
+            if block is not None and block != self.last_block:
+                self.last_block = block
+                self._dirty = True
+
+
+def _topic_bytes(value):
+    if value is None: return b""
+    if isinstance(value, (bytes, bytearray)): return bytes(value)
+    if hasattr(value, 'hex') and not isinstance(value, str): return bytes(value)
+    value = str(value)
+    return bytes.fromhex(value[2:] if value.startswith('0x') else value)
@@ -0,0 +1,199 @@
+import threading
+import time
+
+# ----------------------------------------------------------------------------------
+# POOL STATE STORE
+# In-memory Uniswap V3 pool snapshots (sqrtPrice, tick, active liquidity, liquidityNet).
+# Seeded by web3_pricing.load_v3_pool_states, kept current by Swap/Mint/Burn logs
+# from monad_sentinel, read by pricing and the dashboard without touching the RPC.
+# ----------------------------------------------------------------------------------
+
+SWAP_TOPIC_V3 = "0xc42079f94a6350d7e6235f29174924f928cc2ac818eb64fed8004e115fbcca67"
+MINT_TOPIC_V3 = "0x7a53080ba414158be7ec69b987b5fb7d07dee101fe85488f0853ae16239d0bde"
+BURN_TOPIC_V3 = "0x0c396cd989a39f4459b5fa1aed6a9a8dcdbc45908acfd67e028cd568da98982c"
+
+LIVE_MAX_AGE = 300 # Seconds a log-fed snapshot is trusted before a reload (missed logs, reorgs)
+
+
+def _to_bytes(value):
+    if value is None: return b""
+    if isinstance(value, (bytes, bytearray)): return bytes(value)
+    if hasattr(value, 'hex') and not isinstance(value, str): return bytes(value)
+    value = str(value)
+    if value.startswith('0x'): value = value[2:]
+    return bytes.fromhex(value)
+
+
+def _to_int(value):
+    if value is None: return None
+    if isinstance(value, int): return value
+    return int(str(value), 16) if str(value).startswith('0x') else int(value)
+
+
+def _topic_hex(topic):
+    return "0x" + _to_bytes(topic).hex()
+
+
+def _word(data, index, signed=False):
+    return int.from_bytes(data[index * 32:(index + 1) * 32], 'big', signed=signed)
+
+
+class PoolStateStore:
+    """
+    Thread-safe map of pool address -> V3PoolState.
+    States are replaced copy-on-write, so a simulation holding a state never sees a half-applied event.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = {}    # (token0_lower, token1_lower, fee) -> pool address (lower) or None if no pool
+        self._pools = {}   # pool address (lower) -> entry dict
+        self.live_since = None  # Set while a log subscription is feeding the store
+        self.events_applied = 0
+
+    # --- Address Index ---
+
+    def lookup(self, key):
+        """Returns (known, address) for a (token0, token1, fee) key."""
+        with self._lock:
+            if key not in self._keys: return False, None
+            return True, self._keys[key]
+
+    def set_missing(self, key):
+        with self._lock:
+            self._keys[key] = None
+
+    def register(self, key, pool_addr):
+        addr = pool_addr.lower()
+        with self._lock:
+            self._keys[key] = addr
+            if addr not in self._pools:
+                self._pools[addr] = {"address": pool_addr, "key": key, "state": None, "block": None,
+                                     "last_event_block": None, "updated": 0}
+
+    # --- Snapshots ---
+
+    def _applied_block(self, entry):
+        blocks = [b for b in (entry["block"], entry["last_event_block"]) if b is not None]
+        return max(blocks) if blocks else None
+
+    def put_state(self, pool_addr, state, block=None):
+        """
+        Stores an RPC snapshot taken at block. A snapshot older than the stored one or than
+        the last applied log is dropped, so logs applied while it was loading are kept; one
+        without a block is refused (replayed logs could not be told apart from newer ones).
+        Returns True if the snapshot was stored.
+        """
+        if block is None: return False
+        addr = pool_addr.lower()
+        with self._lock:
+            entry = self._pools.get(addr)
+            if entry is None: return False
+            applied = self._applied_block(entry)
+            if applied is not None and block < applied: return False
+            entry["state"] = state
+            entry["block"] = block
+            entry["last_event_block"] = None
+            entry["updated"] = time.time()
+            return True
+
+    def get_entry(self, pool_addr):
+        with self._lock:
+            entry = self._pools.get(pool_addr.lower())
+            return dict(entry) if entry else None
+
+    def is_fresh(self, entry, max_age):
+        if not entry or entry["state"] is None: return False
+        age = time.time() - entry["updated"]
+        # Loaded after the subscription started -> every later event has been applied,
+        # but a dropped log would go unnoticed, so it still expires after LIVE_MAX_AGE
+        if self.live_since is not None and entry["updated"] >= self.live_since:
+            return age <= max(max_age, LIVE_MAX_AGE)
+        return age <= max_age
+
+    def get_state(self, key, max_age):
+        with self._lock:
+            addr = self._keys.get(key)
+            entry = self._pools.get(addr) if addr else None
+        return entry["state"] if self.is_fresh(entry, max_age) else None
+
+    def snapshot(self, pool_addr):
+        """
+        JSON-friendly view of a pool for the dashboard/API.
+        """
+        entry = self.get_entry(pool_addr)
+        if not entry or entry["state"] is None: return None
+        state = entry["state"]
+        return {
+            "address": entry["address"],
+            "fee": state.fee,
+            "sqrtPriceX96": state.sqrt_price_x96,
+            "tick": state.tick,
+            "liquidity": state.liquidity,
+            "initializedTicks": len(state.ticks),
+            "block": self._applied_block(entry),
+            "updated": entry["updated"]
+        }
+
+    # --- Live Log Updates ---
+
+    def mark_live(self, live=True):
+        self.live_since = time.time() if live else None
+
+    def apply_log(self, log):
+        """
+        Applies a Uniswap V3 Swap/Mint/Burn log to the matching pool snapshot.
+        Returns True if the store changed.
+        """
+        topics = log.get('topics', [])
+        pool_addr = log.get('address')
+        if not topics or not pool_addr: return False
+
+        topic0 = _topic_hex(topics[0]).lower()
+        data = _to_bytes(log.get('data'))
+        block = _to_int(log.get('blockNumber'))
+
+        with self._lock:
+            entry = self._pools.get(pool_addr.lower())
+            if not entry or entry["state"] is None: return False
+
+            # Skip logs already reflected in the RPC snapshot. Without both blocks a replayed
+            # Mint/Burn would add its liquidityNet twice, so it is not applied at all.
+            if block is None or entry["block"] is None or block <= entry["block"]:
+                return False
+
+            state = entry["state"].copy()
+
+            if topic0 == SWAP_TOPIC_V3:
+                if len(data) < 160: return False
+                state.sqrt_price_x96 = _word(data, 2)
+                state.liquidity = _word(data, 3)
+                state.tick = _word(data, 4, signed=True)
+
+            elif topic0 in (MINT_TOPIC_V3, BURN_TOPIC_V3):
+                if len(topics) < 4: return False
+                tick_lower = int.from_bytes(_to_bytes(topics[2]), 'big', signed=True)
+                tick_upper = int.from_bytes(_to_bytes(topics[3]), 'big', signed=True)
+                if topic0 == MINT_TOPIC_V3:
+                    if len(data) < 64: return False
+                    amount = _word(data, 1)   # (sender, amount, amount0, amount1)
+                else:
+                    if len(data) < 32: return False
+                    amount = -_word(data, 0)  # (amount, amount0, amount1)
+                if amount == 0: return False
+
+                state.set_tick_liquidity_net(tick_lower, state.ticks.get(tick_lower, 0) + amount)
+                state.set_tick_liquidity_net(tick_upper, state.ticks.get(tick_upper, 0) - amount)
+                if tick_lower <= state.tick < tick_upper:
+                    state.liquidity += amount
+            else:
+                return False
+
+            entry["state"] = state
+            if block is not None: entry["last_event_block"] = block
+            self.events_applied += 1
+        return True
+
+
+# Global Store (shared by pricing, sentinel and the Flask app)
+POOL_STATE_STORE = PoolStateStore()
@@ -0,0 +1,105 @@
+import threading
+import time
+
+# ----------------------------------------------------------------------------------
+# BLOCK-PINNED QUOTE CACHE
+# Raw venue answers memoized per block: a quote read at block N is final for block N,
+# so repeated scans / tiers / path lookups within the same block cost nothing and
+# agree with each other. Keys:
+#   ("uni", token_in, token_out, fee, amount_in) -> (amountOut, gasEstimate)
+#   ("amb", base, quote, pool_idx)               -> (price_q64, liquidity)
+#   ("kuru", market)                             -> KuruBook (L2 levels) or (bid, ask)
+# ----------------------------------------------------------------------------------
+
+KEEP_BLOCKS = 4            # Blocks retained (late readers of the previous block still hit)
+HEAD_MAX_AGE = 0.5         # Seconds a known head block is reused before asking the RPC
+
+
+class QuoteCache:
+    """
+    block -> {key: value}. Only the newest KEEP_BLOCKS blocks are kept.
+    """
+
+    def __init__(self, keep_blocks=KEEP_BLOCKS):
+        self._lock = threading.Lock()
+        self.keep_blocks = keep_blocks
+        self._blocks = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, block, key):
+        """
+        Returns (hit, value).
+        """
+        if block is None: return False, None
+        with self._lock:
+            entries = self._blocks.get(block)
+            if entries is not None and key in entries:
+                self.hits += 1
+                return True, entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, block, key, value):
+        if block is None: return
+        with self._lock:
+            entries = self._blocks.get(block)
+            if entries is None:
+                if self._blocks and block < max(self._blocks) - self.keep_blocks: return  # Stale reader
+                entries = self._blocks[block] = {}
+                for old in [b for b in self._blocks if b <= block - self.keep_blocks]:
+                    del self._blocks[old]
+            entries[key] = value
+
+    def clear(self):
+        with self._lock:
+            self._blocks.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "blocks": sorted(self._blocks),
+                "entries": sum(len(v) for v in self._blocks.values()),
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+class HeadBlock:
+    """
+    Latest known block number. Fed by anything that sees blocks (RPC reads, sentinel logs),
+    so a scan can usually pin its block without an extra eth_blockNumber round trip.
+    Heads from other endpoints (confirmed=False) are only pinned once the pricing node has
+    reported a block at least as new: pinning a block the node lacks fails every call.
+    """
+
+    def __init__(self, max_age=HEAD_MAX_AGE):
+        self._lock = threading.Lock()
+        self.max_age = max_age
+        self.block = None
+        self.updated = 0
+        self.node_block = None  # Newest block the pricing node itself reported
+
+    def note(self, block, confirmed=True):
+        """
+        confirmed: the block comes from the pricing node (eth_blockNumber, its own reads).
+        """
+        if block is None: return
+        if isinstance(block, str): block = int(block, 16) if block.startswith('0x') else int(block)
+        with self._lock:
+            if self.block is None or block >= self.block:
+                self.block = block
+                self.updated = time.time()
+            if confirmed and (self.node_block is None or block > self.node_block):
+                self.node_block = block
+
+    def get(self, max_age=None):
+        """
+        Returns the head block if it was seen within max_age seconds and the pricing node is
+        known to have it, else None (callers then pin the node's own eth_blockNumber).
+        """
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            if self.block is None or time.time() - self.updated > max_age: return None
+            if self.node_block is None or self.block > self.node_block: return None
+            return self.block
@@ -0,0 +1,165 @@
+import bisect
+
+# ----------------------------------------------------------------------------------
+# QUOTE CURVES
+# Instead of one full quote per (edge, tier), an edge is quoted once at a geometric
+# ladder of input sizes (all in the same bulk pass) and kept as a piecewise-linear
+# amountIn -> amountOut curve. Any trade size inside the ladder is then priced by
+# interpolation, with no further RPC calls.
+# ----------------------------------------------------------------------------------
+
+CURVE_STEPS = 8            # Ladder points per edge
+CURVE_MIN_RATIO = 1.0001   # Ladder points closer than this are merged (rounding of tiny amounts)
+
+
+def geometric_ladder(min_amount, max_amount, steps=CURVE_STEPS):
+    """
+    `steps` integer sizes from min_amount to max_amount with a constant ratio between them.
+    """
+    min_amount = max(int(min_amount), 1)
+    max_amount = max(int(max_amount), min_amount)
+    if steps <= 1 or max_amount == min_amount: return [min_amount]
+
+    ratio = (max_amount / min_amount) ** (1.0 / (steps - 1))
+    ladder = []
+    for i in range(steps):
+        amount = max_amount if i == steps - 1 else int(round(min_amount * ratio ** i))
+        if not ladder or amount >= ladder[-1] * CURVE_MIN_RATIO and amount > ladder[-1]:
+            ladder.append(amount)
+    return ladder
+
+
+class QuoteCurve:
+    """
+    Output curve of one edge (tokenIn -> tokenOut). Points are (amountIn, amountOut, quote),
+    where quote is the best bulk quote at that size (dex/fee/gas of the winning venue).
+    Between points the output is interpolated linearly (an underestimate for the concave
+    curves AMMs and order books produce); above the last point it is extrapolated with the
+    last segment's marginal rate and flagged.
+    """
+
+    def __init__(self, token_in, token_out, points, block=None):
+        self.token_in = token_in
+        self.token_out = token_out
+        self.block = block
+        self.points = []
+        for amount_in, amount_out, quote in sorted(points, key=lambda p: p[0]):
+            if amount_in <= 0 or amount_out <= 0: continue
+            if self.points and amount_in == self.points[-1][0]:
+                if amount_out > self.points[-1][1]: self.points[-1] = (amount_in, amount_out, quote)
+                continue
+            self.points.append((amount_in, amount_out, quote))
+        self._xs = [p[0] for p in self.points]
+
+    def __len__(self):
+        return len(self.points)
+
+    def __bool__(self):
+        return bool(self.points)
+
+    @property
+    def min_amount(self):
+        return self._xs[0] if self._xs else 0
+
+    @property
+    def max_amount(self):
+        return self._xs[-1] if self._xs else 0
+
+    def covers(self, amount_in):
+        return bool(self.points) and amount_in <= self.max_amount
+
+    def _segment(self, amount_in):
+        """
+        Returns the bracketing points (x0, y0), (x1, y1); the origin acts as the first point.
+        """
+        i = bisect.bisect_left(self._xs, amount_in)
+        if i >= len(self.points): i = len(self.points) - 1
+        x1, y1 = self.points[i][0], self.points[i][1]
+        if i == 0:
+            x0, y0 = 0, 0
+        else:
+            x0, y0 = self.points[i - 1][0], self.points[i - 1][1]
+        return i, x0, y0, x1, y1
+
+    def amount_out(self, amount_in):
+        """
+        Interpolated output (raw units) for amount_in (raw units). 0 for an empty curve.
+        """
+        if not self.points or amount_in <= 0: return 0
+        i, x0, y0, x1, y1 = self._segment(amount_in)
+        if amount_in == x1: return y1
+        if amount_in > x1 and i > 0:
+            # Past the ladder: continue at the last segment's marginal rate
+            return int(y1 + (amount_in - x1) * (y1 - y0) / (x1 - x0))
+        if amount_in > x1:
+            return int(amount_in * y1 / x1)
+        return int(y0 + (amount_in - x0) * (y1 - y0) / (x1 - x0))
+
+    def rate(self, amount_in):
+        """
+        Average execution rate amountOut / amountIn (raw units).
+        """
+        return self.amount_out(amount_in) / amount_in if amount_in > 0 else 0.0
+
+    def marginal_rate(self, amount_in):
+        """
+        d(amountOut)/d(amountIn) at amount_in: the slope of the segment containing it.
+        Trading more is only worth it while this stays above the cost of the return leg.
+        """
+        if not self.points: return 0.0
+        _, x0, y0, x1, y1 = self._segment(max(amount_in, 1))
+        return (y1 - y0) / (x1 - x0) if x1 > x0 else 0.0
+
+    def quote_at(self, amount_in):
+        """
+        Quote dict for amount_in in the shape of get_bulk_quotes results. Venue fields come
+        from the nearest sampled point at or above amount_in.
+        """
+        if not self.points or amount_in <= 0: return None
+        i, _, _, x1, _ = self._segment(amount_in)
+        quote = dict(self.points[i][2] or {})
+        quote.pop('all_quotes', None)
+        quote['amountOut'] = self.amount_out(amount_in)
+        if amount_in != x1: quote['interpolated'] = True
+        if amount_in > self.max_amount: quote['extrapolated'] = True
+        return quote
+
+    def to_dict(self):
+        return {
+            "tokenIn": self.token_in,
+            "tokenOut": self.token_out,
+            "block": self.block,
+            "points": [[x, y] for x, y, _ in self.points]
+        }
+
+
+def expand_ladder_requests(edges, steps=CURVE_STEPS):
+    """
+    edges: list of dicts {"tokenIn", "tokenOut", "minAmount", "maxAmount", ...}.
+    Returns (requests, owners): flat get_bulk_quotes requests (edge fields + "amountIn")
+    and owners[req_idx] = edge index.
+    """
+    requests = []
+    owners = []
+    for edge_idx, edge in enumerate(edges):
+        for amount in geometric_ladder(edge['minAmount'], edge['maxAmount'], steps):
+            req = dict(edge)
+            req['amountIn'] = amount
+            requests.append(req)
+            owners.append(edge_idx)
+    return requests, owners
+
+
+def curves_from_snapshot(edges, requests, owners, snapshot):
+    """
+    Groups an index-keyed bulk snapshot back into one QuoteCurve per edge.
+    Returns {"curves": [QuoteCurve per edge], "network_ms", "block"}.
+    """
+    results = (snapshot or {}).get("results", {})
+    block = (snapshot or {}).get("block")
+    points = [[] for _ in edges]
+    for req_idx, quote in results.items():
+        points[owners[req_idx]].append((requests[req_idx]['amountIn'], quote['amountOut'], quote))
+    curves = [QuoteCurve(e['tokenIn'], e['tokenOut'], pts, block) for e, pts in zip(edges, points)]
+    return {"curves": curves, "network_ms": (snapshot or {}).get("network_ms", 0), "block": block}
+
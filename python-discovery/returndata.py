@@ -0,0 +1,99 @@
+# ----------------------------------------------------------------------------------
+# FIXED-WIDTH RETURN DATA DECODERS
+# The return shapes the pricing hot loops see are static words (quoter tuple, uint128,
+# bid/ask) inside one dynamic envelope (Multicall3 tryAggregate). Slicing 32-byte words
+# with int.from_bytes is much cheaper than eth_abi.decode's generic type machinery.
+# Inputs may be bytes, bytearray or memoryview.
+# ----------------------------------------------------------------------------------
+
+WORD = 32
+_SIGN_BIT = 1 << 255
+
+
+class ReturnDataError(ValueError):
+    pass
+
+
+def word(data, index, signed=False):
+    start = index * WORD
+    if len(data) < start + WORD:
+        raise ReturnDataError(f"return data too short for word {index} ({len(data)} bytes)")
+    value = int.from_bytes(data[start:start + WORD], 'big')
+    if signed and value & _SIGN_BIT: value -= 1 << 256
+    return value
+
+
+def decode_uint(data):
+    """
+    Single uint (uint128 Ambient price/liquidity, uint256 block number, ...).
+    """
+    return word(data, 0)
+
+
+def decode_address(data):
+    return "0x" + bytes(data[12:32]).hex() if len(data) >= WORD else None
+
+
+def decode_uint_pair(data):
+    """
+    (uint256, uint256), e.g. Kuru bestBidAsk.
+    """
+    if len(data) < 2 * WORD:
+        raise ReturnDataError(f"expected 64 bytes, got {len(data)}")
+    return int.from_bytes(data[0:32], 'big'), int.from_bytes(data[32:64], 'big')
+
+
+def decode_quoter_result(data):
+    """
+    QuoterV2.quoteExactInputSingle -> (amountOut, sqrtPriceX96After, initializedTicksCrossed, gasEstimate).
+    """
+    if len(data) < 4 * WORD:
+        raise ReturnDataError(f"expected 128 bytes, got {len(data)}")
+    return (
+        int.from_bytes(data[0:32], 'big'),
+        int.from_bytes(data[32:64], 'big'),
+        int.from_bytes(data[64:96], 'big'),
+        int.from_bytes(data[96:128], 'big'),
+    )
+
+
+def decode_words(data, n, signed=()):
+    """
+    First n words as ints; indexes listed in `signed` are two's complement (int24 tick, ...).
+    """
+    return tuple(word(data, i, i in signed) for i in range(n))
+
+
+def decode_try_aggregate(raw, copy=True):
+    """
+    Decodes a Multicall3 tryAggregate/aggregate3 response ((bool,bytes)[]) in one pass.
+    Returns [(success, returnData), ...]. With copy=False, returnData are memoryview slices
+    of `raw` (zero-copy; valid as long as `raw` is alive).
+    """
+    view = memoryview(raw)
+    size = len(view)
+    if size < 2 * WORD:
+        raise ReturnDataError(f"tryAggregate response too short ({size} bytes)")
+
+    base = int.from_bytes(view[0:32], 'big')  # Offset of the array (0x20)
+    if base + WORD > size:
+        raise ReturnDataError("array offset out of range")
+    n = int.from_bytes(view[base:base + WORD], 'big')
+    heads = base + WORD
+    if heads + n * WORD > size:
+        raise ReturnDataError(f"array length {n} out of range")
+
+    results = []
+    for i in range(n):
+        pos = heads + int.from_bytes(view[heads + i * WORD:heads + (i + 1) * WORD], 'big')
+        if pos + 2 * WORD > size:
+            raise ReturnDataError(f"element {i} out of range")
+        success = view[pos + WORD - 1] != 0
+        data_pos = pos + int.from_bytes(view[pos + WORD:pos + 2 * WORD], 'big')
+        length = int.from_bytes(view[data_pos:data_pos + WORD], 'big')
+        start = data_pos + WORD
+        if start + length > size:
+            raise ReturnDataError(f"element {i} data out of range")
+        chunk = view[start:start + length]
+        results.append((success, bytes(chunk) if copy else chunk))
+    return results
@@ -0,0 +1,165 @@
+import itertools
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# ----------------------------------------------------------------------------------
+# JSON-RPC BATCH TRANSPORT
+# Collects the eth_calls of a scan phase and sends them as ONE JSON-RPC array
+# (one HTTP round trip), then routes each response back by id. Endpoints that
+# reject arrays fall back to one request per call over the same keep-alive session.
+# ----------------------------------------------------------------------------------
+
+MAX_BATCH_SIZE = 100   # Common provider limit for JSON-RPC arrays
+DEFAULT_TIMEOUT = 10
+
+_SESSIONS = {}
+_SESSIONS_LOCK = threading.Lock()
+_NO_BATCH_URLS = set()  # Endpoints that answered an array with an error (the router keeps its own)
+_IDS = itertools.count(1)
+
+
+class RpcError(Exception):
+    """
+    Error entry of a batch response (kept per call, the rest of the batch still succeeds).
+    """
+
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.code = code
+
+
+def get_session(rpc_url):
+    """
+    Keep-alive requests.Session per endpoint (shared by all batches).
+    """
+    with _SESSIONS_LOCK:
+        session = _SESSIONS.get(rpc_url)
+        if session is None:
+            session = requests.Session()
+            session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+            session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+            session.headers.update({"Content-Type": "application/json"})
+            _SESSIONS[rpc_url] = session
+        return session
+
+
+def _hex(value):
+    if isinstance(value, (bytes, bytearray)): return "0x" + bytes(value).hex()
+    if isinstance(value, int): return hex(value)
+    return value
+
+
+def _block_param(block_identifier):
+    return hex(block_identifier) if isinstance(block_identifier, int) else block_identifier
+
+
+class RpcBatch:
+    """
+    Usage:
+        batch = RpcBatch(RPC_URL)
+        h = batch.eth_call(to, data)
+        results = batch.execute()   # results[h] -> bytes, or RpcError
+    """
+
+    def __init__(self, rpc_url, timeout=DEFAULT_TIMEOUT, max_batch_size=MAX_BATCH_SIZE, router=None, hedge=False):
+        self.rpc_url = rpc_url
+        self.timeout = timeout
+        self.max_batch_size = max_batch_size
+        self.router = router  # rpc_router.RpcRouter: pick (and hedge across) endpoints instead of rpc_url
+        self.hedge = hedge
+        self._entries = []   # (payload, decoder)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, method, params, decoder=None):
+        """
+        Queues a raw JSON-RPC call. Returns its handle (index into execute()'s result).
+        """
+        payload = {"jsonrpc": "2.0", "id": next(_IDS), "method": method, "params": params}
+        self._entries.append((payload, decoder))
+        return len(self._entries) - 1
+
+    def eth_call(self, to, data, block_identifier='latest'):
+        return self.add("eth_call", [{"to": to, "data": _hex(data)}, _block_param(block_identifier)],
+                        decoder=lambda r: bytes.fromhex(r[2:]))
+
+    def _post(self, body):
+        if self.router: return self.router.request(body, hedge=self.hedge)
+        resp = get_session(self.rpc_url).post(self.rpc_url, json=body, timeout=self.timeout)
+        resp.raise_for_status()
+        return resp.json()
+
+    def _batch_rejected(self):
+        # With a router the endpoint is picked per request, so the router records which one rejected
+        if not self.router: _NO_BATCH_URLS.add(self.rpc_url)
+
+    def _send_array(self, entries):
+        replies = self._post([payload for payload, _ in entries])
+        if not isinstance(replies, list):
+            # Some nodes answer a batch with a single error object
+            raise RpcError((replies or {}).get("error", {}).get("message", "batch rejected"))
+        return {r.get("id"): r for r in replies if isinstance(r, dict)}
+
+    def _send_single(self, entries):
+        by_id = {}
+        for payload, _ in entries:
+            try:
+                by_id[payload["id"]] = self._post(payload)
+            except Exception as e:
+                by_id[payload["id"]] = {"error": {"message": str(e)}}
+        return by_id
+
+    def execute(self):
+        """
+        Sends every queued call and returns one result per handle (decoded value or RpcError).
+        The batch is emptied, so the object can be reused for the next phase.
+        """
+        entries, self._entries = self._entries, []
+        if not entries: return []
+
+        by_id = {}
+        for i in range(0, len(entries), self.max_batch_size):
+            part = entries[i:i + self.max_batch_size]
+            if (not self.router and self.rpc_url in _NO_BATCH_URLS) or len(part) == 1:
+                by_id.update(self._send_single(part))
+                continue
+            try:
+                by_id.update(self._send_array(part))
+            except requests.RequestException as e:
+                status = getattr(getattr(e, "response", None), "status_code", None)
+                if status is None or status == 429 or status >= 500:
+                    raise  # Transport down / rate limited: let the caller fall back
+                self._batch_rejected()
+                by_id.update(self._send_single(part))
+            except (RpcError, ValueError):
+                self._batch_rejected()
+                by_id.update(self._send_single(part))
+
+        results = []
+        for payload, decoder in entries:
+            reply = by_id.get(payload["id"])
+            if reply is None:
+                results.append(RpcError("missing response"))
+            elif "error" in reply:
+                err = reply["error"] or {}
+                results.append(RpcError(err.get("message", "rpc error"), err.get("code")))
+            else:
+                try:
+                    value = reply.get("result")
+                    results.append(decoder(value) if decoder else value)
+                except Exception as e:
+                    results.append(RpcError(f"bad result: {e}"))
+        return results
+
+
+def batch_eth_call(rpc_url, calls, block_identifier='latest', timeout=DEFAULT_TIMEOUT):
+    """
+    calls: list of (to, data). Returns list of bytes (or None where the call failed).
+    """
+    batch = RpcBatch(rpc_url, timeout=timeout)
+    for to, data in calls:
+        batch.eth_call(to, data, block_identifier)
+    return [None if isinstance(r, RpcError) else r for r in batch.execute()]
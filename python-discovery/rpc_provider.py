@@ -0,0 +1,43 @@
+from web3 import HTTPProvider, AsyncHTTPProvider
+
+# ----------------------------------------------------------------------------------
+# WEB3 PROVIDER OVER THE RPC ROUTER
+# Kept apart from rpc_router.py so the router (and everything that only sends raw
+# JSON-RPC through it) can be imported without loading web3.
+# ----------------------------------------------------------------------------------
+
+
+class RoutedHTTPProvider(HTTPProvider):
+    """
+    web3 HTTPProvider that sends every request through an RpcRouter.
+    hedge_methods: RPC methods sent hedged (e.g. {"eth_call"} for latency-critical pricing).
+    """
+
+    def __init__(self, router, hedge_methods=()):
+        super().__init__(router.urls[0], request_kwargs={'timeout': router.timeout})
+        self.router = router
+        self.hedge_methods = set(hedge_methods)
+
+    def make_request(self, method, params):
+        return self.router.request(self.encode_rpc_request(method, params), hedge=method in self.hedge_methods)
+
+    def make_batch_request(self, batch_requests):
+        hedge = any(method in self.hedge_methods for method, _ in batch_requests)
+        response = self.router.request(self.encode_batch_rpc_request(batch_requests), hedge=hedge)
+        if not isinstance(response, list): return response
+        return sorted(response, key=lambda r: r.get("id", 0))
+
+
+class RoutedAsyncHTTPProvider(AsyncHTTPProvider):
+    """
+    web3 AsyncHTTPProvider that sends every request through an RpcRouter over one
+    aiohttp session (the endpoint is picked per request, not when the client is built).
+    """
+
+    def __init__(self, router, session):
+        super().__init__(router.urls[0])
+        self.router = router
+        self.session = session
+
+    async def make_request(self, method, params):
+        return await self.router.async_request(self.session, self.encode_rpc_request(method, params))
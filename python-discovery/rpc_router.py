@@ -0,0 +1,277 @@
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from rpc_batch import get_session, RpcError
+
+# ----------------------------------------------------------------------------------
+# MULTI-ENDPOINT RPC ROUTER
+# Keeps a pool of JSON-RPC endpoints with continuously measured latency (p50/p99 over
+# a rolling window) and error rate, and sends each request to the fastest healthy one,
+# failing over on transport errors. Latency-critical calls can be hedged: if the
+# first endpoint has not answered by its own p90, the same request goes to the next
+# endpoint and whichever answers first wins. A running HTTP request cannot be cancelled,
+# so the losers finish in the background and are left out of the endpoint stats. JSON-RPC arrays only go to endpoints that
+# have not rejected one (tracked per endpoint, as the endpoint is picked per request).
+# ----------------------------------------------------------------------------------
+
+LATENCY_WINDOW = 100         # Samples kept per endpoint
+ERROR_DECAY = 0.9            # EWMA weight of the previous error rate
+ERROR_PENALTY = 5.0          # Score multiplier per unit of error rate
+COOLDOWN = 30                # Seconds an endpoint sits out after FAIL_LIMIT consecutive failures
+FAIL_LIMIT = 3
+HEDGE_DEFAULT_DELAY = 0.25   # Seconds before hedging while the endpoint has no latency history
+HEDGE_MIN_DELAY = 0.05
+HEDGE_WORKERS = 8            # Concurrent hedged requests served without queueing (x endpoints threads)
+
+# JSON-RPC errors from a node that is behind (retry elsewhere instead of returning them)
+LAGGING_NODE_ERRORS = ("header not found", "unknown block", "block not found", "missing trie node")
+
+
+class EndpointStats:
+    """
+    Rolling latency window + error-rate EWMA of one endpoint.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.error_rate = 0.0
+        self.failures = 0
+        self.cooldown_until = 0
+        self.requests = 0
+        self.batch_ok = True  # False once the endpoint rejected a JSON-RPC array
+
+    def record(self, latency=None, error=False):
+        self.requests += 1
+        self.error_rate = self.error_rate * ERROR_DECAY + (1 - ERROR_DECAY) * (1.0 if error else 0.0)
+        if error:
+            self.failures += 1
+            if self.failures >= FAIL_LIMIT: self.cooldown_until = time.time() + COOLDOWN
+        else:
+            self.failures = 0
+            self.latencies.append(latency)
+
+    def percentile(self, q):
+        if not self.latencies: return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    @property
+    def healthy(self):
+        return time.time() >= self.cooldown_until
+
+    def score(self):
+        """
+        Lower is better. Unmeasured endpoints score 0 so they get sampled.
+        """
+        p50 = self.percentile(0.5)
+        if p50 is None: return 0.0
+        return p50 * (1 + ERROR_PENALTY * self.error_rate)
+
+    def snapshot(self):
+        p50, p99 = self.percentile(0.5), self.percentile(0.99)
+        return {
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p99_ms": round(p99 * 1000, 1) if p99 is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "requests": self.requests,
+            "healthy": self.healthy,
+            "batch": self.batch_ok
+        }
+
+
+class RpcRouter:
+    """
+    router.request(payload) -> decoded JSON response (payload: dict, list or encoded bytes).
+    """
+
+    def __init__(self, urls, timeout=10, hedge_delay=None):
+        self.urls = list(dict.fromkeys(urls))
+        self.timeout = timeout
+        self.hedge_delay = hedge_delay  # None: per-endpoint p90
+        self._lock = threading.Lock()
+        self._stats = {url: EndpointStats(url) for url in self.urls}
+        self._executor = None
+
+    @property
+    def primary_url(self):
+        return self.ranked()[0]
+
+    def ranked(self, batch=False):
+        """
+        Endpoints best-first: healthy ones by score, then the ones cooling down.
+        With batch=True, only the endpoints that accept JSON-RPC arrays.
+        """
+        with self._lock:
+            stats = [s for s in self._stats.values() if s.batch_ok or not batch]
+        healthy = sorted((s for s in stats if s.healthy), key=lambda s: s.score())
+        cooling = sorted((s for s in stats if not s.healthy), key=lambda s: s.cooldown_until)
+        return [s.url for s in healthy + cooling]
+
+    def stats(self):
+        with self._lock:
+            return {url: s.snapshot() for url, s in self._stats.items()}
+
+    def _record(self, url, latency=None, error=False):
+        with self._lock:
+            self._stats[url].record(latency, error)
+
+    def _reject_batch(self, url, reason):
+        with self._lock:
+            self._stats[url].batch_ok = False
+        raise RpcError(f"batch rejected by {url}: {reason}")
+
+    def _check_reply(self, url, is_batch, reply):
+        lagging = _lagging_message(reply)
+        if lagging is not None:
+            raise LaggingNodeError(lagging)
+        if is_batch and not isinstance(reply, list):
+            self._reject_batch(url, "single reply to an array")
+
+    def _send(self, url, payload, settled=None):
+        """
+        settled: threading.Event set once a hedged race is decided; a reply (or error) that
+        lands after it is a loser's and does not count in the endpoint stats.
+        """
+        body = payload if isinstance(payload, (bytes, bytearray)) else json.dumps(payload).encode()
+        is_batch = _is_batch(body)
+        t0 = time.perf_counter()
+        try:
+            resp = get_session(url).post(url, data=body, timeout=self.timeout)
+            if is_batch and 400 <= resp.status_code < 500 and resp.status_code != 429:
+                self._reject_batch(url, f"HTTP {resp.status_code}")
+            resp.raise_for_status()
+            reply = resp.json()
+            self._check_reply(url, is_batch, reply)
+        except RpcError:
+            raise  # A capability, not an endpoint failure
+        except Exception:
+            if settled is None or not settled.is_set(): self._record(url, error=True)
+            raise
+        if settled is None or not settled.is_set(): self._record(url, time.perf_counter() - t0)
+        return reply
+
+    def _hedge_delay_for(self, url):
+        if self.hedge_delay is not None: return self.hedge_delay
+        with self._lock:
+            p90 = self._stats[url].percentile(0.9)
+        return HEDGE_DEFAULT_DELAY if p90 is None else max(p90, HEDGE_MIN_DELAY)
+
+    def request(self, payload, hedge=False):
+        """
+        Sends payload to the best endpoint, failing over down the ranking on errors.
+        With hedge=True (and 2+ endpoints) a duplicate goes to the runner-up after the deadline;
+        the first answer is returned and the slower request is ignored when it completes.
+        A JSON-RPC array raises RpcError once no endpoint accepts arrays (send calls one by one).
+        """
+        is_batch = _is_batch(payload)
+        order = self.ranked(batch=is_batch)
+        if not order:
+            raise RpcError("no endpoint accepts JSON-RPC batches")
+        if hedge and len(order) > 1:
+            return self._request_hedged(payload, order)
+
+        last_error = None
+        for url in order:
+            try:
+                return self._send(url, payload)
+            except Exception as e:
+                last_error = e
+        raise last_error
+
+    async def async_request(self, session, payload):
+        """
+        asyncio twin of request() over an aiohttp session: same ranking, failover, lagging-node
+        retry and endpoint stats as the sync path (not hedged).
+        """
+        body = payload if isinstance(payload, (bytes, bytearray)) else json.dumps(payload).encode()
+        is_batch = _is_batch(body)
+        order = self.ranked(batch=is_batch)
+        if not order:
+            raise RpcError("no endpoint accepts JSON-RPC batches")
+
+        last_error = None
+        for url in order:
+            t0 = time.perf_counter()
+            try:
+                async with session.post(url, data=body, headers={"Content-Type": "application/json"}) as resp:
+                    if is_batch and 400 <= resp.status < 500 and resp.status != 429:
+                        self._reject_batch(url, f"HTTP {resp.status}")
+                    resp.raise_for_status()
+                    reply = await resp.json(content_type=None)
+                self._check_reply(url, is_batch, reply)
+            except RpcError as e:
+                last_error = e  # A capability, not an endpoint failure
+                continue
+            except Exception as e:
+                self._record(url, error=True)
+                last_error = e
+                continue
+            self._record(url, time.perf_counter() - t0)
+            return reply
+        raise last_error
+
+    def _request_hedged(self, payload, order):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # Every hedged request may occupy one thread per endpoint until its losers time out
+                    self._executor = ThreadPoolExecutor(max_workers=HEDGE_WORKERS * len(self.urls))
+
+        pending = set()
+        launched = 0
+        last_error = None
+        settled = threading.Event()
+
+        def launch():
+            nonlocal launched
+            pending.add(self._executor.submit(self._send, order[launched], payload, settled))
+            launched += 1
+
+        launch()
+        while pending:
+            deadline = self._hedge_delay_for(order[launched - 1]) if launched < len(order) else None
+            done, _ = wait(pending, timeout=deadline, return_when=FIRST_COMPLETED)
+            if not done:
+                launch()  # Deadline passed: hedge on the next endpoint, keep the first one running
+                continue
+            for fut in done:
+                pending.discard(fut)
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                settled.set()  # Requests still in flight finish unrecorded
+                for other in pending: other.cancel()  # Only drops the ones not started yet
+                return result
+            if not pending and launched < len(order):
+                launch()  # Everything in flight failed: fail over
+        raise last_error or RuntimeError("all RPC endpoints failed")
+
+
+class LaggingNodeError(Exception):
+    pass
+
+
+def _is_batch(payload):
+    if isinstance(payload, (bytes, bytearray)): return payload.lstrip()[:1] == b"["
+    return isinstance(payload, list)
+
+
+def _lagging_message(reply):
+    """
+    Error message of a reply (or of any element of a batch reply) from a node that is behind.
+    """
+    if isinstance(reply, list):
+        for item in reply:
+            message = _lagging_message(item)
+            if message is not None: return message
+        return None
+    error = reply.get("error") if isinstance(reply, dict) else None
+    if not isinstance(error, dict): return None
+    message = str(error.get("message", ""))
+    return message if any(text in message.lower() for text in LAGGING_NODE_ERRORS) else None
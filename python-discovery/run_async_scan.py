@@ -1,6 +1,7 @@
 import asyncio
 import time
-from arbitrage_engine import scan_market
+from arbitrage_engine import async_scan_market
+from async_pricing import close_async_pricing
 import json
 
 async def main():
@@ -8,7 +9,8 @@ async def main():
     start_time = time.time()
     
     # Run the market scan
-    result = await scan_market()
+    result = await async_scan_market()
+    await close_async_pricing()
     
     end_time = time.time()
     total_time = end_time - start_time
@@ -0,0 +1,63 @@
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web3_pricing import uniswap_quoter, multicall_contract, UNISWAP_V3_QUOTER_ADDRESS, w3
+from calldata import encode_quote_exact_input_single, encode_try_aggregate
+
+# Typical scan: ~50 pairs x 3 tiers x 4 fee tiers
+TOKENS = [
+    "0x3bd359C1119dA7Da1D913D1C4D2B7c461115433A", # WMON
+    "0x754704Bc059F8C67012fEd69BC8A327a5aafb603", # USDC
+    "0x350035555e10d9afaf1566aaebfced5ba6c27777", # CHOG
+    "0x00000000efe302beaa2b3e6e1b18d08d69a9012a", # AUSD
+]
+FEES = [100, 500, 3000, 10000]
+ROUNDS = 5
+
+def build_params():
+    params = []
+    for t_in in TOKENS:
+        for t_out in TOKENS:
+            if t_in == t_out: continue
+            for amt in [10**6, 10**18, 37 * 10**19]:
+                for _ in range(4):
+                    for fee in FEES:
+                        params.append((w3.to_checksum_address(t_in), w3.to_checksum_address(t_out), amt, fee))
+    return params
+
+def bench(label, fn):
+    best = float('inf')
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<38} {best * 1000:>9.2f}ms")
+    return out, best
+
+def main():
+    params = build_params()
+    print(f"🚀 Benchmarking calldata encoding ({len(params)} quoter calls, best of {ROUNDS})...")
+
+    def old_inner():
+        return [uniswap_quoter.encode_abi("quoteExactInputSingle", args=[(a, b, amt, fee, 0)]) for a, b, amt, fee in params]
+
+    def new_inner():
+        return [encode_quote_exact_input_single(a, b, amt, fee) for a, b, amt, fee in params]
+
+    old_data, t_old = bench("encode_abi (quoteExactInputSingle)", old_inner)
+    new_data, t_new = bench("template (quoteExactInputSingle)", new_inner)
+    assert [bytes.fromhex(d[2:]) for d in old_data] == new_data, "Template output differs from encode_abi!"
+    print(f"  -> {t_old / t_new:.1f}x faster\n")
+
+    calls = [{"target": UNISWAP_V3_QUOTER_ADDRESS, "callData": d} for d in new_data[:40]]
+
+    old_outer, t_old = bench("encode_abi (tryAggregate, 40 calls)", lambda: multicall_contract.encode_abi("tryAggregate", args=[False, calls]))
+    new_outer, t_new = bench("template (tryAggregate, 40 calls)", lambda: encode_try_aggregate(calls))
+    assert bytes.fromhex(old_outer[2:]) == new_outer, "tryAggregate payload differs from encode_abi!"
+    print(f"  -> {t_old / t_new:.1f}x faster")
+
+if __name__ == "__main__":
+    main()
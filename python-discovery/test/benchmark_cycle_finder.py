@@ -0,0 +1,83 @@
+import sys
+import os
+import json
+import random
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cycle_finder import find_negative_cycles, canonical_cycle, cycle_rate
+
+# Synthetic market over the full monad_tokens.json universe: each token gets a "true"
+# price, every listed pair quotes it with a random spread, and a few edges are mispriced.
+# Compares the old WMON-pivot 2/3-hop loops with the negative-cycle search.
+ROUNDS = 20
+PAIR_DENSITY = 0.35      # Share of token pairs with a market
+SPREAD = (0.994, 0.9995) # Rate multiplier of a normal edge (fees + spread)
+MISPRICED = 3            # Edges quoted above the true price
+SEED = 7
+
+def load_symbols():
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "monad_tokens.json")
+    with open(path) as f:
+        tokens = json.load(f).get("tokens", [])
+    symbols = sorted({t["symbol"] for t in tokens if t.get("chainId") == 143})
+    if "WMON" not in symbols: symbols.append("WMON")
+    return symbols
+
+def build_graph(symbols, rng):
+    price = {s: rng.uniform(0.001, 10) for s in symbols}
+    graph = {}
+    for a in symbols:
+        for b in symbols:
+            if a < b and (rng.random() < PAIR_DENSITY or "WMON" in (a, b)):
+                graph.setdefault(a, {})[b] = {"rate": price[a] / price[b] * rng.uniform(*SPREAD)}
+                graph.setdefault(b, {})[a] = {"rate": price[b] / price[a] * rng.uniform(*SPREAD)}
+    edges = [(a, b) for a in graph for b in graph[a]]
+    for a, b in rng.sample(edges, MISPRICED):
+        graph[a][b]["rate"] *= rng.uniform(1.003, 1.01)
+    return graph
+
+def pivot_cycles(graph, pivot="WMON"):
+    found = set()
+    for b in graph[pivot]:
+        if pivot in graph.get(b, {}) and graph[pivot][b]["rate"] * graph[b][pivot]["rate"] > 1:
+            found.add(canonical_cycle([pivot, b]))
+        for c in graph.get(b, {}):
+            if c == pivot or pivot not in graph.get(c, {}): continue
+            if graph[pivot][b]["rate"] * graph[b][c]["rate"] * graph[c][pivot]["rate"] > 1:
+                found.add(canonical_cycle([pivot, b, c]))
+    return found
+
+def main():
+    symbols = load_symbols()
+    rng = random.Random(SEED)
+    graphs = [build_graph(symbols, rng) for _ in range(ROUNDS)]
+    n_edges = sum(len(v) for v in graphs[0].values())
+    print(f"🚀 Benchmarking cycle search on {len(symbols)} tokens (~{n_edges} edges, {ROUNDS} graphs)...")
+
+    t0 = time.perf_counter()
+    pivot = [pivot_cycles(g) for g in graphs]
+    pivot_ms = (time.perf_counter() - t0) * 1000 / ROUNDS
+
+    t0 = time.perf_counter()
+    found = [find_negative_cycles(g, max_cycles=None) for g in graphs]
+    finder_ms = (time.perf_counter() - t0) * 1000 / ROUNDS
+
+    n_pivot = sum(len(p) for p in pivot)
+    n_found = sum(len(f) for f in found)
+    covered = sum(len(p & {c["cycle"] for c in f}) for p, f in zip(pivot, found))
+    by_hops = {}
+    for f in found:
+        for c in f: by_hops[c["hops"]] = by_hops.get(c["hops"], 0) + 1
+
+    print(f"  WMON pivot 2/3-hop   {pivot_ms:>8.2f}ms/graph   {n_pivot:>5} cycles")
+    print(f"  negative-cycle search {finder_ms:>7.2f}ms/graph   {n_found:>5} cycles  by hops: {dict(sorted(by_hops.items()))}")
+    print(f"\n  -> {covered}/{n_pivot} pivot cycles also found, {n_found - covered} more beyond the pivot / 3-hop limit")
+    for graph, p, f in zip(graphs, pivot, found):
+        if not p: continue
+        best = max(p, key=lambda c: cycle_rate(graph, c))
+        assert best in {c["cycle"] for c in f}, "the cycle search must find the best pivot cycle"
+
+if __name__ == "__main__":
+    main()
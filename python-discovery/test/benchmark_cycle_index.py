@@ -0,0 +1,84 @@
+import sys
+import os
+import io
+import random
+import time
+import contextlib
+from collections import defaultdict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import arbitrage_engine as engine
+from cycle_index import CycleIndex
+
+# Synthetic tier graphs (WMON + n-1 tokens, two venues per quoted pair). A whale swap moves
+# one pair: the full path re-analyzes every tier graph, the incremental path feeds the two
+# refreshed edges per tier to a CycleIndex built from the previous scan.
+SIZES = [20, 40]
+TIERS = [1, 10, 100]
+PAIR_DENSITY = 0.5
+REFRESHES = 20
+SEED = 13
+
+def venue_edge(rate, rng):
+    venues = [{"rate": rate * rng.uniform(0.993, 1.0005), "dex": dex, "fee": fee, "strategy": "Bulk"}
+              for dex, fee in [("Uniswap V3", 500), ("Kuru (OrderBook)", 0)]]
+    return dict(max(venues, key=lambda v: v['rate']), venues=venues)
+
+def build_scan(n, rng):
+    tokens = ["WMON"] + [f"T{i:03d}" for i in range(n - 1)]
+    price = {t: rng.uniform(0.01, 5) for t in tokens}
+    pairs = [(a, b) for i, a in enumerate(tokens) for b in tokens[i + 1:]
+             if "WMON" in (a, b) or rng.random() < PAIR_DENSITY]
+    graphs = defaultdict(lambda: defaultdict(dict))
+    requests = []
+    for tier in TIERS:
+        for a, b in pairs:
+            for t_in, t_out in ((a, b), (b, a)):
+                graphs[tier][t_in][t_out] = venue_edge(price[t_in] / price[t_out], rng)
+                requests.append({"tier": tier, "tokenInSymbol": t_in, "tokenOutSymbol": t_out})
+    return price, pairs, graphs, requests
+
+def main():
+    engine.CYCLE_SEARCH = False # Both paths cover the same 2/3-hop cycles
+    rng = random.Random(SEED)
+    print(f"🚀 Benchmarking one-pair refreshes ({len(TIERS)} tiers, {REFRESHES} refreshes)...")
+    print(f"  {'tokens':>6} {'cycles':>7} {'full rescan':>12} {'incremental':>12} {'rescored':>9} {'speedup':>8}")
+
+    for n in SIZES:
+        price, pairs, graphs, requests = build_scan(n, rng)
+        index = CycleIndex(engine._cycle_net_profit, engine._indexed_opportunity)
+        index.update(graphs, requests)
+
+        full_ms = inc_ms = 0.0
+        rescored = 0
+        for _ in range(REFRESHES):
+            a, b = rng.choice(pairs)
+            fresh = defaultdict(lambda: defaultdict(dict))
+            for tier in TIERS:
+                for t_in, t_out in ((a, b), (b, a)):
+                    fresh[tier][t_in][t_out] = graphs[tier][t_in][t_out] = venue_edge(price[t_in] / price[t_out] * 1.01, rng)
+
+            t0 = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                matrix = engine.RateMatrix.from_graphs(graphs, TIERS)
+                full = [engine.analyze_matrix_for_tier(matrix, graphs[t], t) for t in TIERS]
+            full_ms += (time.perf_counter() - t0) * 1000
+
+            t0 = time.perf_counter()
+            rescored += index.update(fresh, index.requests_for([(a, b)]))
+            top = index.top_k(engine.INDEX_TOP_K)
+            inc_ms += (time.perf_counter() - t0) * 1000
+
+        print(f"  {n:>6} {len(index):>7} {full_ms / REFRESHES:>10.2f}ms {inc_ms / REFRESHES:>10.2f}ms "
+              f"{rescored // REFRESHES:>9} {full_ms / inc_ms:>7.1f}x")
+
+        # The running top-K is the best cycle of a from-scratch index over the same graphs
+        fresh_index = CycleIndex(engine._cycle_net_profit, engine._indexed_opportunity)
+        fresh_index.update(graphs, requests)
+        assert index.ranking[:engine.INDEX_TOP_K] == fresh_index.ranking[:engine.INDEX_TOP_K], "running top-K drifted"
+        assert top and top[0]['path'] == fresh_index.top_k(1)[0]['path']
+
+if __name__ == "__main__":
+    main()
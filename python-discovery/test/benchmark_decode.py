@@ -0,0 +1,128 @@
+import sys
+import os
+import io
+import time
+import contextlib
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eth_abi import encode, decode
+from returndata import decode_quoter_result, decode_uint, decode_uint_pair, decode_try_aggregate
+
+# Synthetic fixtures in the shape of one scan's return data (quoter tuples, Ambient
+# uint128 price/liquidity, Kuru bid/ask) wrapped in a tryAggregate envelope. The scan
+# decode is also benchmarked on a real tryAggregate reply: `--capture` runs one live scan
+# and saves its largest reply to CAPTURE_FILE (hex), which later runs load.
+N_QUOTES = 600
+N_AMBIENT = 120
+N_KURU = 20
+ROUNDS = 5
+CAPTURE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "try_aggregate_reply.hex")
+QUOTER_RESULT_SIZE = 128 # (amountOut, sqrtPriceX96After, initializedTicksCrossed, gasEstimate)
+
+def build_fixtures():
+    quotes = [encode(['uint256', 'uint160', 'uint32', 'uint256'], [10**18 + i * 7919, 2**96 + i, i % 5, 80000 + i]) for i in range(N_QUOTES)]
+    ambient = [encode(['uint128'], [(2**64) * (i + 1) + 12345]) for i in range(N_AMBIENT)]
+    kuru = [encode(['uint256', 'uint256'], [10**18 + i, 10**18 + 2 * i + 1]) for i in range(N_KURU)]
+    pairs = [(i % 11 != 0, d) for i, d in enumerate(quotes + ambient + kuru)]
+    envelope = encode(['(bool,bytes)[]'], [pairs])
+    return quotes, ambient, kuru, envelope
+
+def capture_reply():
+    """
+    Runs one live scan and saves the largest tryAggregate reply it decoded.
+    """
+    import web3_pricing
+    import arbitrage_engine as engine
+    replies = []
+    decode = web3_pricing.decode_try_aggregate
+
+    def recording(raw, copy=True):
+        replies.append(bytes(raw))
+        return decode(raw, copy=copy)
+
+    web3_pricing.decode_try_aggregate = recording
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine.scan_market()
+    finally:
+        web3_pricing.decode_try_aggregate = decode
+    if not replies:
+        print("❌ The scan decoded no tryAggregate reply (RPC down?)")
+        return
+    raw = max(replies, key=len)
+    with open(CAPTURE_FILE, "w") as f:
+        f.write(raw.hex())
+    print(f"💾 Saved a {len(raw)} byte reply ({len(decode(raw))} results) to {CAPTURE_FILE}")
+
+def load_capture():
+    if not os.path.exists(CAPTURE_FILE): return None
+    with open(CAPTURE_FILE) as f:
+        return bytes.fromhex(f.read().strip())
+
+def bench(label, fn):
+    best = float('inf')
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<38} {best * 1000:>9.2f}ms")
+    return out, best
+
+def compare(name, old_fn, new_fn):
+    old_out, t_old = bench(f"eth_abi ({name})", old_fn)
+    new_out, t_new = bench(f"fixed-width ({name})", new_fn)
+    assert old_out == new_out, f"{name}: fixed-width output differs from eth_abi!"
+    print(f"  -> {t_old / t_new:.1f}x faster\n")
+
+def main():
+    quotes, ambient, kuru, envelope = build_fixtures()
+    print(f"🚀 Benchmarking return-data decoding ({N_QUOTES + N_AMBIENT + N_KURU} results, best of {ROUNDS})...")
+
+    compare("quoter tuple",
+            lambda: [tuple(decode(['uint256', 'uint160', 'uint32', 'uint256'], d)) for d in quotes],
+            lambda: [decode_quoter_result(d) for d in quotes])
+    compare("uint128",
+            lambda: [decode(['uint128'], d)[0] for d in ambient],
+            lambda: [decode_uint(d) for d in ambient])
+    compare("bid/ask",
+            lambda: [tuple(decode(['uint256', 'uint256'], d)) for d in kuru],
+            lambda: [decode_uint_pair(d) for d in kuru])
+    compare("tryAggregate envelope",
+            lambda: [tuple(r) for r in decode(['(bool,bytes)[]'], envelope)[0]],
+            lambda: decode_try_aggregate(envelope))
+
+    # Full hot loop: envelope + per-result decode, zero-copy slices
+    def old_scan():
+        results = decode(['(bool,bytes)[]'], envelope)[0]
+        return [decode(['uint256', 'uint160', 'uint32', 'uint256'], d)[0] for ok, d in results[:N_QUOTES] if ok]
+
+    def new_scan():
+        results = decode_try_aggregate(envelope, copy=False)
+        return [decode_quoter_result(d)[0] for ok, d in results[:N_QUOTES] if ok]
+
+    compare("scan decode, end to end", old_scan, new_scan)
+
+    # The same hot loop on a real reply (every quoter-sized result decoded, as the adapters do)
+    captured = load_capture()
+    if captured is None:
+        print(f"ℹ️ No captured reply at {CAPTURE_FILE}: run with --capture against a live RPC")
+        return
+
+    def old_captured():
+        results = decode(['(bool,bytes)[]'], captured)[0]
+        return [decode(['uint256', 'uint160', 'uint32', 'uint256'], d)[0] for ok, d in results
+                if ok and len(d) == QUOTER_RESULT_SIZE]
+
+    def new_captured():
+        results = decode_try_aggregate(captured, copy=False)
+        return [decode_quoter_result(d)[0] for ok, d in results if ok and len(d) == QUOTER_RESULT_SIZE]
+
+    print(f"  Captured reply: {len(captured)} bytes, {len(decode_try_aggregate(captured))} results")
+    compare("captured scan reply", old_captured, new_captured)
+
+if __name__ == "__main__":
+    if "--capture" in sys.argv:
+        capture_reply()
+    else:
+        main()
@@ -0,0 +1,56 @@
+import sys
+import os
+import subprocess
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+# Each case runs in a fresh interpreter (imports are cached per process) and reports
+# its own wall time. "import + warm_up" builds everything the module used to build at
+# import time, so it stands in for the old eager startup.
+ROUNDS = 5
+
+CASES = [
+    ("import web3_pricing (lazy)", "import web3_pricing"),
+    ("import + first pure helper", "import web3_pricing; web3_pricing.find_kuru_market(web3_pricing.WMON_ADDR, web3_pricing.USDC_ADDR)"),
+    ("import + warm_up (old eager cost)", "import web3_pricing; web3_pricing.CONTEXT.warm_up()"),
+    ("import web3 (reference)", "import web3"),
+]
+
+TIMER = """
+import time, sys, io, contextlib
+_t0 = time.perf_counter()
+_out = io.StringIO()
+with contextlib.redirect_stdout(_out):
+{body}
+_elapsed = time.perf_counter() - _t0
+print(repr((_elapsed, 'web3' in sys.modules, _out.getvalue())))
+"""
+
+def run_case(statement):
+    code = TIMER.format(body="    " + statement)
+    result = subprocess.run([sys.executable, "-c", code], cwd=BASE_DIR, capture_output=True, text=True, timeout=120)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return eval(result.stdout.strip().splitlines()[-1])
+
+def bench(label, statement):
+    best = float('inf')
+    for _ in range(ROUNDS):
+        elapsed, web3_loaded, output = run_case(statement)
+        best = min(best, elapsed)
+    print(f"  {label:<36} {best * 1000:>9.1f}ms   web3 loaded: {'yes' if web3_loaded else 'no'}")
+    return best, web3_loaded, output
+
+def main():
+    print(f"🚀 Benchmarking startup (fresh interpreter per run, best of {ROUNDS})...")
+    results = {label: bench(label, statement) for label, statement in CASES}
+
+    lazy, lazy_web3, lazy_output = results[CASES[0][0]]
+    eager = results[CASES[2][0]][0]
+    assert not lazy_web3, "importing web3_pricing must not load web3"
+    assert not lazy_output, f"importing web3_pricing must not print (got {lazy_output!r})"
+    print(f"\n  -> import is {eager / lazy:.1f}x faster than the eager startup ({(eager - lazy) * 1000:.0f}ms deferred to first use)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import sys
+import os
+import io
+import random
+import contextlib
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import arbitrage_engine as engine
+from quote_curve import QuoteCurve, geometric_ladder
+from dex_adapters import v2_amount_out
+
+# Synthetic WMON/USDC round trips between two constant-product venues whose prices differ
+# by a random spread. Net profit of the best fixed tier vs the sizing stage (two ladder
+# passes on the curves, as in a scan) vs the exact optimum from a dense search.
+CASES = 20
+SEED = 5
+TOKENS = {"WMON": "0x3bd359C1119dA7Da1D913D1C4D2B7c461115433A", "USDC": "0x754704Bc059F8C67012fEd69BC8A327a5aafb603"}
+DECIMALS = {"WMON": 18, "USDC": 6}
+VENUES = [("Uniswap V3", 3000), ("Kuru (OrderBook)", 0)]
+
+def build_pools(rng):
+    pools = {}
+    for venue in VENUES:
+        usd_depth = rng.uniform(5_000, 500_000)
+        price = engine.PRICE_CACHE["WMON"] * rng.uniform(0.99, 1.01)
+        pools[venue] = (int(usd_depth / price * 10**18), int(usd_depth * 10**6))
+    return pools
+
+def venue_out(pools, venue, token_in, amount_in):
+    reserve_wmon, reserve_usdc = pools[venue]
+    if token_in == "WMON": return v2_amount_out(amount_in, reserve_wmon, reserve_usdc)
+    return v2_amount_out(amount_in, reserve_usdc, reserve_wmon)
+
+def curve_fetcher(pools, calls):
+    def get_quote_curves(edges, steps):
+        calls.append(len(edges))
+        curves = []
+        for edge in edges:
+            points = []
+            for amount in geometric_ladder(edge['minAmount'], edge['maxAmount'], steps):
+                quotes = sorted(({"dex": v[0], "fee": v[1], "venue": f"{v[0]}:{v[1]}",
+                                  "amountOut": venue_out(pools, v, edge['tokenInSymbol'], amount)}
+                                 for v in VENUES), key=lambda q: q['amountOut'], reverse=True)
+                best = dict(quotes[0], all_quotes=quotes)
+                points.append((amount, best['amountOut'], best))
+            curves.append(QuoteCurve(edge['tokenInSymbol'], edge['tokenOutSymbol'], points))
+        return {"curves": curves}
+    return get_quote_curves
+
+def main():
+    rng = random.Random(SEED)
+    _, gas_usd = engine.calculate_net_profit(0, 0, gas_estimate=engine.CYCLE_GAS_PER_HOP * 2)
+    totals = {"tiers": 0.0, "sized": 0.0, "exact": 0.0}
+    calls = []
+    print(f"🚀 Benchmarking trade sizing on {CASES} round trips (tiers {engine.TIERS})...")
+
+    for _ in range(CASES):
+        pools = build_pools(rng)
+        # Buy WMON where it is cheaper, sell it where it is dearer
+        buy, sell = sorted(VENUES, key=lambda v: pools[v][1] / pools[v][0])
+
+        def net(usd):
+            amount = int(usd / engine.PRICE_CACHE["WMON"] * 10**18)
+            out = venue_out(pools, buy, "USDC", venue_out(pools, sell, "WMON", amount))
+            return (out - amount) / 10**18 * engine.PRICE_CACHE["WMON"] - gas_usd
+
+        opp = {"cycle": ["WMON", "USDC"], "venues": [f"{v[0]}:{v[1]}" for v in (sell, buy)], "profit_pct": 1.0, "net_profit_usd": 0.0, "logs": []}
+        engine.get_quote_curves = curve_fetcher(pools, calls)
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine.size_opportunities({"ranking": [opp], "best": {}}, TOKENS, DECIMALS)
+
+        exact = max(net(10 ** (i / 500)) for i in range(0, 2001)) # $1 .. $10k
+        totals["tiers"] += max(0.0, max(net(t) for t in engine.TIERS))
+        totals["sized"] += max(0.0, net(opp['sizing']['size_usd']))
+        totals["exact"] += max(0.0, exact)
+
+    for name, total in totals.items():
+        print(f"  {name:>6}: ${total:>10.4f} net ({total / totals['exact'] * 100:6.2f}% of exact)")
+    print(f"\n  -> {len(calls) / CASES:.0f} bulk passes per scan, {sum(calls) / len(calls):.0f} ladders each")
+    assert totals["sized"] >= 0.98 * totals["exact"], "sizing must land near the optimum"
+
+if __name__ == "__main__":
+    main()
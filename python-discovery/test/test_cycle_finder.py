@@ -0,0 +1,62 @@
+import sys
+import os
+import itertools
+import random
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cycle_finder import find_negative_cycles, canonical_cycle, cycle_rate
+
+def edge_graph(rates):
+    graph = {}
+    for (t_in, t_out), rate in rates.items():
+        graph.setdefault(t_in, {})[t_out] = {"rate": rate}
+    return graph
+
+def brute_force_cycles(graph, max_hops):
+    """
+    Every profitable simple cycle, by trying each ordered token tuple.
+    """
+    found = set()
+    tokens = sorted(graph)
+    for hops in range(2, max_hops + 1):
+        for cycle in itertools.permutations(tokens, hops):
+            if cycle[0] == min(cycle) and cycle_rate(graph, cycle) > 1.0:
+                found.add(canonical_cycle(list(cycle)))
+    return found
+
+def test_best_walk_repeats_a_token():
+    # The cheapest 3-hop walk from S to A is S -> A -> B -> A (A <-> B is itself a
+    # profitable loop), so a "best walk per hop count" search never keeps S -> C -> B -> A
+    # and misses the simple profitable cycle S -> C -> B -> A -> S.
+    graph = edge_graph({
+        ("S", "A"): 0.99, ("A", "S"): 0.99,
+        ("A", "B"): 1.05, ("B", "A"): 1.05,
+        ("S", "C"): 0.99, ("C", "B"): 0.99
+    })
+    cycles = {c["cycle"] for c in find_negative_cycles(graph, sources=["S"], max_cycles=None)}
+    assert cycles == {("A", "S", "C", "B")}, cycles
+
+    everything = {c["cycle"] for c in find_negative_cycles(graph, max_cycles=None)}
+    assert everything == brute_force_cycles(graph, 5), everything
+    print("✅ Simple cycle behind a non-simple best walk is found")
+
+def test_matches_brute_force():
+    rng = random.Random(21)
+    for round_idx in range(30):
+        tokens = [f"T{i}" for i in range(7)]
+        price = {t: rng.uniform(0.1, 10) for t in tokens}
+        rates = {}
+        for a, b in itertools.permutations(tokens, 2):
+            if rng.random() < 0.6:
+                rates[(a, b)] = price[a] / price[b] * rng.uniform(0.985, 1.01)
+        graph = edge_graph(rates)
+        for max_hops in (3, 5):
+            got = {c["cycle"] for c in find_negative_cycles(graph, max_hops=max_hops, max_cycles=None)}
+            expected = brute_force_cycles(graph, max_hops)
+            assert got == expected, (round_idx, max_hops, expected - got, got - expected)
+    print("✅ Every profitable simple cycle found (30 random graphs vs brute force)")
+
+if __name__ == "__main__":
+    test_best_walk_repeats_a_token()
+    test_matches_brute_force()
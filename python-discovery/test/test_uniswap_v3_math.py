@@ -0,0 +1,108 @@
+import sys
+import os
+import random
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from uniswap_v3_math import (
+    MIN_TICK, MAX_TICK, MIN_SQRT_RATIO, MAX_SQRT_RATIO, Q96,
+    get_sqrt_ratio_at_tick, get_tick_at_sqrt_ratio, compute_swap_step,
+    V3PoolState, simulate_exact_input
+)
+
+# Fixed vectors from the Uniswap v3-core TickMath / SwapMath specs
+SQRT_RATIO_VECTORS = {
+    MIN_TICK: MIN_SQRT_RATIO,
+    MIN_TICK + 1: 4295343490,
+    0: Q96,
+    MAX_TICK - 1: 1461373636630004318706518188784493106690254656249,
+    MAX_TICK: MAX_SQRT_RATIO,
+}
+# (sqrtPrice, sqrtPriceTarget, liquidity, amountRemaining, feePips) -> (sqrtNext, amountIn, amountOut, feeAmount)
+SWAP_STEP_VECTORS = [
+    # Exact input capped at the price target, one for zero (target = encodePriceSqrt(101, 100))
+    ((Q96, 79623317895830914510639640423, 2 * 10**18, 10**18, 600),
+     (79623317895830914510639640423, 9975124224178055, 9925619580021728, 5988667735148)),
+    # Exact input fully spent before the target, one for zero (target = encodePriceSqrt(1000, 100))
+    ((Q96, 250541448375047931186413801569, 2 * 10**18, 10**18, 600),
+     (118818475322642227089037862318, 999400000000000000, 666399946655997866, 600000000000000)),
+    # Entire input taken as fee
+    ((2413, 79887613182836312, 1985041575832132834610021537970, 10, 1872),
+     (2413, 0, 0, 10)),
+]
+TICK_SAMPLES = 2000
+SEED = 1
+
+def test_sqrt_ratio_vectors():
+    for tick, ratio in SQRT_RATIO_VECTORS.items():
+        assert get_sqrt_ratio_at_tick(tick) == ratio, (tick, get_sqrt_ratio_at_tick(tick), ratio)
+    assert get_tick_at_sqrt_ratio(MIN_SQRT_RATIO) == MIN_TICK
+    assert get_tick_at_sqrt_ratio(MAX_SQRT_RATIO - 1) == MAX_TICK - 1
+    for bad in (MIN_SQRT_RATIO - 1, MAX_SQRT_RATIO):
+        try:
+            get_tick_at_sqrt_ratio(bad)
+            assert False, f"{bad} should be out of range"
+        except ValueError:
+            pass
+    print("✅ TickMath vectors (MIN_TICK, MAX_TICK, 0, +-1)")
+
+def test_tick_boundaries():
+    # The float estimate must land on the greatest tick whose ratio is <= the price, right at
+    # every boundary: ratio(t) -> t, ratio(t) - 1 -> t - 1, ratio(t + 1) - 1 -> t
+    rng = random.Random(SEED)
+    ticks = set(range(MIN_TICK, MIN_TICK + 50)) | set(range(MAX_TICK - 50, MAX_TICK)) | set(range(-50, 51))
+    ticks |= {rng.randrange(MIN_TICK, MAX_TICK) for _ in range(TICK_SAMPLES)}
+    for tick in sorted(ticks):
+        ratio = get_sqrt_ratio_at_tick(tick)
+        assert get_tick_at_sqrt_ratio(ratio) == tick, tick
+        if tick > MIN_TICK:
+            assert get_tick_at_sqrt_ratio(ratio - 1) == tick - 1, tick
+        if tick < MAX_TICK - 1:
+            assert get_tick_at_sqrt_ratio(get_sqrt_ratio_at_tick(tick + 1) - 1) == tick, tick
+    print(f"✅ get_tick_at_sqrt_ratio exact at {len(ticks)} tick boundaries")
+
+def test_swap_step_vectors():
+    for args, expected in SWAP_STEP_VECTORS:
+        got = compute_swap_step(*args)
+        assert got == expected, (args, got, expected)
+    print("✅ SwapMath.computeSwapStep vectors")
+
+def test_simulate_exact_input():
+    # Two positions around tick 0: [-600, 600) with L and [-6000, 6000) with 4L
+    unit = 10**21
+    liquidity = 5 * unit
+    state = V3PoolState(Q96, 0, liquidity, 3000, ticks={-600: unit, 600: -unit, -6000: 4 * unit, 6000: -4 * unit})
+
+    # Inside one range the swap is a single step
+    small = simulate_exact_input(state, True, 10**18)
+    target = get_sqrt_ratio_at_tick(-600)
+    sqrt_next, amount_in, amount_out, fee = compute_swap_step(Q96, target, liquidity, 10**18, 3000)
+    assert (small["amountOut"], small["sqrtPriceX96After"]) == (amount_out, sqrt_next)
+    assert small["initializedTicksCrossed"] == 0 and amount_in + fee == 10**18
+
+    # Across tick -600: liquidityNet is subtracted going down (zero for one), added going up
+    down = simulate_exact_input(state, True, 10**21)
+    assert down["initializedTicksCrossed"] == 1 and down["liquidityAfter"] == 4 * unit
+    assert down["tickAfter"] < -600 and down["sqrtPriceX96After"] < target
+    up = simulate_exact_input(state, False, 10**21)
+    assert up["initializedTicksCrossed"] == 1 and up["liquidityAfter"] == 4 * unit
+    assert up["tickAfter"] >= 600
+
+    # Splitting a swap never pays out more than doing it at once (rounding favours the pool)
+    first = simulate_exact_input(state, True, 3 * 10**18)
+    moved = state.copy()
+    moved.sqrt_price_x96, moved.tick, moved.liquidity = first["sqrtPriceX96After"], first["tickAfter"], first["liquidityAfter"]
+    second = simulate_exact_input(moved, True, 2 * 10**18)
+    whole = simulate_exact_input(state, True, 5 * 10**18)
+    assert first["amountOut"] + second["amountOut"] <= whole["amountOut"] <= first["amountOut"] + second["amountOut"] + 2
+
+    # Past the cached bitmap words the simulation gives up (caller falls back to the Quoter)
+    bounded = V3PoolState(Q96, 0, unit, 3000, ticks={-600: unit, 600: -unit}, word_range=(-1, 0))
+    assert simulate_exact_input(bounded, True, 10**24) is None
+    print("✅ simulate_exact_input steps, tick crossings and range limits")
+
+if __name__ == "__main__":
+    test_sqrt_ratio_vectors()
+    test_tick_boundaries()
+    test_swap_step_vectors()
+    test_simulate_exact_input()
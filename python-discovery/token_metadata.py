@@ -0,0 +1,216 @@
+import json
+import os
+import threading
+import time
+
+from returndata import WORD, ReturnDataError, word
+
+# ----------------------------------------------------------------------------------
+# TOKEN METADATA STORE
+# symbol/decimals for every token the bot has seen, keyed by lower-case address.
+# Preloaded from the bundled token lists, filled in bulk (symbol() + decimals() for any
+# number of tokens in one Multicall) and saved to disk, so cold starts and new-pool
+# discovery never wait on per-token RPC round trips.
+# Entries expire after METADATA_TTL (re-resolved on the next bulk pass, the stale value
+# is served meanwhile); tokens whose calls failed are retried after MISSING_TTL.
+# ----------------------------------------------------------------------------------
+
+BASE_PATH = os.path.dirname(os.path.abspath(__file__))
+METADATA_PATH = os.path.join(BASE_PATH, "token_metadata.json")
+METADATA_VERSION = 1
+METADATA_TTL = 7 * 24 * 3600   # symbol()/decimals() practically never change; refresh weekly
+MISSING_TTL = 600              # Retry tokens whose metadata calls failed after this long
+
+# Token lists shipped with the repo (Uniswap/token-list layout: a list or {"tokens": [...]})
+TOKEN_LISTS = ("monad_tokens.json", "uniswap_tokens.json")
+CHAIN_IDS = (143,)             # Only entries for these chains (or bridged to them) are used
+
+DEFAULT_METADATA = {"symbol": "UNK", "decimals": 18}
+
+
+def decode_symbol(data):
+    """
+    symbol() return: ABI `string`, or `bytes32` for older tokens (MKR-style). None if neither.
+    """
+    if len(data) >= 2 * WORD and word(data, 0) == WORD:
+        length = word(data, 1)
+        if 2 * WORD + length <= len(data):
+            return bytes(data[2 * WORD:2 * WORD + length]).decode('utf-8', 'replace').strip('\x00').strip()
+    if len(data) == WORD:
+        raw = bytes(data[:WORD]).rstrip(b'\x00')
+        if raw and all(32 <= c < 127 for c in raw):
+            return raw.decode('ascii').strip()
+    return None
+
+
+def decode_decimals(data):
+    """
+    decimals() return (uint8 in one word). None if out of range.
+    """
+    try:
+        value = word(data, 0)
+    except ReturnDataError:
+        return None
+    return value if value <= 255 else None
+
+
+def _list_entries(data):
+    return data.get('tokens', []) if isinstance(data, dict) else data
+
+
+class TokenMetadataStore:
+    """
+    Thread-safe metadata cache. get() never touches the network; callers resolve the
+    missing() addresses in bulk and hand the answers to put() / put_missing().
+    """
+
+    def __init__(self, path=METADATA_PATH, ttl=METADATA_TTL, missing_ttl=MISSING_TTL, chain_ids=CHAIN_IDS):
+        self._lock = threading.Lock()
+        self.path = path
+        self.ttl = ttl
+        self.missing_ttl = missing_ttl
+        self.chain_ids = {int(c) for c in chain_ids}
+        self._tokens = {}    # address -> {"symbol", "decimals", "ts", "source"}
+        self._missing = {}   # address -> unix time of the failed lookup
+        self._dirty = False
+
+    # --- Persistence ---
+
+    def preload(self, files=TOKEN_LISTS):
+        """
+        Adds the bundled token lists (never overrides on-chain answers). Returns tokens added.
+        Entries for other chains are used only through their bridgeInfo address on our chain.
+        """
+        added = 0
+        for name in files:
+            path = name if os.path.isabs(name) else os.path.join(BASE_PATH, name)
+            try:
+                if not os.path.exists(path): continue
+                with open(path, 'r') as f:
+                    data = json.load(f)
+            except Exception as e:
+                print(f"⚠️ Failed to read token list {name}: {e}")
+                continue
+            for t in _list_entries(data):
+                for addr in self._chain_addresses(t):
+                    if self._add_static(addr, t.get('symbol'), t.get('decimals')): added += 1
+        return added
+
+    def _chain_addresses(self, token):
+        chain = token.get('chainId')
+        if chain is None or int(chain) in self.chain_ids:
+            if token.get('address'): yield token['address']
+        bridges = (token.get('extensions') or {}).get('bridgeInfo') or {}
+        for chain_id, info in bridges.items():
+            if not str(chain_id).isdigit() or int(chain_id) not in self.chain_ids: continue
+            if isinstance(info, dict) and info.get('tokenAddress'): yield info['tokenAddress']
+
+    def _add_static(self, address, symbol, decimals):
+        if not symbol or decimals is None: return False
+        addr = address.lower()
+        with self._lock:
+            if addr in self._tokens: return False
+            # Token lists are curated: treat them as fresh for a full TTL from load time
+            self._tokens[addr] = {"symbol": symbol, "decimals": int(decimals), "ts": time.time(), "source": "list"}
+            self._missing.pop(addr, None)
+        return True
+
+    def load(self):
+        try:
+            if not os.path.exists(self.path): return 0
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if data.get("version") != METADATA_VERSION: return 0
+            with self._lock:
+                for addr, meta in data.get("tokens", {}).items():
+                    self._tokens[addr] = meta
+                for addr, ts in data.get("missing", {}).items():
+                    if addr not in self._tokens: self._missing[addr] = ts
+            return len(self._tokens)
+        except Exception as e:
+            print(f"⚠️ Failed to load token metadata: {e}")
+            return 0
+
+    def save(self, force=False):
+        with self._lock:
+            if not (self._dirty or force): return False
+            data = {
+                "version": METADATA_VERSION,
+                "tokens": {a: m for a, m in self._tokens.items() if m.get("source") != "list"},
+                "missing": dict(self._missing)
+            }
+            self._dirty = False
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)  # Atomic: readers never see a half-written file
+            return True
+        except Exception as e:
+            print(f"⚠️ Failed to save token metadata: {e}")
+            with self._lock: self._dirty = True
+            return False
+
+    # --- Updates ---
+
+    def put(self, address, symbol, decimals, source="rpc"):
+        with self._lock:
+            addr = address.lower()
+            self._tokens[addr] = {"symbol": symbol, "decimals": int(decimals), "ts": time.time(), "source": source}
+            self._missing.pop(addr, None)
+            self._dirty = True
+
+    def put_missing(self, address):
+        """
+        Records a failed lookup (not an ERC20, or the RPC errored). Known tokens keep their old value.
+        """
+        with self._lock:
+            addr = address.lower()
+            if addr in self._tokens:
+                self._tokens[addr]["ts"] = time.time() - self.ttl + self.missing_ttl  # Retry later, keep serving
+            else:
+                self._missing[addr] = time.time()
+            self._dirty = True
+
+    # --- Queries ---
+
+    def get(self, address):
+        """
+        {"symbol", "decimals"} or None. Stale entries are still returned.
+        """
+        if not address: return None
+        with self._lock:
+            meta = self._tokens.get(address.lower())
+        return {"symbol": meta["symbol"], "decimals": meta["decimals"]} if meta else None
+
+    def __contains__(self, address):
+        return bool(address) and address.lower() in self._tokens
+
+    def __len__(self):
+        return len(self._tokens)
+
+    def missing(self, addresses, include_stale=True):
+        """
+        Distinct lower-case addresses that need a lookup: unknown ones (unless a recent lookup
+        failed) and, with include_stale, entries older than the TTL.
+        """
+        now = time.time()
+        out = []
+        seen = set()
+        with self._lock:
+            for address in addresses:
+                if not address: continue
+                addr = address.lower()
+                if addr in seen: continue
+                seen.add(addr)
+                meta = self._tokens.get(addr)
+                if meta is None:
+                    if now - self._missing.get(addr, 0) > self.missing_ttl: out.append(addr)
+                elif include_stale and now - meta.get("ts", 0) > self.ttl:
+                    out.append(addr)
+        return out
+
+    def stats(self):
+        with self._lock:
+            lists = sum(1 for m in self._tokens.values() if m.get("source") == "list")
+            return {"tokens": len(self._tokens), "from_lists": lists, "missing": len(self._missing)}
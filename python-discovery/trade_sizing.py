@@ -0,0 +1,134 @@
+import math
+
+from quote_curve import QuoteCurve
+
+# ----------------------------------------------------------------------------------
+# TRADE SIZING
+# The scan prices a cycle at a few fixed tier sizes; its best size is usually between
+# them or far above them. Every leg of a candidate cycle is quoted once along a size
+# ladder (quote_curve.py, all candidates in the same bulk pass), the legs are chained
+# locally and net profit (output - input - gas) is maximized over the input size:
+#   1. a coarse pass over the first leg's ladder brackets the best sampled size,
+#   2. a golden-section search on log(size) refines it inside that bracket.
+# Chained concave AMM / order-book curves make net profit unimodal in the size, so the
+# bracket holds the optimum. Linear interpolation pulls the answer towards the ladder
+# points, so a second ladder pass over each leg's range inside the bracket (leg_ranges)
+# is searched again: two bulk passes per scan, whatever the number of candidates.
+# ----------------------------------------------------------------------------------
+
+SIZING_STEPS = 12          # Ladder points per leg
+SIZING_TOLERANCE = 0.001   # Search stops once the bracket is this narrow (relative size)
+SIZING_MAX_ITER = 60       # Golden-section iterations cap
+SIZING_MARGIN = 1.05       # Refinement ladders reach this far past the chained bracket
+
+_INV_PHI = (math.sqrt(5) - 1) / 2
+
+
+def quote_venue(quote):
+    """
+    Venue id of a bulk quote (graph_matrix.venue_key, with the defaults the tier graphs use).
+    """
+    return quote.get('venue') or f"{quote.get('dex', 'Unknown')}:{quote.get('fee', 3000)}"
+
+
+def venue_curve(curve, venue):
+    """
+    The part of a QuoteCurve quoted by one venue (venue id), rebuilt from the ranked
+    all_quotes of every point. Empty if the venue never quoted the edge.
+    """
+    points = []
+    for amount_in, _, quote in curve.points:
+        for candidate in (quote or {}).get('all_quotes') or [quote or {}]:
+            if quote_venue(candidate) == venue:
+                points.append((amount_in, candidate['amountOut'], candidate))
+                break
+    return QuoteCurve(curve.token_in, curve.token_out, points, curve.block)
+
+
+def chain_amount_out(curves, amount_in):
+    """
+    Output of trading amount_in through every leg in order (raw units of each leg).
+    Returns (amount_out, extrapolated): extrapolated is set when a leg ran past its ladder.
+    """
+    amount = amount_in
+    extrapolated = False
+    for curve in curves:
+        if amount > curve.max_amount: extrapolated = True
+        amount = curve.amount_out(amount)
+        if amount <= 0: return 0, extrapolated
+    return amount, extrapolated
+
+
+def golden_section_max(f, lo, hi, tol=SIZING_TOLERANCE, max_iter=SIZING_MAX_ITER):
+    """
+    Maximizer of a unimodal f on [lo, hi]. Returns (x, f(x)); one new evaluation per step.
+    """
+    a, b = lo, hi
+    c = b - _INV_PHI * (b - a)
+    d = a + _INV_PHI * (b - a)
+    fc, fd = f(c), f(d)
+    for _ in range(max_iter):
+        if b - a <= tol: break
+        if fc >= fd:
+            b, d, fd = d, c, fc
+            c = b - _INV_PHI * (b - a)
+            fc = f(c)
+        else:
+            a, c, fc = c, d, fd
+            d = a + _INV_PHI * (b - a)
+            fd = f(d)
+    return (c, fc) if fc >= fd else (d, fd)
+
+
+def optimal_size(curves, usd_per_unit, gas_usd, min_amount=None, max_amount=None):
+    """
+    Input size (raw units of the first leg's token) with the best net profit for a cycle.
+    usd_per_unit: USD value of one raw unit of the start token; gas_usd: cost of the trade.
+    The search runs on [min_amount, max_amount] (default: the first leg's ladder).
+    Returns {"amountIn", "amountOut", "size_usd", "gross_profit_usd", "net_profit_usd",
+    "profit_pct", "extrapolated", "bracket": [left, right]} or None if a leg has no curve.
+    """
+    if not curves or not all(curves): return None
+    lo = max(int(min_amount or curves[0].min_amount), 1)
+    hi = max(int(max_amount or curves[0].max_amount), lo)
+
+    def net(amount_in):
+        amount_out, _ = chain_amount_out(curves, amount_in)
+        return (amount_out - amount_in) * usd_per_unit - gas_usd
+
+    # 1. Coarse pass: the sampled sizes inside the range bracket the optimum
+    grid = sorted({lo, hi} | {x for x, _, _ in curves[0].points if lo < x < hi})
+    values = [net(x) for x in grid]
+    best = max(range(len(grid)), key=lambda i: values[i])
+    amount_in = grid[best]
+
+    # 2. Golden-section refinement on log(size) between the neighbouring samples
+    left, right = grid[max(best - 1, 0)], grid[min(best + 1, len(grid) - 1)]
+    if right > left:
+        log_x, value = golden_section_max(lambda y: net(int(math.exp(y))), math.log(left), math.log(right))
+        if value > values[best]: amount_in = int(math.exp(log_x))
+
+    amount_out, extrapolated = chain_amount_out(curves, amount_in)
+    gross = (amount_out - amount_in) * usd_per_unit
+    return {
+        "amountIn": amount_in,
+        "amountOut": amount_out,
+        "size_usd": amount_in * usd_per_unit,
+        "gross_profit_usd": gross,
+        "net_profit_usd": gross - gas_usd,
+        "profit_pct": (amount_out / amount_in - 1) * 100 if amount_in else 0.0,
+        "extrapolated": extrapolated,
+        "bracket": [left, right]
+    }
+
+
+def leg_ranges(curves, lo, hi, margin=SIZING_MARGIN):
+    """
+    Input range (raw units) of every leg when the cycle is entered with lo..hi, chained
+    through the curves and widened by margin: the ladders of the refinement pass.
+    """
+    ranges = []
+    for curve in curves:
+        ranges.append((max(int(lo / margin), 1), max(int(hi * margin), 1)))
+        lo, hi = curve.amount_out(lo), curve.amount_out(hi)
+    return ranges
@@ -0,0 +1,344 @@
+import math
+from bisect import bisect_left, bisect_right
+
+# ----------------------------------------------------------------------------------
+# UNISWAP V3 SWAP MATH (Pure Python port of v3-core TickMath / SqrtPriceMath / SwapMath)
+# Lets us reproduce QuoterV2.quoteExactInputSingle locally from cached pool state.
+# ----------------------------------------------------------------------------------
+
+Q96 = 1 << 96
+MAX_UINT160 = (1 << 160) - 1
+MAX_UINT256 = (1 << 256) - 1
+
+MIN_TICK = -887272
+MAX_TICK = 887272
+MIN_SQRT_RATIO = 4295128739
+MAX_SQRT_RATIO = 1461446703485210103287273052203988822378723970342
+
+FEE_DENOMINATOR = 1000000
+
+# Default tick spacing per fee tier (Uniswap V3 factory defaults)
+TICK_SPACINGS = {100: 1, 500: 10, 3000: 60, 10000: 200}
+
+
+def mul_div(a, b, denominator):
+    return (a * b) // denominator
+
+
+def mul_div_rounding_up(a, b, denominator):
+    result, remainder = divmod(a * b, denominator)
+    if remainder > 0:
+        result += 1
+    return result
+
+
+def div_rounding_up(a, b):
+    result, remainder = divmod(a, b)
+    if remainder > 0:
+        result += 1
+    return result
+
+
+# --- TickMath ---
+
+def get_sqrt_ratio_at_tick(tick):
+    """
+    Returns sqrt(1.0001^tick) * 2^96 exactly as TickMath.getSqrtRatioAtTick does.
+    """
+    abs_tick = -tick if tick < 0 else tick
+    if abs_tick > MAX_TICK:
+        raise ValueError(f"Tick out of range: {tick}")
+
+    ratio = 0xfffcb933bd6fad37aa2d162d1a594001 if abs_tick & 0x1 else 0x100000000000000000000000000000000
+    if abs_tick & 0x2: ratio = (ratio * 0xfff97272373d413259a46990580e213a) >> 128
+    if abs_tick & 0x4: ratio = (ratio * 0xfff2e50f5f656932ef12357cf3c7fdcc) >> 128
+    if abs_tick & 0x8: ratio = (ratio * 0xffe5caca7e10e4e61c3624eaa0941cd0) >> 128
+    if abs_tick & 0x10: ratio = (ratio * 0xffcb9843d60f6159c9db58835c926644) >> 128
+    if abs_tick & 0x20: ratio = (ratio * 0xff973b41fa98c081472e6896dfb254c0) >> 128
+    if abs_tick & 0x40: ratio = (ratio * 0xff2ea16466c96a3843ec78b326b52861) >> 128
+    if abs_tick & 0x80: ratio = (ratio * 0xfe5dee046a99a2a811c461f1969c3053) >> 128
+    if abs_tick & 0x100: ratio = (ratio * 0xfcbe86c7900a88aedcffc83b479aa3a4) >> 128
+    if abs_tick & 0x200: ratio = (ratio * 0xf987a7253ac413176f2b074cf7815e54) >> 128
+    if abs_tick & 0x400: ratio = (ratio * 0xf3392b0822b70005940c7a398e4b70f3) >> 128
+    if abs_tick & 0x800: ratio = (ratio * 0xe7159475a2c29b7443b29c7fa6e889d9) >> 128
+    if abs_tick & 0x1000: ratio = (ratio * 0xd097f3bdfd2022b8845ad8f792aa5825) >> 128
+    if abs_tick & 0x2000: ratio = (ratio * 0xa9f746462d870fdf8a65dc1f90e061e5) >> 128
+    if abs_tick & 0x4000: ratio = (ratio * 0x70d869a156d2a1b890bb3df62baf32f7) >> 128
+    if abs_tick & 0x8000: ratio = (ratio * 0x31be135f97d08fd981231505542fcfa6) >> 128
+    if abs_tick & 0x10000: ratio = (ratio * 0x9aa508b5b7a84e1c677de54f3e99bc9) >> 128
+    if abs_tick & 0x20000: ratio = (ratio * 0x5d6af8dedb81196699c329225ee604) >> 128
+    if abs_tick & 0x40000: ratio = (ratio * 0x2216e584f5fa1ea926041bedfe98) >> 128
+    if abs_tick & 0x80000: ratio = (ratio * 0x48a170391f7dc42444e8fa2) >> 128
+
+    if tick > 0:
+        ratio = MAX_UINT256 // ratio
+
+    # Q128.128 -> Q64.96, rounding up
+    return (ratio >> 32) + (0 if ratio % (1 << 32) == 0 else 1)
+
+
+def get_tick_at_sqrt_ratio(sqrt_price_x96):
+    """
+    Returns the greatest tick whose sqrt ratio is <= sqrt_price_x96.
+    Uses a float estimate and corrects it against get_sqrt_ratio_at_tick.
+    """
+    if sqrt_price_x96 < MIN_SQRT_RATIO or sqrt_price_x96 >= MAX_SQRT_RATIO:
+        raise ValueError(f"Sqrt price out of range: {sqrt_price_x96}")
+
+    price = (sqrt_price_x96 / Q96) ** 2
+    tick = int(math.floor(math.log(price) / math.log(1.0001)))
+    tick = max(MIN_TICK, min(MAX_TICK - 1, tick))
+
+    while tick > MIN_TICK and get_sqrt_ratio_at_tick(tick) > sqrt_price_x96:
+        tick -= 1
+    while tick < MAX_TICK - 1 and get_sqrt_ratio_at_tick(tick + 1) <= sqrt_price_x96:
+        tick += 1
+    return tick
+
+
+# --- SqrtPriceMath ---
+
+def get_next_sqrt_price_from_amount0_rounding_up(sqrt_price_x96, liquidity, amount, add):
+    if amount == 0:
+        return sqrt_price_x96
+    numerator1 = liquidity << 96
+
+    if add:
+        product = amount * sqrt_price_x96
+        # Mirror the uint256 overflow branch so rounding matches the contract
+        if product <= MAX_UINT256 and numerator1 + product <= MAX_UINT256:
+            denominator = numerator1 + product
+            return mul_div_rounding_up(numerator1, sqrt_price_x96, denominator)
+        return div_rounding_up(numerator1, numerator1 // sqrt_price_x96 + amount)
+
+    product = amount * sqrt_price_x96
+    if product > MAX_UINT256 or numerator1 <= product:
+        raise ValueError("Insufficient liquidity for amount0 output")
+    return mul_div_rounding_up(numerator1, sqrt_price_x96, numerator1 - product)
+
+
+def get_next_sqrt_price_from_amount1_rounding_down(sqrt_price_x96, liquidity, amount, add):
+    if add:
+        quotient = (amount << 96) // liquidity
+        result = sqrt_price_x96 + quotient
+        if result > MAX_UINT160:
+            raise ValueError("Sqrt price overflow")
+        return result
+
+    quotient = div_rounding_up(amount << 96, liquidity)
+    if sqrt_price_x96 <= quotient:
+        raise ValueError("Insufficient liquidity for amount1 output")
+    return sqrt_price_x96 - quotient
+
+
+def get_next_sqrt_price_from_input(sqrt_price_x96, liquidity, amount_in, zero_for_one):
+    if zero_for_one:
+        return get_next_sqrt_price_from_amount0_rounding_up(sqrt_price_x96, liquidity, amount_in, True)
+    return get_next_sqrt_price_from_amount1_rounding_down(sqrt_price_x96, liquidity, amount_in, True)
+
+
+def get_amount0_delta(sqrt_a, sqrt_b, liquidity, round_up):
+    if sqrt_a > sqrt_b:
+        sqrt_a, sqrt_b = sqrt_b, sqrt_a
+    numerator1 = liquidity << 96
+    numerator2 = sqrt_b - sqrt_a
+    if round_up:
+        return div_rounding_up(mul_div_rounding_up(numerator1, numerator2, sqrt_b), sqrt_a)
+    return mul_div(numerator1, numerator2, sqrt_b) // sqrt_a
+
+
+def get_amount1_delta(sqrt_a, sqrt_b, liquidity, round_up):
+    if sqrt_a > sqrt_b:
+        sqrt_a, sqrt_b = sqrt_b, sqrt_a
+    if round_up:
+        return mul_div_rounding_up(liquidity, sqrt_b - sqrt_a, Q96)
+    return mul_div(liquidity, sqrt_b - sqrt_a, Q96)
+
+
+# --- SwapMath ---
+
+def compute_swap_step(sqrt_current, sqrt_target, liquidity, amount_remaining, fee_pips):
+    """
+    Exact-input branch of SwapMath.computeSwapStep.
+    Returns (sqrt_next, amount_in, amount_out, fee_amount).
+    """
+    zero_for_one = sqrt_current >= sqrt_target
+
+    amount_remaining_less_fee = mul_div(amount_remaining, FEE_DENOMINATOR - fee_pips, FEE_DENOMINATOR)
+    if zero_for_one:
+        amount_in = get_amount0_delta(sqrt_target, sqrt_current, liquidity, True)
+    else:
+        amount_in = get_amount1_delta(sqrt_current, sqrt_target, liquidity, True)
+
+    if amount_remaining_less_fee >= amount_in:
+        sqrt_next = sqrt_target
+    else:
+        sqrt_next = get_next_sqrt_price_from_input(sqrt_current, liquidity, amount_remaining_less_fee, zero_for_one)
+
+    reached_target = sqrt_next == sqrt_target
+
+    if zero_for_one:
+        if not reached_target:
+            amount_in = get_amount0_delta(sqrt_next, sqrt_current, liquidity, True)
+        amount_out = get_amount1_delta(sqrt_next, sqrt_current, liquidity, False)
+    else:
+        if not reached_target:
+            amount_in = get_amount1_delta(sqrt_current, sqrt_next, liquidity, True)
+        amount_out = get_amount0_delta(sqrt_current, sqrt_next, liquidity, False)
+
+    if not reached_target:
+        fee_amount = amount_remaining - amount_in
+    else:
+        fee_amount = mul_div_rounding_up(amount_in, fee_pips, FEE_DENOMINATOR - fee_pips)
+
+    return sqrt_next, amount_in, amount_out, fee_amount
+
+
+# ----------------------------------------------------------------------------------
+# POOL STATE + SWAP SIMULATION
+# ----------------------------------------------------------------------------------
+
+class TickRangeExceeded(Exception):
+    """Raised when a swap walks past the tick bitmap words we have cached."""
+
+
+class V3PoolState:
+    """
+    Snapshot of a Uniswap V3 pool: slot0, active liquidity and liquidityNet
+    for every initialized tick inside the cached bitmap word range.
+    """
+
+    def __init__(self, sqrt_price_x96, tick, liquidity, fee, tick_spacing=None,
+                 ticks=None, word_range=None, token0=None, token1=None):
+        self.sqrt_price_x96 = sqrt_price_x96
+        self.tick = tick
+        self.liquidity = liquidity
+        self.fee = fee
+        self.tick_spacing = tick_spacing or TICK_SPACINGS.get(fee, 60)
+        self.token0 = token0
+        self.token1 = token1
+        # tick -> liquidityNet (only initialized ticks)
+        self.ticks = dict(ticks or {})
+        # Inclusive (min_word, max_word) of bitmap words we know about. None = unbounded.
+        self.word_range = word_range
+        self._sorted_compressed = None
+
+    def copy(self):
+        return V3PoolState(
+            self.sqrt_price_x96, self.tick, self.liquidity, self.fee, self.tick_spacing,
+            ticks=self.ticks, word_range=self.word_range, token0=self.token0, token1=self.token1
+        )
+
+    def set_tick_liquidity_net(self, tick, liquidity_net):
+        if liquidity_net == 0:
+            self.ticks.pop(tick, None)
+        else:
+            self.ticks[tick] = liquidity_net
+        self._sorted_compressed = None
+
+    def _compressed_ticks(self):
+        if self._sorted_compressed is None:
+            self._sorted_compressed = sorted(t // self.tick_spacing for t in self.ticks)
+        return self._sorted_compressed
+
+    def _check_word(self, word_pos):
+        if self.word_range is None: return
+        if word_pos < self.word_range[0] or word_pos > self.word_range[1]:
+            raise TickRangeExceeded(f"Bitmap word {word_pos} outside cached range {self.word_range}")
+
+    def next_initialized_tick_within_one_word(self, tick, lte):
+        """
+        Same contract as TickBitmap.nextInitializedTickWithinOneWord, backed by a sorted tick list.
+        Returns (next_tick, initialized).
+        """
+        spacing = self.tick_spacing
+        compressed = tick // spacing  # Python floors toward -inf, matching the bitmap rounding
+        sorted_ticks = self._compressed_ticks()
+
+        if lte:
+            word_pos = compressed >> 8
+            self._check_word(word_pos)
+            word_start = word_pos << 8
+            idx = bisect_right(sorted_ticks, compressed) - 1
+            if idx >= 0 and sorted_ticks[idx] >= word_start:
+                return sorted_ticks[idx] * spacing, True
+            return word_start * spacing, False
+
+        compressed += 1
+        word_pos = compressed >> 8
+        self._check_word(word_pos)
+        word_end = (word_pos << 8) + 255
+        idx = bisect_left(sorted_ticks, compressed)
+        if idx < len(sorted_ticks) and sorted_ticks[idx] <= word_end:
+            return sorted_ticks[idx] * spacing, True
+        return word_end * spacing, False
+
+
+def simulate_exact_input(state, zero_for_one, amount_in, sqrt_price_limit_x96=0):
+    """
+    Simulates UniswapV3Pool.swap for an exact input amount without mutating `state`.
+    Returns dict(amountOut, sqrtPriceX96After, initializedTicksCrossed, tickAfter, liquidityAfter)
+    or None when the swap leaves the cached tick range (caller should fall back to the Quoter).
+    """
+    if amount_in <= 0 or state.liquidity is None:
+        return None
+
+    if sqrt_price_limit_x96 == 0:
+        sqrt_price_limit_x96 = MIN_SQRT_RATIO + 1 if zero_for_one else MAX_SQRT_RATIO - 1
+
+    sqrt_price = state.sqrt_price_x96
+    tick = state.tick
+    liquidity = state.liquidity
+    remaining = amount_in
+    amount_out = 0
+    ticks_crossed = 0
+
+    try:
+        while remaining != 0 and sqrt_price != sqrt_price_limit_x96:
+            sqrt_start = sqrt_price
+            tick_next, initialized = state.next_initialized_tick_within_one_word(tick, zero_for_one)
+            tick_next = max(MIN_TICK, min(MAX_TICK, tick_next))
+            sqrt_next = get_sqrt_ratio_at_tick(tick_next)
+
+            if zero_for_one:
+                target = sqrt_price_limit_x96 if sqrt_next < sqrt_price_limit_x96 else sqrt_next
+            else:
+                target = sqrt_price_limit_x96 if sqrt_next > sqrt_price_limit_x96 else sqrt_next
+
+            sqrt_price, step_in, step_out, step_fee = compute_swap_step(
+                sqrt_price, target, liquidity, remaining, state.fee
+            )
+            remaining -= step_in + step_fee
+            amount_out += step_out
+
+            if sqrt_price == sqrt_next:
+                if initialized:
+                    liquidity_net = state.ticks.get(tick_next, 0)
+                    if zero_for_one: liquidity_net = -liquidity_net
+                    liquidity += liquidity_net
+                    ticks_crossed += 1
+                    if liquidity < 0:
+                        return None  # Inconsistent cached state
+                tick = tick_next - 1 if zero_for_one else tick_next
+            elif sqrt_price != sqrt_start:
+                tick = get_tick_at_sqrt_ratio(sqrt_price)
+    except (TickRangeExceeded, ValueError, ZeroDivisionError):
+        return None
+
+    return {
+        "amountOut": amount_out,
+        "sqrtPriceX96After": sqrt_price,
+        "initializedTicksCrossed": ticks_crossed,
+        "tickAfter": tick,
+        "liquidityAfter": liquidity,
+        "amountInUnused": remaining
+    }
+
+
+def quote_exact_input_single(state, token_in, token_out, amount_in):
+    """
+    Local equivalent of QuoterV2.quoteExactInputSingle(tokenIn, tokenOut, amountIn, fee, 0).
+    Returns the simulation dict or None if it cannot be priced exactly from `state`.
+    """
+    zero_for_one = int(token_in, 16) < int(token_out, 16)
+    return simulate_exact_input(state, zero_for_one, int(amount_in))
@@ -1,37 +1,75 @@
-from web3 import Web3
 import json
 import time
 import datetime
+import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from uniswap_v3_math import V3PoolState, quote_exact_input_single
+from pool_state import POOL_STATE_STORE
+from chunk_planner import ChunkPlanner, fetch_with_split
+from rpc_batch import RpcBatch, RpcError
+from rpc_router import RpcRouter
+from eth_utils import to_checksum_address, keccak
+from pool_index import PoolIndex, POOL_CREATED_TOPIC
+from quote_cache import QuoteCache, HeadBlock
+from kuru_registry import KuruRegistry, REGISTRY_PATH as KURU_REGISTRY_PATH
+from dex_adapters import (
+    BulkPlan, DexAdapter, V3QuoterAdapter, AmbientAdapter,
+    register_adapter, get_adapters, adapter_for_kind, DEX_ADAPTERS
+)
+from kuru_book import KuruBook, parse_l2_book, decode_market_params, get_market_params, set_market_params
+from quote_curve import CURVE_STEPS, expand_ladder_requests, curves_from_snapshot
+from token_metadata import TokenMetadataStore, decode_symbol, decode_decimals, DEFAULT_METADATA
+from returndata import (
+    decode_try_aggregate, decode_quoter_result, decode_uint, decode_uint_pair,
+    decode_address, decode_words, word as read_word, ReturnDataError
+)
+from calldata import (
+    encode_quote_exact_input_single, encode_try_aggregate,
+    FACTORY_GET_POOL, MULTICALL_GET_BLOCK_NUMBER,
+    POOL_SLOT0, POOL_LIQUIDITY, POOL_TICK_SPACING, POOL_TICK_BITMAP, POOL_TICKS,
+    KURU_BEST_BID_ASK, KURU_GET_L2_BOOK, KURU_GET_MARKET_PARAMS, ERC20_SYMBOL, ERC20_DECIMALS,
+    ERC20_BALANCE_OF, MULTICALL_GET_ETH_BALANCE
+)
 
-# RPC Configuration
 # RPC Configuration
 # Toggle this to False when deploying to production
 USE_LOCAL_FORK = True 
 
 if USE_LOCAL_FORK:
     RPC_URL = "http://127.0.0.1:8545"
+    RPC_URLS = [RPC_URL]
 else:
     RPC_URL = "https://rpc.monad.xyz"
+    # Endpoint pool (see test/benchmark_rpcs.py); requests go to the fastest healthy one
+    RPC_URLS = [
+        RPC_URL,
+        "https://rpc-mainnet.monadinfra.com",
+        "https://monad-mainnet.drpc.org",
+        "https://monad-mainnet.api.onfinality.io/public"
+    ]
+
+# The sentinel subscribes to mainnet; its log block numbers only mean something to the
+# pricing RPC when that is mainnet too (a local fork numbers its own blocks)
+HEAD_FROM_SENTINEL = not USE_LOCAL_FORK
 
-w3 = Web3(Web3.HTTPProvider(RPC_URL, request_kwargs={'timeout': 10}))
+RPC_HEDGE_METHODS = () # web3 methods sent hedged (e.g. ("eth_call",)); scans hedge via RPC_HEDGE_SCANS
+RPC_HEDGE_SCANS = True # Hedge the scan's JSON-RPC batch onto a second endpoint after the first one's p90
+
+RPC_ROUTER = RpcRouter(RPC_URLS, timeout=10) # No connection is made until the first request
 
 if USE_LOCAL_FORK:
     # Mock Environment (from deployedContracts.ts)
-    UNISWAP_V3_QUOTER_ADDRESS = w3.to_checksum_address("0xe7f1725E7734CE288F8367e1Bb143E90bb3F0512") # MockDEX
+    UNISWAP_V3_QUOTER_ADDRESS = to_checksum_address("0xe7f1725E7734CE288F8367e1Bb143E90bb3F0512") # MockDEX
     USDC_ADDR = "0x9fE46736679d2D9a65F0992F2272dE9f3c7fa6e0"
     WMON_ADDR = "0x3bd359C1119dA7Da1D913D1C4D2B7c461115433A"
-    print(f"🔌 Connected to Local Fork: {RPC_URL}")
-    print(f"🛠️ Using Mock Environment: Quoter={UNISWAP_V3_QUOTER_ADDRESS}, USDC={USDC_ADDR}")
 else:
-    UNISWAP_V3_QUOTER_ADDRESS = w3.to_checksum_address("0x661E93cca42AfacB172121EF892830cA3b70F08d") # Mainnet Quoter
+    UNISWAP_V3_QUOTER_ADDRESS = to_checksum_address("0x661E93cca42AfacB172121EF892830cA3b70F08d") # Mainnet Quoter
     USDC_ADDR = "0x754704Bc059F8C67012fEd69BC8A327a5aafb603"
     WMON_ADDR = "0x3bd359C1119dA7Da1D913D1C4D2B7c461115433A"
-    print(f"🌍 Connected to Monad Mainnet: {RPC_URL}")
 
 # Other Contract Addresses
-AMBIENT_QUERY_ADDRESS = w3.to_checksum_address("0xCA00926b6190c2C59336E73F02569c356d7B6b56")
-PANCAKESWAP_V3_QUOTER_ADDRESS = w3.to_checksum_address("0xB048Bbc1Ee6b733FFfCFb9e9CeF7375518e25997") 
+AMBIENT_QUERY_ADDRESS = to_checksum_address("0xCA00926b6190c2C59336E73F02569c356d7B6b56")
+PANCAKESWAP_V3_QUOTER_ADDRESS = to_checksum_address("0xB048Bbc1Ee6b733FFfCFb9e9CeF7375518e25997") 
 
 # Common Constants
 CHOG_ADDR = "0x350035555e10d9afaf1566aaebfced5ba6c27777"
@@ -126,138 +164,165 @@ KURU_ABI = [
     }
 ]
 
-# Initialize Contracts
-uniswap_quoter = w3.eth.contract(address=UNISWAP_V3_QUOTER_ADDRESS, abi=QUOTER_ABI)
-pancake_quoter = w3.eth.contract(address=PANCAKESWAP_V3_QUOTER_ADDRESS, abi=QUOTER_ABI)
-ambient_query = w3.eth.contract(address=AMBIENT_QUERY_ADDRESS, abi=AMBIENT_ABI)
+# Kuru Router (registers markets; see test/probe_kuru_factory.py)
+KURU_ROUTER_ADDRESS = to_checksum_address("0x1f5A250c4A506DA4cE584173c6ed1890B1bf7187")
 
-def get_kuru_quote(token_in, token_out, amount_in, decimals_in, decimals_out):
+def find_kuru_market(token_a, token_b):
     """
-    Fetch Kuru price using bestBidAsk.
+    Returns the Kuru market address for a token pair (either order), or None.
     """
-    print(f"DEBUG: Entering get_kuru_quote In={token_in} Out={token_out}")
-    try:
-        # Resolve Market
-        # Normalize to lower for map lookup
-        t_in_lower = token_in.lower()
-        t_out_lower = token_out.lower()
+    return CONTEXT.kuru_registry.market_for(token_a, token_b)
+
+def kuru_amount_out(token_in, token_out, amount_in, decimals_in, decimals_out, bid_raw, ask_raw):
+    """
+    Converts a Kuru bestBidAsk into an output amount (No RPC; shared by the sync and async paths).
+    """
+    # Base/Quote comes from the registry (decided once per market, not per call)
+    is_token_in_base = CONTEXT.kuru_registry.sells_base(token_in, token_out)
+    
+    if is_token_in_base:
+        # Selling Base -> User hits Bid
+        if bid_raw == 0: return 0
         
-        # Determine Market Address
-        market_addr = None
-        target_pair = frozenset([t_in_lower, t_out_lower])
+        # price = bid / 1e18
+        # amount_out = amount_in * price
+        price_factor = bid_raw / 10**18
         
-        for k, v in KURU_MARKETS.items():
-             # Convert key elements to lower
-             k_lower = frozenset([x.lower() for x in k])
-             if k_lower == target_pair:
-                 market_addr = v
-                 break
+        # Adjustment for decimals:
+        # Price is typically "Quote per Base" scaled by 1e18
+        # Out = In * Price
+        # Raw Out = (Raw In / 10^InDec) * (Price) * 10^OutDec
+        # Raw Out = Raw In * (bid/1e18) * 10^(OutDec - InDec)
         
-        if not market_addr: 
-            # print("DEBUG: Kuru Market Addr Lookup Failed")
-            return 0
+        factor = 10**(decimals_out - decimals_in)
+        amount_out = amount_in * price_factor * factor
+        return int(amount_out)
         
-        # Use the local w3 instance (Fork) for Kuru quotes
-        market_contract = w3.eth.contract(address=w3.to_checksum_address(market_addr), abi=KURU_ABI)
+    else:
+        # Buying Base -> User hits Ask
+        # Input is Quote. Output is Base.
+        if ask_raw == 0: return 0
         
-        print(f"DEBUG: Calling bestBidAsk for {market_addr}...")
-        t_start = time.time()
-        res = market_contract.functions.bestBidAsk().call()
-        print(f"DEBUG: bestBidAsk took {time.time() - t_start:.4f}s")
-        bid_raw, ask_raw = res # bid (MM buys), ask (MM sells)
-        print(f"DEBUG: Kuru Market={market_addr} Bid={bid_raw} Ask={ask_raw}")
-        # print(f"DEBUG: In={t_in_lower} Out={t_out_lower} IsInBase={is_token_in_base} Key={target_pair}")
+        # price = ask / 1e18
+        # Out = In / price
+        price_factor = ask_raw / 10**18
         
-        # Determine Base/Quote Assumption
-        # WMON/USDC -> WMON is BASE.
-        # CHOG/MON -> CHOG is BASE.
-        # AUSD/USDC -> AUSD is BASE.
-        # shMON/MON -> shMON is BASE.
+        factor = 10**(decimals_out - decimals_in)
+        amount_out = (amount_in / price_factor) * factor
         
-        # Known Quote Tokens (usually Numeraire)
-        # If one is Quote, other is Base.
-        # Hierarchy: USDC > MON > Others
+        # SANITY CHECK: If rate > 1000 (1000x profit), assume dust/error
+        # This prevents dust orders (e.g. ask=1wei) from creating fake arbitrage
+        if amount_in > 0:
+            implied_rate = amount_out / amount_in
+            if implied_rate > 1000:
+               # print(f"DEBUG: Ignored absurd Kuru rate {implied_rate:.2f} for {token_in}->{token_out}")
+               return 0
         
-        USDC_LOWER = USDC_ADDR.lower()
-        WMON_LOWER = WMON_ADDR.lower() # MON
-        
-        is_token_in_base = False
+        return int(amount_out)
+
+# ----------------------------------------------------------------------------------
+# KURU DEPTH (L2 book walk; see kuru_book.py)
+# ----------------------------------------------------------------------------------
+
+KURU_DEPTH = True # Price Kuru from the full L2 book (False: top-of-book bestBidAsk)
+KURU_NO_DEPTH = set() # Markets whose getL2Book reverted -> bestBidAsk fallback
+
+def kuru_market_calls(market, fallback=False):
+    """
+    [(kind, callData)] needed to price a Kuru market at one block: getL2Book (+ getMarketParams
+    the first time a market is seen) when depth is on, else bestBidAsk.
+    fallback=True also reads bestBidAsk next to the L2 book, for when getL2Book reverts or
+    cannot be decoded (the decoded book replaces it otherwise).
+    """
+    if KURU_DEPTH and market.lower() not in KURU_NO_DEPTH:
+        calls = [("KURU_L2", KURU_GET_L2_BOOK.encode())]
+        if get_market_params(market) is None:
+            calls.append(("KURU_PARAMS", KURU_GET_MARKET_PARAMS.encode()))
+        if fallback:
+            calls.append(("KURU", KURU_BEST_BID_ASK.encode()))
+        return calls
+    return [("KURU", KURU_BEST_BID_ASK.encode())]
+
+def decode_kuru_result(kind, market, success, return_data, l2_books):
+    """
+    Decodes one Kuru call of a multicall. Returns (bid, ask) for bestBidAsk, else None
+    (L2 payloads are collected in l2_books[market] until the market params are known).
+    """
+    if kind == "KURU_L2" and not success:
+        KURU_NO_DEPTH.add(market.lower()) # Market without getL2Book: top-of-book from now on
+        return None
+    if not success or not return_data: return None
+    if kind == "KURU":
+        return decode_uint_pair(return_data)
+    if kind == "KURU_L2":
+        try:
+            l2_books[market.lower()] = parse_l2_book(return_data)
+        except ReturnDataError as e:
+            KURU_NO_DEPTH.add(market.lower()) # Unreadable book: top-of-book from now on
+            print(f"⚠️ Kuru getL2Book undecodable for {market} ({e}), using bestBidAsk")
+    elif kind == "KURU_PARAMS":
+        set_market_params(market, decode_market_params(return_data))
+    return None
+
+def build_kuru_books(l2_books):
+    """
+    market -> KuruBook for every decoded L2 payload whose market params are known.
+    """
+    books = {}
+    for market, (l2_block, bids, asks) in l2_books.items():
+        params = get_market_params(market)
+        if not params: continue
+        books[market] = KuruBook(market, params, bids, asks, l2_block, native=WMON_ADDR)
+        CONTEXT.kuru_registry.set_orientation(market, books[market].base, books[market].quote)
+    return books
+
+def kuru_book_amount_out(book, token_in, token_out, amount_in, decimals_in, decimals_out):
+    """
+    Output for amount_in from either an L2 KuruBook (size-aware) or a (bid, ask) pair.
+    """
+    if isinstance(book, KuruBook):
+        return book.amount_out(token_in, amount_in)
+    bid_raw, ask_raw = book
+    return kuru_amount_out(token_in, token_out, amount_in, decimals_in, decimals_out, bid_raw, ask_raw)
+
+def get_kuru_quote(token_in, token_out, amount_in, decimals_in, decimals_out):
+    """
+    Fetch Kuru price: walks the L2 book when KURU_DEPTH is on, else bestBidAsk.
+    """
+    try:
+        # Resolve Market
+        market_addr = find_kuru_market(token_in, token_out)
+        if not market_addr: 
+            return 0
         
-        # Logic:
-        # 1. If pair involves USDC, USDC is Quote.
-        # 2. If pair involves MON (and not USDC), MON is Quote.
+        # Use the local w3 instance (Fork) for Kuru quotes
+        target = to_checksum_address(market_addr)
+        kinds, calls = zip(*kuru_market_calls(market_addr, fallback=True))
+        results = call_try_aggregate([{"target": target, "callData": d} for d in calls])
         
-        if USDC_LOWER in target_pair:
-            # USDC is Quote. The other is Base.
-            # If input is NOT USDC, then input is Base.
-            if t_in_lower != USDC_LOWER: is_token_in_base = True
-            
-        elif WMON_LOWER in target_pair:
-            # MON is Quote.
-            if t_in_lower != WMON_LOWER: is_token_in_base = True
-            
-        # Specific overrides if needed (e.g. Stable pairs)
+        book = None
+        l2_books = {}
+        for kind, (success, return_data) in zip(kinds, results):
+            try:
+                book = decode_kuru_result(kind, market_addr, success, return_data, l2_books) or book
+            except Exception as e:
+                print(f"Kuru decode failed for {kind}: {e}") # bestBidAsk still prices the market
+        book = build_kuru_books(l2_books).get(market_addr.lower(), book)
+        if book is None: return 0
         
-        if is_token_in_base:
-            # Selling Base -> User hits Bid
-            if bid_raw == 0: return 0
-            
-            # price = bid / 1e18
-            # amount_out = amount_in * price
-            price_factor = bid_raw / 10**18
-            
-            # Adjustment for decimals:
-            # Price is typically "Quote per Base" scaled by 1e18
-            # Out = In * Price
-            # Raw Out = (Raw In / 10^InDec) * (Price) * 10^OutDec
-            # Raw Out = Raw In * (bid/1e18) * 10^(OutDec - InDec)
-            
-            factor = 10**(decimals_out - decimals_in)
-            amount_out = amount_in * price_factor * factor
-            return int(amount_out)
-            
-        else:
-            # Buying Base -> User hits Ask
-            # Input is Quote. Output is Base.
-            if ask_raw == 0: return 0
-            
-            # price = ask / 1e18
-            # Out = In / price
-            price_factor = ask_raw / 10**18
-            
-            factor = 10**(decimals_out - decimals_in)
-            amount_out = (amount_in / price_factor) * factor
-            
-            # SANITY CHECK: If rate > 1000 (1000x profit), assume dust/error
-            if amount_in > 0:
-                implied_rate = amount_out / amount_in
-                if implied_rate > 1000:
-                   # print(f"DEBUG: Ignored absurd Kuru rate {implied_rate:.2f} for {t_in_lower}->{t_out_lower}")
-                   return 0
-            
-            return int(amount_out)
+        return kuru_book_amount_out(book, token_in, token_out, amount_in, decimals_in, decimals_out)
 
     except Exception as e:
         print(f"Kuru Error: {e}")
-        import traceback
-        traceback.print_exc()
         return 0
 
-    # Sanity Check for Output
-    # If standard stable pair implies > 10x deviation, ignore
-    # This prevents dust orders (e.g. ask=1wei) from creating fake arbitrage
-    return 0
-
-
-
-
 def get_uniswap_v3_price(token_in, token_out, amount_in, fee):
     try:
         # Monad Testnet Quoter might behave same as Mainnet V2
         # Function: quoteExactInputSingle(params)
         params = {
-            "tokenIn": w3.to_checksum_address(token_in),
-            "tokenOut": w3.to_checksum_address(token_out),
+            "tokenIn": to_checksum_address(token_in),
+            "tokenOut": to_checksum_address(token_out),
             "amountIn": int(amount_in),
             "fee": fee,
             "sqrtPriceLimitX96": 0
@@ -265,7 +330,7 @@ def get_uniswap_v3_price(token_in, token_out, amount_in, fee):
         
         try:
             # Sync call
-            quote = uniswap_quoter.functions.quoteExactInputSingle(params).call()
+            quote = CONTEXT.uniswap_quoter.functions.quoteExactInputSingle(params).call()
             amount_out = quote[0]
             gas_estimate = quote[3]
             return amount_out, gas_estimate
@@ -278,13 +343,28 @@ def get_uniswap_v3_price(token_in, token_out, amount_in, fee):
         return 0, 0
 
 def get_pancakeswap_v3_price(token_in, token_out, amount_in, fee=500): 
-    return 0, 0 # Disabled for Monad Testnet
+    """
+    PancakeSwap V3 QuoterV2 (same layout as Uniswap). Returns (amountOut, gasEstimate), (0, 0) without a pool.
+    """
+    try:
+        call_data = encode_quote_exact_input_single(to_checksum_address(token_in), to_checksum_address(token_out), int(amount_in), fee)
+        success, return_data = call_try_aggregate([{"target": PANCAKESWAP_V3_QUOTER_ADDRESS, "callData": call_data}])[0]
+        if not success or not return_data: return 0, 0
+        amount_out, _, _, gas_estimate = decode_quoter_result(return_data)
+        return amount_out, gas_estimate
+    except Exception:
+        return 0, 0
 
 def get_ambient_price(base, quote, amount_in):
-    return 0, 0 # Disabled for Monad Testnet
+    """
+    Best Ambient pool for selling amount_in of `base` into `quote`. Returns (amountOut, gas), (0, 0) without liquidity.
+    """
+    snapshot = get_bulk_quotes([{"tokenIn": base, "tokenOut": quote, "amountIn": amount_in}], return_by_index=True, dexes=["amb"])
+    best = snapshot.get("results", {}).get(0) if snapshot else None
+    return (best["amountOut"], best["gas"]) if best else (0, 0)
 
 # Multicall3 Address (Standard on most EVM chains)
-MULTICALL3_ADDRESS = w3.to_checksum_address("0xcA11bde05977b3631167028862bE2a173976CA11")
+MULTICALL3_ADDRESS = to_checksum_address("0xcA11bde05977b3631167028862bE2a173976CA11")
 
 MULTICALL3_ABI = [
     {
@@ -314,11 +394,18 @@ MULTICALL3_ABI = [
         ],
         "stateMutability": "payable",
         "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "getBlockNumber",
+        "outputs": [{"internalType": "uint256", "name": "blockNumber", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
     }
 ]
 
 # Uniswap V3 Factory
-UNISWAP_V3_FACTORY_ADDRESS = w3.to_checksum_address("0x204faca1764b154221e35c0d20abb3c525710498")
+UNISWAP_V3_FACTORY_ADDRESS = to_checksum_address("0x204faca1764b154221e35c0d20abb3c525710498")
 
 FACTORY_ABI = [
     {
@@ -356,11 +443,39 @@ POOL_ABI = [
         ],
         "stateMutability": "view",
         "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "tickSpacing",
+        "outputs": [{"internalType": "int24", "name": "", "type": "int24"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [{"internalType": "int16", "name": "", "type": "int16"}],
+        "name": "tickBitmap",
+        "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [{"internalType": "int24", "name": "", "type": "int24"}],
+        "name": "ticks",
+        "outputs": [
+            {"internalType": "uint128", "name": "liquidityGross", "type": "uint128"},
+            {"internalType": "int128", "name": "liquidityNet", "type": "int128"},
+            {"internalType": "uint256", "name": "feeGrowthOutside0X128", "type": "uint256"},
+            {"internalType": "uint256", "name": "feeGrowthOutside1X128", "type": "uint256"},
+            {"internalType": "int56", "name": "tickCumulativeOutside", "type": "int56"},
+            {"internalType": "uint160", "name": "secondsPerLiquidityOutsideX128", "type": "uint160"},
+            {"internalType": "uint32", "name": "secondsOutside", "type": "uint32"},
+            {"internalType": "bool", "name": "initialized", "type": "bool"}
+        ],
+        "stateMutability": "view",
+        "type": "function"
     }
 ]
 
-uniswap_factory = w3.eth.contract(address=UNISWAP_V3_FACTORY_ADDRESS, abi=FACTORY_ABI)
-
 ERC20_ABI = [
     {
         "constant": True,
@@ -385,90 +500,325 @@ ERC20_ABI = [
     }
 ]
 
-# --- TOKEN CACHE LOADING ---
-TOKEN_CACHE = {}
+# ----------------------------------------------------------------------------------
+# PRICING CONTEXT (lazy initialization)
+# Importing this module makes no connection, builds no contract and reads no file: the
+# web3 clients, contract objects and on-disk stores are created on first use and then
+# kept. Scripts that only need constants or pure helpers never pay for them, and
+# long-running services call warm_up() in the background to have everything ready.
+# The old module-level names (w3, KURU_REGISTRY, ...) resolve through CONTEXT.
+# ----------------------------------------------------------------------------------
+
 MAINNET_RPC_URL_FALLBACK = "https://rpc.monad.xyz" # Fallback for metadata
-mainnet_w3 = Web3(Web3.HTTPProvider(MAINNET_RPC_URL_FALLBACK, request_kwargs={'timeout': 5}))
 
-def load_token_cache():
-    try:
-        import os
-        base_path = os.path.dirname(os.path.abspath(__file__))
-        json_path = os.path.join(base_path, "monad_tokens.json")
-        
-        if os.path.exists(json_path):
-            with open(json_path, 'r') as f:
-                data = json.load(f)
-                for t in data.get('tokens', []):
-                    # Store by lower-case address for robust lookup
-                    TOKEN_CACHE[t['address'].lower()] = {
-                        "symbol": t['symbol'],
-                        "decimals": t['decimals']
-                    }
-            print(f"✅ Loaded {len(TOKEN_CACHE)} tokens from local JSON cache.")
+class _Lazy:
+    """
+    Builds an attribute once, on first access (under the context lock), then stores it on
+    the instance so later reads are plain attribute lookups. Assigning overrides it.
+    """
+
+    def __init__(self, build):
+        self.build = build
+        self.name = build.__name__
+        self.__doc__ = build.__doc__
+
+    def __get__(self, ctx, owner=None):
+        if ctx is None: return self
+        with ctx._lock:
+            if self.name not in ctx.__dict__:
+                ctx.__dict__[self.name] = self.build(ctx)
+        return ctx.__dict__[self.name]
+
+class PricingContext:
+    """
+    Holds everything web3_pricing used to build at import time.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+
+    @_Lazy
+    def w3(self):
+        from web3 import Web3
+        from rpc_provider import RoutedHTTPProvider
+        client = Web3(RoutedHTTPProvider(RPC_ROUTER, hedge_methods=RPC_HEDGE_METHODS))
+        if USE_LOCAL_FORK:
+            print(f"🔌 Using Local Fork: {RPC_URL}")
+            print(f"🛠️ Using Mock Environment: Quoter={UNISWAP_V3_QUOTER_ADDRESS}, USDC={USDC_ADDR}")
         else:
-            print("⚠️ monad_tokens.json not found, using RPC only.")
-    except Exception as e:
-        print(f"⚠️ Failed to load token cache: {e}")
+            print(f"🌍 Using Monad Mainnet: {RPC_URL} ({len(RPC_ROUTER.urls)} endpoints)")
+        return client
+
+    @_Lazy
+    def mainnet_w3(self):
+        from web3 import Web3
+        return Web3(Web3.HTTPProvider(MAINNET_RPC_URL_FALLBACK, request_kwargs={'timeout': 5}))
+
+    @_Lazy
+    def uniswap_quoter(self):
+        return self.w3.eth.contract(address=UNISWAP_V3_QUOTER_ADDRESS, abi=QUOTER_ABI)
+
+    @_Lazy
+    def pancake_quoter(self):
+        return self.w3.eth.contract(address=PANCAKESWAP_V3_QUOTER_ADDRESS, abi=QUOTER_ABI)
+
+    @_Lazy
+    def ambient_query(self):
+        return self.w3.eth.contract(address=AMBIENT_QUERY_ADDRESS, abi=AMBIENT_ABI)
+
+    @_Lazy
+    def uniswap_factory(self):
+        return self.w3.eth.contract(address=UNISWAP_V3_FACTORY_ADDRESS, abi=FACTORY_ABI)
+
+    @_Lazy
+    def multicall_contract(self):
+        return self.w3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
 
-# Load immediately on import
-load_token_cache()
+    @_Lazy
+    def token_metadata(self):
+        store = TokenMetadataStore()
+        store.load()
+        store.preload()
+        print(f"✅ Loaded {len(store)} tokens from the metadata cache and token lists.")
+        return store
+
+    @_Lazy
+    def kuru_registry(self):
+        """
+        Pair <-> market index with base/quote orientation (USDC > MON quote priority).
+        Loaded from disk (markets found by discovery), then seeded with KURU_MARKETS.
+        """
+        registry = KuruRegistry(
+            quote_priority=[USDC_ADDR, WMON_ADDR],
+            path=KURU_REGISTRY_PATH.replace(".json", "_fork.json") if USE_LOCAL_FORK else KURU_REGISTRY_PATH,
+            router=KURU_ROUTER_ADDRESS
+        )
+        registry.load()
+        registry.seed(KURU_MARKETS)
+        return registry
+
+    @_Lazy
+    def pool_index(self):
+        index = PoolIndex(UNISWAP_V3_FACTORY_ADDRESS)
+        index.load()
+        return index
+
+    def warm_up(self):
+        """
+        Builds every lazy attribute now (meant for a background thread at service start).
+        """
+        t0 = time.perf_counter()
+        for name in _CONTEXT_ATTRS.values():
+            getattr(self, name)
+        print(f"✅ Pricing context ready in {(time.perf_counter() - t0) * 1000:.0f}ms.")
+        return self
+
+CONTEXT = PricingContext()
+
+# Module attribute -> context attribute (keeps `from web3_pricing import w3` working)
+_CONTEXT_ATTRS = {
+    "w3": "w3",
+    "mainnet_w3": "mainnet_w3",
+    "uniswap_quoter": "uniswap_quoter",
+    "pancake_quoter": "pancake_quoter",
+    "ambient_query": "ambient_query",
+    "uniswap_factory": "uniswap_factory",
+    "multicall_contract": "multicall_contract",
+    "TOKEN_METADATA": "token_metadata",
+    "KURU_REGISTRY": "kuru_registry",
+    "POOL_INDEX": "pool_index"
+}
+
+def __getattr__(name):
+    attr = _CONTEXT_ATTRS.get(name)
+    if attr is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(CONTEXT, attr)
+
+# ----------------------------------------------------------------------------------
+# TOKEN METADATA (symbol / decimals)
+# ----------------------------------------------------------------------------------
+
+TOKEN_METADATA_BATCH = 250 # Tokens per Multicall (2 calls each)
+
+def _metadata_calls(addrs):
+    calls = []
+    for addr in addrs:
+        target = to_checksum_address(addr)
+        calls.append({"target": target, "callData": ERC20_SYMBOL.encode()})
+        calls.append({"target": target, "callData": ERC20_DECIMALS.encode()})
+    return calls
+
+def _store_metadata_results(addrs, results, source):
+    """
+    Stores every token whose symbol() and decimals() both decoded. Returns the ones that did not.
+    """
+    failed = []
+    for i, addr in enumerate(addrs):
+        (ok_sym, raw_sym), (ok_dec, raw_dec) = results[2 * i], results[2 * i + 1]
+        symbol = decode_symbol(raw_sym) if ok_sym else None
+        decimals = decode_decimals(raw_dec) if ok_dec else None
+        if symbol is None or decimals is None:
+            failed.append(addr)
+            continue
+        CONTEXT.token_metadata.put(addr, symbol, decimals, source)
+    return failed
+
+def resolve_token_metadata(token_addresses, include_stale=True):
+    """
+    Resolves symbol + decimals for every address the store does not know (or holds stale)
+    with one Multicall per TOKEN_METADATA_BATCH tokens: first against the primary RPC, then
+    the leftovers against the mainnet fallback (tokens newer than the fork). Returns tokens stored.
+    """
+    missing = CONTEXT.token_metadata.missing(token_addresses, include_stale)
+    if not missing: return 0
+    
+    resolved = 0
+    for i in range(0, len(missing), TOKEN_METADATA_BATCH):
+        batch = missing[i:i + TOKEN_METADATA_BATCH]
+        calls = _metadata_calls(batch)
+        failed = _store_metadata_results(batch, _try_aggregate(calls), "rpc")
+        if failed and USE_LOCAL_FORK:
+            try:
+                results = call_try_aggregate(_metadata_calls(failed), client=CONTEXT.mainnet_w3)
+                failed = _store_metadata_results(failed, results, "mainnet")
+            except Exception as e:
+                print(f"⚠️ Mainnet metadata lookup failed: {e}")
+        for addr in failed:
+            CONTEXT.token_metadata.put_missing(addr)
+        resolved += len(batch) - len(failed)
+    
+    CONTEXT.token_metadata.save()
+    return resolved
 
 def get_token_metadata(token_address):
-    # 1. Check Local Cache First (Fast & Reliable)
-    addr_lower = token_address.lower()
-    if addr_lower in TOKEN_CACHE:
-        return TOKEN_CACHE[addr_lower]
+    """
+    {"symbol", "decimals"} from the metadata store; unknown tokens are resolved with one
+    Multicall (symbol + decimals together). Falls back to UNK/18.
+    """
+    meta = CONTEXT.token_metadata.get(token_address)
+    if meta: return meta
+    resolve_token_metadata([token_address], include_stale=False)
+    return CONTEXT.token_metadata.get(token_address) or dict(DEFAULT_METADATA)
+
+# ----------------------------------------------------------------------------------
+# BALANCES (balanceOf for any number of (token, owner) pairs, one block)
+# ----------------------------------------------------------------------------------
+
+NATIVE_TOKEN = "native" # Pass as the token for the owner's MON balance (Multicall3.getEthBalance)
+BALANCE_BATCH = 500 # balanceOf calls per Multicall
 
-    contract_address = w3.to_checksum_address(token_address)
+def _balance_call(token, owner):
+    owner = to_checksum_address(owner)
+    if token == NATIVE_TOKEN:
+        return {"target": MULTICALL3_ADDRESS, "callData": MULTICALL_GET_ETH_BALANCE.encode(owner)}
+    return {"target": to_checksum_address(token), "callData": ERC20_BALANCE_OF.encode(owner)}
 
-    # 2. Try Primary RPC (Local Fork)
+def _balance_multicall(calls, block_param):
+    """
+    One tryAggregate; a chunk the node rejects (eth_call gas cap) is retried in halves.
+    """
     try:
-        token_contract = w3.eth.contract(address=contract_address, abi=ERC20_ABI)
-        symbol = token_contract.functions.symbol().call()
-        decimals = token_contract.functions.decimals().call()
-        
-        # Cache it
-        TOKEN_CACHE[addr_lower] = {"symbol": symbol, "decimals": decimals}
-        return {"symbol": symbol, "decimals": decimals}
-    except Exception:
-        # 3. Fallback: Try Mainnet RPC (for new tokens not in fork)
-        try:
-            # print(f"⚠️ Local lookup failed for {token_address}, trying Mainnet...")
-            token_contract_main = mainnet_w3.eth.contract(address=contract_address, abi=ERC20_ABI)
-            symbol = token_contract_main.functions.symbol().call()
-            decimals = token_contract_main.functions.decimals().call()
-            
-            # Cache it
-            TOKEN_CACHE[addr_lower] = {"symbol": symbol, "decimals": decimals}
-            return {"symbol": symbol, "decimals": decimals}
-        except Exception:
-            return {"symbol": "UNK", "decimals": 18}
+        return call_try_aggregate(calls, block_param)
+    except Exception as e:
+        if len(calls) <= 1:
+            print(f"⚠️ Balance multicall failed: {e}")
+            return [(False, b"")] * len(calls)
+        mid = len(calls) // 2
+        return _balance_multicall(calls[:mid], block_param) + _balance_multicall(calls[mid:], block_param)
 
-def get_token_balance(token_address, owner_address):
+def get_token_balances(pairs, block=None):
+    """
+    Balances of many (token, owner) pairs: every balanceOf in one JSON-RPC round trip
+    (Multicall chunks of BALANCE_BATCH), all pinned to the same block. Decimals come from
+    the metadata store (unknown tokens are resolved in one bulk lookup first).
+    Returns {"balances": {(token, owner): human float}, "raw": {(token, owner): int}, "block"},
+    keys lower-case; pairs whose call failed are left out.
+    """
+    keys = list(dict.fromkeys(
+        (token if token == NATIVE_TOKEN else token.lower(), owner.lower()) for token, owner in pairs
+    ))
+    if block is None: block = get_scan_block()
+    if not keys: return {"balances": {}, "raw": {}, "block": block}
+    
+    resolve_token_metadata([t for t, _ in keys if t != NATIVE_TOKEN], include_stale=False)
+    
+    block_param = _block_param(block)
+    calls = [_balance_call(token, owner) for token, owner in keys]
+    chunks = [(i, min(i + BALANCE_BATCH, len(calls))) for i in range(0, len(calls), BALANCE_BATCH)]
+    batch = RpcBatch(RPC_URL, router=RPC_ROUTER)
+    handles = [batch.eth_call(MULTICALL3_ADDRESS, encode_try_aggregate(calls[start:end]), block_param) for start, end in chunks]
     try:
-        token_contract = w3.eth.contract(address=w3.to_checksum_address(token_address), abi=ERC20_ABI)
-        balance = token_contract.functions.balanceOf(w3.to_checksum_address(owner_address)).call()
-        decimals = token_contract.functions.decimals().call()
-        return balance / (10 ** decimals)
+        responses = batch.execute()
     except Exception as e:
-        # print(f"Error fetching balance: {e}")
-        return 0.0
+        print(f"⚠️ Balance batch failed: {e}")
+        responses = [RpcError(str(e))] * len(handles)
+    
+    results = [(False, b"")] * len(calls)
+    for (start, end), handle in zip(chunks, handles):
+        raw = responses[handle]
+        chunk_result = None
+        if not isinstance(raw, RpcError):
+            try:
+                chunk_result = decode_try_aggregate(raw)
+            except Exception:
+                chunk_result = None
+        if chunk_result is None or len(chunk_result) != end - start:
+            chunk_result = _balance_multicall(calls[start:end], block_param)
+        results[start:end] = chunk_result
+    
+    balances, raw_balances = {}, {}
+    for key, (success, data) in zip(keys, results):
+        if not success or len(data) < 32: continue
+        amount = decode_uint(data)
+        decimals = 18 if key[0] == NATIVE_TOKEN else get_token_metadata(key[0])['decimals']
+        raw_balances[key] = amount
+        balances[key] = amount / (10 ** decimals)
+    return {"balances": balances, "raw": raw_balances, "block": block}
+
+def get_token_balance(token_address, owner_address):
+    """
+    Single balance in human units (0.0 on failure). Use get_token_balances for more than one.
+    """
+    snapshot = get_token_balances([(token_address, owner_address)])
+    key = (token_address if token_address == NATIVE_TOKEN else token_address.lower(), owner_address.lower())
+    return snapshot["balances"].get(key, 0.0)
 
 def get_pool_info(token_in, token_out, fee):
     """
     Fetches Pool Address, Liquidity, and Slot0 (Price) for a pair.
     """
+    # 0. Serve from the in-memory pool state store when it is current
+    if not CONTEXT.pool_index.exists(token_in, token_out, fee):
+        return None
+    key = _v3_key(token_in, token_out, fee)
+    known, cached_addr = POOL_STATE_STORE.lookup(key)
+    if known and cached_addr is None:
+        return None
+    state = POOL_STATE_STORE.get_state(key, V3_STATE_TTL)
+    if state:
+        return {
+            "address": POOL_STATE_STORE.get_entry(cached_addr)["address"],
+            "liquidity": state.liquidity,
+            "sqrtPriceX96": state.sqrt_price_x96,
+            "tick": state.tick
+        }
+    
     try:
-        t_in = w3.to_checksum_address(token_in)
-        t_out = w3.to_checksum_address(token_out)
+        t_in = to_checksum_address(token_in)
+        t_out = to_checksum_address(token_out)
         
-        # 1. Get Pool Address
-        pool_addr = uniswap_factory.functions.getPool(t_in, t_out, fee).call()
-        if pool_addr == "0x0000000000000000000000000000000000000000":
+        # 1. Get Pool Address (Index first, factory otherwise)
+        known, pool_addr = CONTEXT.pool_index.lookup(t_in, t_out, fee)
+        if not known:
+            pool_addr = CONTEXT.uniswap_factory.functions.getPool(t_in, t_out, fee).call()
+            if pool_addr == "0x0000000000000000000000000000000000000000":
+                pool_addr = None
+            CONTEXT.pool_index.set_pool(_v3_key(t_in, t_out, fee), pool_addr)
+        if not pool_addr:
             return None
             
-        pool_contract = w3.eth.contract(address=pool_addr, abi=POOL_ABI)
+        pool_contract = CONTEXT.w3.eth.contract(address=pool_addr, abi=POOL_ABI)
         
         # 2. Get Liquidity & Slot0
         liquidity = pool_contract.functions.liquidity().call()
@@ -484,113 +834,147 @@ def get_pool_info(token_in, token_out, fee):
         # print(f"Pool Info Error: {e}")
         return None
 
-multicall_contract = w3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+# Shared across scans so measured gas/latency carry over (gas priors come from the DEX adapters)
+MULTICALL_PLANNER = ChunkPlanner()
+
+def call_try_aggregate(calls, block_identifier='latest', client=None, copy=True):
+    """
+    Runs Multicall3.tryAggregate(False, calls) with precompiled calldata.
+    calls: list of {"target", "callData"} dicts. Returns [(success, returnData), ...].
+    client: Web3 instance to call through (default: w3).
+    copy=False: returnData are memoryview slices of the reply (scan paths decode them right away).
+    """
+    raw = (client or CONTEXT.w3).eth.call({"to": MULTICALL3_ADDRESS, "data": encode_try_aggregate(calls)}, block_identifier)
+    return decode_try_aggregate(raw, copy=copy)
 
 def get_best_quote(token_in_addr, token_out_addr, amount_in):
     """
-    Queries all DEXs in a SINGLE batch using Multicall3.
+    Queries all DEXs in a SINGLE batch using Multicall3, pinned to one block.
+    Answers already read at that block (QUOTE_CACHE) are reused instead of re-queried.
     """
     quotes = []
     
-    # Uniswap V3 Fee Tiers
+    token_in_addr = to_checksum_address(token_in_addr)
+    token_out_addr = to_checksum_address(token_out_addr)
+    amount_in = int(amount_in)
+    block = get_scan_block()
+    
+    # Uniswap V3 Fee Tiers (Only ones with a pool)
     fee_tiers = [100, 500, 3000, 10000]
-    token_in_addr = w3.to_checksum_address(token_in_addr)
-    token_out_addr = w3.to_checksum_address(token_out_addr)
+    if POOL_INDEX_FILTER: resolve_pool_index((token_in_addr, token_out_addr, fee) for fee in fee_tiers)
+    fee_tiers = quotable_fee_tiers(token_in_addr, token_out_addr, fee_tiers)
     
-    # Construct Batch Calls
+    # Raw answers: cache key -> (amountOut, gas) for Uniswap / KuruBook or (bid, ask) for Kuru
+    raw = {}
+    
+    # Construct Batch Calls (Precompiled calldata template), skipping cached answers
     calls = []
-    for fee in fee_tiers:
-        params = {
-            "tokenIn": token_in_addr,
-            "tokenOut": token_out_addr,
-            "amountIn": int(amount_in),
-            "fee": fee,
-            "sqrtPriceLimitX96": 0
-        }
-        # Encode the call data manually for Multicall
-        # Use build_transaction to get the data payload
-        tx = uniswap_quoter.functions.quoteExactInputSingle(params).build_transaction({'gas': 0, 'gasPrice': 0})
-        call_data = tx['data']
+    call_keys = []
+    uni_keys = {fee: ("uni", token_in_addr.lower(), token_out_addr.lower(), fee, amount_in) for fee in fee_tiers}
+    for fee, key in uni_keys.items():
+        hit, cached = QUOTE_CACHE.get(block, key)
+        if hit:
+            raw[key] = cached
+            continue
         calls.append({
             "target": UNISWAP_V3_QUOTER_ADDRESS,
-            "callData": call_data
+            "callData": encode_quote_exact_input_single(token_in_addr, token_out_addr, amount_in, fee)
         })
+        call_keys.append(key)
+    
+    # Kuru book (L2 levels + bestBidAsk fallback, or bestBidAsk) rides in the same multicall (same block, same round trip)
+    kuru_market = find_kuru_market(token_in_addr, token_out_addr)
+    kuru_key = ("kuru", kuru_market.lower()) if kuru_market else None
+    if kuru_key:
+        hit, cached = QUOTE_CACHE.get(block, kuru_key)
+        if hit:
+            raw[kuru_key] = cached
+        else:
+            for kind, call_data in kuru_market_calls(kuru_market, fallback=True):
+                calls.append({
+                    "target": to_checksum_address(kuru_market),
+                    "callData": call_data
+                })
+                call_keys.append((kind, kuru_key))
     
     t0_net = time.perf_counter()
     
-    print(f"DEBUG: Executing Uni V3 Multicall for {len(calls)} calls...")
-    t_start = time.time()
-    try:
-        # Execute Batch (1 RPC Request)
-        results = multicall_contract.functions.tryAggregate(False, calls).call()
-        print(f"DEBUG: Multicall took {time.time() - t_start:.4f}s")
-    except Exception as e:
-        print(f"Multicall failed after {time.time() - t_start:.4f}s: {e}")
-        t1_net = time.perf_counter()
-        return {"best": None, "all_quotes": [], "network_ms": (t1_net - t0_net) * 1000}
+    if calls:
+        print(f"DEBUG: Executing Multicall for {len(calls)} calls at block {block}...")
+        t_start = time.time()
+        try:
+            # Execute Batch (1 RPC Request)
+            results = call_try_aggregate(calls, _block_param(block))
+            print(f"DEBUG: Multicall took {time.time() - t_start:.4f}s")
+        except Exception as e:
+            print(f"Multicall failed after {time.time() - t_start:.4f}s: {e}")
+            t1_net = time.perf_counter()
+            return {"best": None, "all_quotes": [], "network_ms": (t1_net - t0_net) * 1000}
+        
+        # Decode Results
+        l2_books = {}
+        for key, (success, return_data) in zip(call_keys, results):
+            try:
+                if key[0] != "uni":
+                    kind, key = key
+                    bid_ask = decode_kuru_result(kind, key[1], success, return_data, l2_books)
+                    if bid_ask:
+                        raw[key] = bid_ask
+                        QUOTE_CACHE.put(block, key, bid_ask)
+                    continue
+                if not success or len(return_data) == 0: continue # Likely pool revert string
+                # Decode: amountOut, sqrtPriceX96After, initializedTicksCrossed, gasEstimate
+                decoded_data = decode_quoter_result(return_data)
+                raw[key] = (decoded_data[0], decoded_data[3])
+                QUOTE_CACHE.put(block, key, raw[key])
+            except Exception as e:
+                # print(f"DEBUG: Decode failed for {key}: {e}")
+                pass
+        for market, book in build_kuru_books(l2_books).items():
+            raw[("kuru", market)] = book
+            QUOTE_CACHE.put(block, ("kuru", market), book)
 
     t1_net = time.perf_counter()
     network_duration = (t1_net - t0_net) * 1000 # ms
     
     now = datetime.datetime.now().strftime("%H:%M:%S.%f")[:-3]
     
-    # Decode Results
-    for i, (success, return_data) in enumerate(results):
-        fee = fee_tiers[i]
-        # print(f"DEBUG: Fee {fee} Success: {success} Len: {len(return_data)} Data: {return_data.hex()}")
-        
-        if success and len(return_data) > 0:
-            try:
-                # Decode: amountOut, sqrtPriceX96After, initializedTicksCrossed, gasEstimate
-                from eth_abi import decode
-                decoded_data = decode(
-                    ['uint256', 'uint160', 'uint32', 'uint256'],
-                    return_data
-                )
-                amount_out = decoded_data[0]
-                gas_estimate = decoded_data[3]
-                # print(f"DEBUG: Fee {fee} Decoded amountOut: {amount_out}")
-                
-                if amount_out > 0:
-                    quotes.append({
-                        "dex": "Uniswap V3",
-                        "fee": fee,
-                        "amountOut": amount_out,
-                        "gasEstimate": gas_estimate,
-                        "timestamp": now # Atomically consistent timestamp
-                    })
-            except Exception as e:
-                # print(f"DEBUG: Decode failed for {fee}: {e}")
-                pass # Decoding failed, likely pool revert string
-
-    # --- ADDED: Kuru Quote Check ---
-    try:
-        # Check if pair is in Kuru (check all permutations or relies on get_kuru_quote logic)
-        # get_kuru_quote handles the map check internally.
-        
-        # Need decimals for Kuru calculation
-        from web3_pricing import get_token_metadata # Import internally if needed, or rely on module scope
-        
-        meta_in = get_token_metadata(token_in_addr)
-        meta_out = get_token_metadata(token_out_addr)
-        
-        dec_in = meta_in.get('decimals', 18)
-        dec_out = meta_out.get('decimals', 18)
-        
-        kuru_out = get_kuru_quote(token_in_addr, token_out_addr, int(amount_in), dec_in, dec_out)
-        
-        if kuru_out > 0:
+    for fee, key in uni_keys.items():
+        if key not in raw: continue
+        amount_out, gas_estimate = raw[key]
+        if amount_out > 0:
             quotes.append({
-                "dex": "Kuru",
-                "fee": 0, # Orderbook
-                "amountOut": kuru_out,  
-                "gasEstimate": 150000, # Approx gas for Kuru Swap
-                "timestamp": now
+                "dex": "Uniswap V3",
+                "fee": fee,
+                "amountOut": amount_out,
+                "gasEstimate": gas_estimate,
+                "timestamp": now # Atomically consistent timestamp
             })
-            print(f"✅ Found Kuru Quote: {kuru_out}")
 
-    except Exception as e:
-        print(f"Kuru Single Quote Error: {e}")
+    # --- Kuru Quote (L2 book / bestBidAsk decoded from the same multicall) ---
+    if kuru_key in raw:
+        try:
+            # Need decimals for Kuru calculation
+            dec_in = get_token_metadata(token_in_addr).get('decimals', 18)
+            dec_out = get_token_metadata(token_out_addr).get('decimals', 18)
+            
+            kuru_out = kuru_book_amount_out(raw[kuru_key], token_in_addr, token_out_addr, amount_in, dec_in, dec_out)
+            # No L2 book (reverted / undecodable): bestBidAsk prices the whole size at the top level
+            top_of_book = not isinstance(raw[kuru_key], KuruBook)
+            
+            if kuru_out > 0:
+                quotes.append({
+                    "dex": "Kuru",
+                    "fee": 0, # Orderbook
+                    "amountOut": kuru_out,  
+                    "gasEstimate": KURU_GAS_ESTIMATE, # Approx gas for Kuru Swap
+                    "topOfBook": top_of_book, # Size not checked against depth
+                    "timestamp": now
+                })
+                print(f"✅ Found Kuru Quote: {kuru_out}" + (" (top of book, size unchecked)" if top_of_book else ""))
+
+        except Exception as e:
+            print(f"Kuru Single Quote Error: {e}")
 
                 
     if not quotes:
@@ -603,255 +987,578 @@ def get_best_quote(token_in_addr, token_out_addr, amount_in):
     return {
         "best": best,
         "all_quotes": sorted_quotes,
-        "network_ms": network_duration
+        "network_ms": network_duration,
+        "block": block
     }
 
 
 
 # ----------------------------------------------------------------------------------
-# BULK QUOTING LOGIC (Multicall)
+# LOCAL V3 POOL STATE (Offline Swap Simulation)
 # ----------------------------------------------------------------------------------
 
+# The fork routes quotes through MockDEX, so only simulate real pools on mainnet
+LOCAL_V3_PRICING = not USE_LOCAL_FORK
+V3_STATE_TTL = 15 # Seconds before a snapshot is re-fetched
+TICK_WORD_RADIUS = 2 # Bitmap words loaded on each side of the active word
+V3_SWAP_GAS = 110000 # Approx gas of a single-pool swap
+V3_TICK_CROSS_GAS = 25000 # Approx extra gas per initialized tick crossed
 
+def _v3_key(token_a, token_b, fee):
+    a, b = token_a.lower(), token_b.lower()
+    if int(a, 16) > int(b, 16): a, b = b, a
+    return (a, b, fee)
 
+def _try_aggregate(calls):
+    try:
+        return call_try_aggregate(calls)
+    except Exception as e:
+        print(f"Multicall failed: {e}")
+        return [(False, b"")] * len(calls)
 
-# ... (Previous Functions)
+# ----------------------------------------------------------------------------------
+# UNISWAP V3 POOL INDEX (Which fee tiers exist)
+# ----------------------------------------------------------------------------------
+
+POOL_INDEX_GETPOOL_BATCH = 500 # getPool calls per Multicall
+POOL_INDEX_LOG_CHUNK = 5000 # Blocks per eth_getLogs request
+POOL_INDEX_REFRESH_INTERVAL = 60 # Seconds between PoolCreated syncs
+# The fork's MockDEX quoter prices any pair, so only skip missing tiers against real pools
+POOL_INDEX_FILTER = not USE_LOCAL_FORK
+_pool_index_thread = None
 
-def get_bulk_quotes(requests, return_by_index=False):
+def quotable_fee_tiers(token_a, token_b, fee_tiers):
     """
-    Executes a massive batch of pricing queries in a SINGLE Multicall (Parallel Chunks).
-    requests: List of dicts: {"tokenIn": address, "tokenOut": address, "amountIn": int}
-    return_by_index: If True, returns dict keyed by request index (int). If False, keyed by (tokenIn, tokenOut).
+    Fee tiers worth quoting for a pair: all of them unless the index knows a tier has no pool.
     """
-    import concurrent.futures
+    if not POOL_INDEX_FILTER: return list(fee_tiers)
+    return CONTEXT.pool_index.existing_fees(token_a, token_b, fee_tiers)
+
+def resolve_pool_index(pairs):
+    """
+    Looks up every (tokenA, tokenB, fee) the index does not know yet with factory.getPool
+    (Multicall) and persists the answers. Returns the number of keys resolved.
+    """
+    keys = CONTEXT.pool_index.unknown_keys(pairs)
+    if not keys: return 0
     
-    fee_tiers = [100, 500, 3000, 10000]
-    total_calls = []
+    resolved = 0
+    for i in range(0, len(keys), POOL_INDEX_GETPOOL_BATCH):
+        batch = keys[i:i + POOL_INDEX_GETPOOL_BATCH]
+        calls = [{"target": MULTICALL3_ADDRESS, "callData": MULTICALL_GET_BLOCK_NUMBER.encode()}]
+        calls += [{
+            "target": UNISWAP_V3_FACTORY_ADDRESS,
+            "callData": FACTORY_GET_POOL.encode(k[0], k[1], k[2])
+        } for k in batch]
+        res = _try_aggregate(calls)
+        
+        # First resolve anchors the PoolCreated log sync: later creations are caught from here on
+        ok_block, block_data = res[0]
+        if CONTEXT.pool_index.last_block is None and ok_block and block_data:
+            CONTEXT.pool_index.set_last_block(decode_uint(block_data))
+        
+        for k, (success, data) in zip(batch, res[1:]):
+            if not success or len(data) < 32: continue # Unknown: quoted as before
+            pool_addr = to_checksum_address(decode_address(data))
+            CONTEXT.pool_index.set_pool(k, None if int(pool_addr, 16) == 0 else pool_addr)
+            resolved += 1
     
-    # Map raw global call index to metadata: (req_idx, type, pool_idx/fee)
-    # Types: "UNI", "AMB"
-    call_map = {}
+    CONTEXT.pool_index.save()
+    return resolved
+
+def sync_pool_index_logs(max_chunks=20):
+    """
+    Applies factory PoolCreated logs since the last synced block. Returns pools added.
+    """
+    latest = CONTEXT.w3.eth.block_number
+    if CONTEXT.pool_index.last_block is None:
+        # Nothing indexed yet: getPool answers from now on are current, logs start here
+        CONTEXT.pool_index.set_last_block(latest)
+        CONTEXT.pool_index.save()
+        return 0
     
-    # 1. Build Calldata
-    for req_idx, req in enumerate(requests):
-        t_in = w3.to_checksum_address(req['tokenIn'])
-        t_out = w3.to_checksum_address(req['tokenOut'])
-        amt = int(req['amountIn'])
-        
-        # A. Uniswap V3 Calls
-        for fee in fee_tiers:
-            try:
-                params_tuple = (t_in, t_out, amt, fee, 0)
-                call_data = uniswap_quoter.encode_abi("quoteExactInputSingle", args=[params_tuple])
-                
-                call_idx = len(total_calls)
-                total_calls.append({
-                    "target": UNISWAP_V3_QUOTER_ADDRESS,
-                    "callData": call_data
-                })
-                call_map[call_idx] = (req_idx, "UNI", fee)
-            except Exception as e:
-                # print(f"Error encoding UNI tx for req {req_idx}: {e}")
-                pass
+    added = 0
+    from_block = CONTEXT.pool_index.last_block + 1
+    for _ in range(max_chunks):
+        if from_block > latest: break
+        to_block = min(latest, from_block + POOL_INDEX_LOG_CHUNK - 1)
+        logs = CONTEXT.w3.eth.get_logs({
+            "address": UNISWAP_V3_FACTORY_ADDRESS,
+            "topics": [POOL_CREATED_TOPIC],
+            "fromBlock": from_block,
+            "toBlock": to_block
+        })
+        for log in logs:
+            if CONTEXT.pool_index.apply_pool_created(log): added += 1
+        CONTEXT.pool_index.set_last_block(to_block)
+        from_block = to_block + 1
+    
+    CONTEXT.pool_index.save()
+    if added: print(f"🆕 Pool Index: {added} new Uniswap V3 pools from PoolCreated logs.")
+    return added
 
-        # B. Ambient Calls (If enabled)
-        if not DISABLE_OTHER_DEXS:
+def start_pool_index_refresh(interval=POOL_INDEX_REFRESH_INTERVAL):
+    """
+    Starts a daemon thread that keeps POOL_INDEX current from PoolCreated logs.
+    """
+    global _pool_index_thread
+    
+    if _pool_index_thread and _pool_index_thread.is_alive(): return _pool_index_thread
+    
+    def run():
+        while True:
             try:
-                # Determine Base/Quote (Sorted by address)
-                if int(t_in, 16) < int(t_out, 16):
-                    base, quote = t_in, t_out
-                    is_buy = True # We are selling Base? No, Base < Quote.
-                                # queryPrice returns Price of Base in Quote?
-                                # Usually Price = Quote / Base
-                else:
-                    base, quote = t_out, t_in
-                    is_buy = False
-                
-                # Check Standard Pool Idx (36000, 420)
-                for pool_idx in [36000, 420]:
-                    # 1. Price Call
-                    call_data_price = ambient_query.encode_abi("queryPrice", args=[base, quote, pool_idx])
-                    call_idx_p = len(total_calls)
-                    total_calls.append({
-                        "target": AMBIENT_QUERY_ADDRESS,
-                        "callData": call_data_price
-                    })
-                    call_map[call_idx_p] = (req_idx, "AMB_PRICE", pool_idx)
-                    
-                    # 2. Liquidity Call
-                    call_data_liq = ambient_query.encode_abi("queryLiquidity", args=[base, quote, pool_idx])
-                    call_idx_l = len(total_calls)
-                    total_calls.append({
-                        "target": AMBIENT_QUERY_ADDRESS,
-                        "callData": call_data_liq
-                    })
-                    call_map[call_idx_l] = (req_idx, "AMB_LIQ", pool_idx)
+                sync_pool_index_logs()
             except Exception as e:
-                print(f"Error encoding AMB tx: {e}")
-
-    if not total_calls:
-        return {}
+                print(f"⚠️ Pool Index refresh failed: {e}")
+            time.sleep(interval)
     
-    # 2. Parallel Chunk Execution
-    BATCH_SIZE = 40
-    chunks = [total_calls[i:i + BATCH_SIZE] for i in range(0, len(total_calls), BATCH_SIZE)]
-    print(f"    (Splitting {len(total_calls)} calls into {len(chunks)} parallel batches...)")
+    _pool_index_thread = threading.Thread(target=run, daemon=True)
+    _pool_index_thread.start()
+    return _pool_index_thread
+
+# ----------------------------------------------------------------------------------
+# KURU MARKET DISCOVERY
+# Fills KURU_REGISTRY from the router's MarketRegistered logs (chunked eth_getLogs
+# backfill, then incremental) and, optionally, from the Kuru vaults API. Discovered
+# markets are persisted with the registry, so the next start knows them immediately.
+# ----------------------------------------------------------------------------------
+
+KURU_MARKET_REGISTERED_EVENT = "MarketRegistered(address,address,address,address,uint32,uint96,uint32,uint96,uint96,uint256,uint256)"
+KURU_MARKET_REGISTERED_TOPIC = "0x" + bytes(keccak(text=KURU_MARKET_REGISTERED_EVENT)).hex()
+KURU_DISCOVERY_START_BLOCK = 0 # First block of the log backfill
+KURU_LOG_CHUNK = 10000 # Blocks per eth_getLogs request (halved while the RPC rejects the range)
+KURU_LOG_MIN_CHUNK = 100
+KURU_DISCOVERY_INTERVAL = 60 # Seconds between syncs once caught up
+KURU_DISCOVERY_USE_API = True # Also register markets listed by the vaults API
+KURU_VAULTS_API_URL = "https://api.kuru.io/api/v2/vaults?limit=100&offset=0"
+KURU_API_HEADERS = {
+    "accept": "*/*",
+    "origin": "https://www.kuru.io",
+    "referer": "https://www.kuru.io/",
+    "user-agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+}
+
+_kuru_discovery_thread = None
+
+def _kuru_token(addr):
+    """
+    Registry address for a market side: native MON (address(0)) is traded as WMON.
+    """
+    if not addr or int(addr, 16) == 0: return WMON_ADDR.lower()
+    return addr.lower()
+
+def register_kuru_market(base, quote, market, source):
+    return CONTEXT.kuru_registry.register(_kuru_token(base), _kuru_token(quote), market, _kuru_token(base), _kuru_token(quote), source)
+
+def apply_kuru_market_log(log):
+    """
+    MarketRegistered(baseAsset, quoteAsset, market, vault, ...): all fields in data.
+    """
+    data = log.get('data')
+    if isinstance(data, str): data = bytes.fromhex(data[2:] if data.startswith('0x') else data)
+    if not data or len(data) < 96: return False
+    base, quote, market = (decode_address(data[i * 32:(i + 1) * 32]) for i in range(3))
+    return register_kuru_market(base, quote, to_checksum_address(market), "logs")
+
+def sync_kuru_market_logs(max_chunks=20):
+    """
+    Applies MarketRegistered logs since the last synced block. Returns (markets added, caught_up).
+    """
+    latest = CONTEXT.w3.eth.block_number
+    last = CONTEXT.kuru_registry.last_block
+    from_block = KURU_DISCOVERY_START_BLOCK if last is None else last + 1
+    chunk = KURU_LOG_CHUNK
+    added = 0
     
-    t0 = time.time()
-    all_results = [None] * len(total_calls) 
+    for _ in range(max_chunks):
+        if from_block > latest: break
+        to_block = min(latest, from_block + chunk - 1)
+        try:
+            logs = CONTEXT.w3.eth.get_logs({
+                "address": KURU_ROUTER_ADDRESS,
+                "topics": [KURU_MARKET_REGISTERED_TOPIC],
+                "fromBlock": from_block,
+                "toBlock": to_block
+            })
+        except Exception as e:
+            if chunk <= KURU_LOG_MIN_CHUNK: raise
+            chunk = max(chunk // 2, KURU_LOG_MIN_CHUNK) # Range too large for this RPC: retry smaller
+            continue
+        for log in logs:
+            if apply_kuru_market_log(log): added += 1
+        CONTEXT.kuru_registry.set_last_block(to_block)
+        from_block = to_block + 1
     
-    def fetch_chunk(chunk_index, chunk_calls):
+    CONTEXT.kuru_registry.save()
+    if added: print(f"🆕 Kuru Registry: {added} markets from MarketRegistered logs ({len(CONTEXT.kuru_registry)} total).")
+    return added, from_block > latest
+
+def register_kuru_api_markets(items):
+    """
+    Registers markets from vaults API items ({"marketaddress", "basetoken", "quotetoken"}).
+    """
+    added = 0
+    for item in items or []:
+        market = item.get('marketaddress')
+        base = (item.get('basetoken') or {}).get('address')
+        quote = (item.get('quotetoken') or {}).get('address')
+        if not (market and base and quote): continue
         try:
-            return multicall_contract.functions.tryAggregate(False, chunk_calls).call()
-        except:
-            return []
+            if register_kuru_market(base, quote, to_checksum_address(market), "api"): added += 1
+        except Exception as e:
+            continue
+    if added:
+        CONTEXT.kuru_registry.save()
+        print(f"🆕 Kuru Registry: {added} markets from the vaults API ({len(CONTEXT.kuru_registry)} total).")
+    return added
 
-    kuru_futures = []
-    
-    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
-        # 1. Submit Multicall Chunks
-        future_to_chunk = {
-            executor.submit(fetch_chunk, idx, chunk): (idx, chunk) 
-            for idx, chunk in enumerate(chunks)
-        }
-        
-        # 2. Submit Kuru Requests (Concurrent)
-        if not DISABLE_OTHER_DEXS:
-            for req_idx, req in enumerate(requests):
-                # Basic check if pair supported to avoid spam
-                key = frozenset([req['tokenIn'], req['tokenOut']])
-                is_supported = False
-                for k in KURU_MARKETS:
-                     if req['tokenIn'] in k and req['tokenOut'] in k:
-                         is_supported = True
-                         break
-                
-                if is_supported:
-                    # Resolve decimals dynamically
-                    # Utilize the cache we already have in this file
-                    meta_in = get_token_metadata(req['tokenIn'])
-                    meta_out = get_token_metadata(req['tokenOut'])
-                    
-                    dec_in = meta_in.get('decimals', 18)
-                    dec_out = meta_out.get('decimals', 18)
-                    
-                    fut = executor.submit(get_kuru_quote, 
-                                          req['tokenIn'], req['tokenOut'], int(req['amountIn']), 
-                                          dec_in, dec_out)
-                    kuru_futures.append((req_idx, fut))
-
-        # 3. Process Multicall Results
-        for future in concurrent.futures.as_completed(future_to_chunk):
-            chunk_idx, _ = future_to_chunk[future]
-            chunk_results = future.result()
-            
-            start_offset = chunk_idx * BATCH_SIZE
-            for i, result_data in enumerate(chunk_results):
-                if i >= len(chunk_results): continue # Safety
-                if start_offset + i < len(all_results):
-                    all_results[start_offset + i] = result_data
+def sync_kuru_api_markets():
+    import requests
+    resp = requests.get(KURU_VAULTS_API_URL, headers=KURU_API_HEADERS, timeout=5)
+    resp.raise_for_status()
+    return register_kuru_api_markets(resp.json().get('data', {}).get('data', []))
 
-    t1 = time.time()
-    network_ms = (t1 - t0) * 1000
+def start_kuru_discovery(interval=KURU_DISCOVERY_INTERVAL, use_api=KURU_DISCOVERY_USE_API):
+    """
+    Starts a daemon thread that keeps KURU_REGISTRY current (backfills quickly, then every `interval`).
+    """
+    global _kuru_discovery_thread
     
-    # 3. Decode & Aggregate
-    aggregated_results = {} # req_idx -> list of quotes
-    temp_amb_results = {} # Store Ambient partials
+    if _kuru_discovery_thread and _kuru_discovery_thread.is_alive(): return _kuru_discovery_thread
     
-    # Process Kuru Results
-    if not DISABLE_OTHER_DEXS and kuru_futures:
-        for req_idx, future in kuru_futures:
+    def run():
+        while True:
+            caught_up = True
+            if use_api:
+                try:
+                    sync_kuru_api_markets()
+                except Exception as e:
+                    print(f"⚠️ Kuru vaults API sync failed: {e}")
             try:
-                kuru_amt = future.result()
-                if kuru_amt > 0:
-                     if req_idx not in aggregated_results: aggregated_results[req_idx] = []
-                     aggregated_results[req_idx].append({
-                         "dex": "Kuru (OrderBook)",
-                         "strategy": "Kuru",
-                         "fee": 0, # Flat fee? Or maker/taker? Assume 0 for now or integrated in price
-                         "amountOut": kuru_amt,
-                         "gas": 150000 # Estimate
-                     })
+                _, caught_up = sync_kuru_market_logs()
             except Exception as e:
-                # print(f"Kuru Future Error: {e}")
-                pass
+                print(f"⚠️ Kuru market log sync failed: {e}")
+            time.sleep(interval if caught_up else 1)
     
-    from eth_abi import decode
+    _kuru_discovery_thread = threading.Thread(target=run, daemon=True)
+    _kuru_discovery_thread.start()
+    return _kuru_discovery_thread
+
+def load_v3_pool_states(pairs, word_radius=TICK_WORD_RADIUS, force=False):
+    """
+    Loads slot0, liquidity, tick bitmap and liquidityNet for many pools in 4 Multicalls total
+    and stores them in POOL_STATE_STORE. Pools that are still fresh are skipped unless force=True.
+    pairs: iterable of (tokenA, tokenB, fee)
+    """
+    keys = list(dict.fromkeys(_v3_key(a, b, fee) for a, b, fee in pairs))
+    if not keys: return 0
+
+    # 1. Resolve pool addresses through the persistent pool index
+    resolve_pool_index(keys)
+    for k in keys:
+        known, pool_addr = CONTEXT.pool_index.lookup(*k)
+        if not known: continue
+        if pool_addr is None:
+            POOL_STATE_STORE.set_missing(k)
+        elif POOL_STATE_STORE.lookup(k)[1] != pool_addr.lower():
+            POOL_STATE_STORE.register(k, pool_addr)
+
+    pool_addrs = {}
+    for k in keys:
+        _, addr = POOL_STATE_STORE.lookup(k)
+        if not addr: continue
+        if force or not POOL_STATE_STORE.is_fresh(POOL_STATE_STORE.get_entry(addr), V3_STATE_TTL):
+            pool_addrs[k] = addr
+    targets = list(pool_addrs)
+    if not targets: return 0
+
+    # 2. slot0 + liquidity + tickSpacing (+ block number, so later logs can be de-duplicated)
+    calls = [{"target": MULTICALL3_ADDRESS, "callData": MULTICALL_GET_BLOCK_NUMBER.encode()}]
+    for k in targets:
+        for template in (POOL_SLOT0, POOL_LIQUIDITY, POOL_TICK_SPACING):
+            calls.append({"target": pool_addrs[k], "callData": template.encode()})
+    res = _try_aggregate(calls)
+    ok_block, block_data = res[0]
+    snapshot_block = decode_uint(block_data) if ok_block and block_data else None
+    if snapshot_block is None:
+        print("⚠️ Pool state load skipped: snapshot block unknown (logs could not be de-duplicated)")
+        return 0
+    res = res[1:]
+
+    heads = {}
+    for i, k in enumerate(targets):
+        (ok0, d0), (ok1, d1), (ok2, d2) = res[i * 3:i * 3 + 3]
+        if not (ok0 and ok1 and ok2): continue
+        sqrt_price, tick = decode_words(d0, 2, signed=(1,))
+        liquidity = decode_uint(d1)
+        spacing = read_word(d2, 0, signed=True)
+        if sqrt_price == 0: continue
+        heads[k] = (sqrt_price, tick, liquidity, spacing)
+
+    # 3. Tick bitmap words around the active tick
+    calls = []; word_meta = []
+    for k, (_, tick, _, spacing) in heads.items():
+        center = (tick // spacing) >> 8
+        for word in range(center - word_radius, center + word_radius + 1):
+            calls.append({"target": pool_addrs[k], "callData": POOL_TICK_BITMAP.encode(word)})
+            word_meta.append((k, word))
+    res = _try_aggregate(calls) if calls else []
+
+    initialized = {k: [] for k in heads}
+    for (k, word), (success, data) in zip(word_meta, res):
+        if not success: continue
+        bitmap = decode_uint(data)
+        spacing = heads[k][3]
+        while bitmap:
+            bit = (bitmap & -bitmap).bit_length() - 1
+            initialized[k].append(((word << 8) + bit) * spacing)
+            bitmap &= bitmap - 1
+
+    # 4. liquidityNet for every initialized tick
+    calls = []; tick_meta = []
+    for k, ticks in initialized.items():
+        for t in ticks:
+            calls.append({"target": pool_addrs[k], "callData": POOL_TICKS.encode(t)})
+            tick_meta.append((k, t))
+    res = _try_aggregate(calls) if calls else []
+
+    tick_nets = {k: {} for k in heads}
+    failed = set()
+    for (k, t), (success, data) in zip(tick_meta, res):
+        if not success:
+            failed.add(k)
+            continue
+        liquidity_net = read_word(data, 1, signed=True)
+        if liquidity_net != 0: tick_nets[k][t] = liquidity_net
+
+    loaded = 0
+    for k, (sqrt_price, tick, liquidity, spacing) in heads.items():
+        if k in failed: continue # Partial tick data would give wrong quotes
+        center = (tick // spacing) >> 8
+        state = V3PoolState(
+            sqrt_price, tick, liquidity, k[2], spacing,
+            ticks=tick_nets[k],
+            word_range=(center - word_radius, center + word_radius),
+            token0=k[0], token1=k[1]
+        )
+        # Dropped if a log newer than snapshot_block was applied while loading
+        if POOL_STATE_STORE.put_state(pool_addrs[k], state, block=snapshot_block): loaded += 1
+    return loaded
+
+def get_v3_pool_state(token_a, token_b, fee, max_age=V3_STATE_TTL):
+    """
+    Returns the cached V3PoolState for a pair/fee if it is fresh enough, else None.
+    """
+    return POOL_STATE_STORE.get_state(_v3_key(token_a, token_b, fee), max_age)
+
+def quote_v3_locally(token_in, token_out, amount_in, fee):
+    """
+    Prices an exact-input swap from the cached pool snapshot.
+    Returns (amountOut, gasEstimate, simulation) or None if the snapshot can't answer exactly.
+    """
+    state = get_v3_pool_state(token_in, token_out, fee)
+    if not state: return None
+    sim = quote_exact_input_single(state, token_in, token_out, amount_in)
+    if not sim: return None
+    gas = V3_SWAP_GAS + sim["initializedTicksCrossed"] * V3_TICK_CROSS_GAS
+    return sim["amountOut"], gas, sim
+
+# ----------------------------------------------------------------------------------
+# BULK QUOTING LOGIC (Multicall)
+# ----------------------------------------------------------------------------------
+
+
+
+
+# ... (Previous Functions)
+
+BULK_FEE_TIERS = [100, 500, 3000, 10000]
+AMBIENT_POOL_IDXS = [36000, 420]
+KURU_GAS_ESTIMATE = 150000
+BATCH_RPC = True # Send a scan's eth_calls as one JSON-RPC array (see rpc_batch.py)
+
+# Every call of a scan is pinned to one block; raw answers are memoized per block
+QUOTE_CACHE = QuoteCache()
+HEAD_BLOCK = HeadBlock()
+
+def prime_v3_pools(requests, fee_tiers=BULK_FEE_TIERS):
+    """
+    Resolves which fee tiers exist (POOL_INDEX) and refreshes local V3 snapshots for
+    every (pair, fee) in a request set. Both are no-ops while the data is current.
+    """
+    pairs = [(req['tokenIn'], req['tokenOut'], fee) for req in requests for fee in fee_tiers]
+    if POOL_INDEX_FILTER: resolve_pool_index(pairs)
+    if not LOCAL_V3_PRICING: return 0
+    return load_v3_pool_states(pairs)
+
+def get_scan_block():
+    """
+    Block number every call of a scan is pinned to (None -> 'latest' if the RPC is unreachable).
+    A head the pricing node has not reported yet (e.g. from sentinel logs) is not pinned:
+    the node's own eth_blockNumber is used instead.
+    """
+    block = HEAD_BLOCK.get()
+    if block is None:
+        try:
+            block = CONTEXT.w3.eth.block_number
+            HEAD_BLOCK.note(block)
+        except Exception as e:
+            print(f"⚠️ Could not pin scan block: {e}")
+            return None
+    return block
+
+def _block_param(block):
+    return 'latest' if block is None else block
+
+# ----------------------------------------------------------------------------------
+# DEX ADAPTERS (see dex_adapters.py)
+# Every venue of a scan plans its calls into one BulkPlan, so all of them share the
+# same multicall chunks. BULK_DEXES lists the adapters a scan uses by default.
+# ----------------------------------------------------------------------------------
+
+PANCAKESWAP_V3_FEE_TIERS = [100, 500, 2500, 10000]
+
+def register_bulk_adapter(adapter):
+    """
+    Registers an adapter and seeds the chunk planner with the gas priors of its call kinds.
+    """
+    register_adapter(adapter)
+    MULTICALL_PLANNER.gas_priors.update(adapter.gas_priors)
+    return adapter
+
+def _uniswap_local_quote(token_in, token_out, amount_in, fee):
+    return quote_v3_locally(token_in, token_out, amount_in, fee) if LOCAL_V3_PRICING else None
+
+class KuruAdapter(DexAdapter):
+    """
+    Kuru order books: one book read per market and scan (L2 levels or bestBidAsk),
+    walked locally for each request's size.
+    """
+    name = "kuru"
+    label = "Kuru (OrderBook)"
+    gas_priors = {"KURU": 30000, "KURU_L2": 400000, "KURU_PARAMS": 30000}
+    swap_gas = KURU_GAS_ESTIMATE
+
+    def prepare(self, requests):
+        # Decimals of every Kuru token in one bulk read (plan_request then never waits on RPC)
+        prefetch_token_metadata(
+            t for req in requests if find_kuru_market(req['tokenIn'], req['tokenOut'])
+            for t in (req['tokenIn'], req['tokenOut'])
+        )
+
+    def plan_request(self, plan, req_idx, token_in, token_out, amount_in):
+        # Only pairs with a known market, to avoid spam
+        market = find_kuru_market(token_in, token_out)
+        if not market: return
+        state = plan.state(self)
+        key = ("kuru", market.lower())
+        dec_in = get_token_metadata(token_in).get('decimals', 18)
+        dec_out = get_token_metadata(token_out).get('decimals', 18)
+        state["jobs"].append((req_idx, key, token_in, token_out, amount_in, dec_in, dec_out))
+        if not plan.claim(key): return
+
+        hit, cached = plan.cache_get(key)
+        if hit:
+            state["known"][key] = cached
+            return
+        # bestBidAsk rides along, so a reverting / undecodable book still prices this block
+        for kind, call_data in kuru_market_calls(market, fallback=True):
+            plan.add_call(to_checksum_address(market), call_data, req_idx, kind, key)
+
+    def decode(self, plan, kind, key, req_idxs, success, return_data, results):
+        state = plan.state(self)
+        bid_ask = decode_kuru_result(kind, key[1], success, return_data, state.setdefault("l2", {}))
+        if bid_ask:
+            state["known"][key] = bid_ask
+            plan.cache_put(key, bid_ask)
+
+    def finish(self, plan, results):
+        state = plan.state(self)
+        for market, book in build_kuru_books(state.get("l2", {})).items():
+            state["known"][("kuru", market)] = book
+            plan.cache_put(("kuru", market), book)
+
+        # Book of the market walked for each request's size
+        for req_idx, key, token_in, token_out, amount_in, dec_in, dec_out in state["jobs"]:
+            book = state["known"].get(key)
+            if not book: continue
+            amount_out = kuru_book_amount_out(book, token_in, token_out, amount_in, dec_in, dec_out)
+            if amount_out > 0:
+                # Taker fee is already in the book's prices
+                results.setdefault(req_idx, []).append(self.quote(amount_out, 0, "Kuru"))
+
+UNISWAP_V3_ADAPTER = register_bulk_adapter(V3QuoterAdapter(
+    "uni", "Uniswap V3", "Uni V3", UNISWAP_V3_QUOTER_ADDRESS, BULK_FEE_TIERS, "UNI",
+    fee_filter=quotable_fee_tiers, local_quote=_uniswap_local_quote, prepare=prime_v3_pools
+))
+AMBIENT_ADAPTER = register_bulk_adapter(AmbientAdapter(AMBIENT_QUERY_ADDRESS, AMBIENT_POOL_IDXS))
+KURU_ADAPTER = register_bulk_adapter(KuruAdapter())
+# Same QuoterV2 interface as Uniswap; registered but off until its Monad pools are verified
+PANCAKESWAP_V3_ADAPTER = register_bulk_adapter(V3QuoterAdapter(
+    "pcs", "PancakeSwap V3", "PCS V3", PANCAKESWAP_V3_QUOTER_ADDRESS, PANCAKESWAP_V3_FEE_TIERS, "PCS"
+))
+
+BULK_DEXES = ["uni", "amb", "kuru"] # Adapters used by a scan unless `dexes` is given
+
+def bulk_adapters(dexes=None):
+    """
+    Adapters of a scan: `dexes` (names) if given, else BULK_DEXES (only Uniswap with DISABLE_OTHER_DEXS).
+    """
+    if dexes is None:
+        dexes = ["uni"] if DISABLE_OTHER_DEXS else BULK_DEXES
+    return get_adapters(dexes)
+
+def prepare_bulk(requests, dexes=None):
+    """
+    Blocking warm-up of every adapter before planning (pool snapshots, token metadata).
+    """
+    for adapter in bulk_adapters(dexes):
+        adapter.prepare(requests)
+
+def build_bulk_calls(requests, block=None, dexes=None):
+    """
+    Stage 1 of bulk quoting (shared by the threaded and asyncio pipelines).
+    Each adapter prices what it can from local snapshots / the per-block QUOTE_CACHE and
+    encodes everything else, once per distinct read. Returns a BulkPlan.
+    """
+    plan = BulkPlan(bulk_adapters(dexes), block, QUOTE_CACHE, MULTICALL_PLANNER)
+    for req_idx, req in enumerate(requests):
+        t_in = to_checksum_address(req['tokenIn'])
+        t_out = to_checksum_address(req['tokenOut'])
+        amt = int(req['amountIn'])
+        for adapter in plan.adapters:
+            try:
+                adapter.plan_request(plan, req_idx, t_in, t_out, amt)
+            except Exception as e:
+                print(f"Error encoding {adapter.label} calls: {e}")
+    return plan
+
+def aggregate_bulk_results(requests, plan, all_results, return_by_index, network_ms):
+    """
+    Stage 3 of bulk quoting: hands every multicall result to the adapter that asked for it,
+    lets each adapter price its requests, and picks the best quote per request.
+    """
+    aggregated_results = {k: list(v) for k, v in plan.local_results.items()} # req_idx -> list of quotes
+    decode_errors = {} # (adapter label, kind) -> [count, first error]
     
     for i, item in enumerate(all_results):
         if not item: continue
-        success, return_data = item
-        if not success or not return_data: continue
-            
-        meta = call_map.get(i)
+        meta = plan.call_map.get(i)
         if not meta: continue
-        req_idx, dex_type, param = meta
-        
+        req_idxs, kind, param = meta
+        adapter = adapter_for_kind(kind)
+        if adapter is None: continue
+        success, return_data = item
         try:
-            # Temp store for Ambient merging (handled in outer scope)
-
-
-            if dex_type == "UNI":
-                decoded = decode(['uint256', 'uint160', 'uint32', 'uint256'], return_data)
-                amount_out = decoded[0]
-                gas = decoded[3]
-                
-                if amount_out > 0:
-                    if req_idx not in aggregated_results: aggregated_results[req_idx] = []
-                    aggregated_results[req_idx].append({
-                        "dex": "Uniswap V3",
-                        "strategy": f"Uni V3 ({param})",
-                        "fee": param,
-                        "amountOut": amount_out,
-                        "gas": gas
-                    })
-                    
-            elif dex_type == "AMB_PRICE":
-                price_q64 = decode(['uint128'], return_data)[0]
-                key = (req_idx, param)
-                if key not in temp_amb_results: temp_amb_results[key] = {}
-                temp_amb_results[key]['price_q64'] = price_q64
-                
-            elif dex_type == "AMB_LIQ":
-                liq = decode(['uint128'], return_data)[0]
-                key = (req_idx, param)
-                if key not in temp_amb_results: temp_amb_results[key] = {}
-                temp_amb_results[key]['liq'] = liq
-
+            adapter.decode(plan, kind, param, req_idxs, success, return_data, aggregated_results)
         except Exception as e:
-            pass
-
-    # Process Ambient Merged Results
-    for (req_idx, pool_idx), data in temp_amb_results.items():
-        price_q64 = data.get('price_q64', 0)
-        liq = data.get('liq', 0)
-        
-        # FILTER: Require Liquidity > 1000
-        if price_q64 > 0 and liq > 1000:
-             # Ambient returns Q64.64 Price (Raw Ratio)
-             price = price_q64 / (2**64)
-             
-             req = requests[req_idx]
-             amt_in = int(req['amountIn'])
-             t_in = w3.to_checksum_address(req['tokenIn'])
-             t_out = w3.to_checksum_address(req['tokenOut'])
-             
-             if int(t_in, 16) < int(t_out, 16):
-                 amount_out = amt_in * price
-             else:
-                 amount_out = amt_in / price
-             
-             if amount_out > 0:
-                 if req_idx not in aggregated_results: aggregated_results[req_idx] = []
-                 aggregated_results[req_idx].append({
-                     "dex": "Ambient",
-                     "strategy": f"Ambient ({pool_idx})",
-                     "fee": 500,
-                     "amountOut": int(amount_out),
-                     "gas": 150000 
-                 })
+            decode_errors.setdefault((adapter.label, kind), [0, e])[0] += 1
+    for (label, kind), (count, error) in decode_errors.items():
+        print(f"Error decoding {label} {kind} results ({count}x): {error}")
 
-            
+    for adapter in plan.adapters:
+        adapter.finish(plan, aggregated_results)
             
     # 4. Find Best for each Request
     final_output = {}
@@ -869,4 +1576,131 @@ def get_bulk_quotes(requests, return_by_index=False):
             key = (req['tokenIn'], req['tokenOut'])
             final_output[key] = best
         
-    return {"results": final_output, "network_ms": network_ms}
+    return {"results": final_output, "network_ms": network_ms, "block": plan.block}
+
+def prefetch_token_metadata(token_addresses):
+    """
+    Makes sure every token of a scan is in the metadata store (one bulk resolve for the
+    unknown ones). Stale entries are refreshed here too, off the per-token path.
+    """
+    return resolve_token_metadata(list(token_addresses))
+
+def _fetch_scan_threaded(plan, chunks, call_kinds):
+    """
+    One HTTP request per multicall chunk, spread over a thread pool. Returns all_results.
+    """
+    import concurrent.futures
+    
+    total_calls = plan.calls
+    all_results = [None] * len(total_calls) 
+    block = _block_param(plan.block)
+    
+    def fetch(calls):
+        return call_try_aggregate(calls, block, copy=False)
+    
+    def fetch_chunk(start, end):
+        # Failed chunks (e.g. eth_call gas cap) are split and retried
+        return fetch_with_split(fetch, total_calls, call_kinds, MULTICALL_PLANNER, start, end)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MULTICALL_PLANNER.workers(len(chunks))) as executor:
+        # 1. Submit Multicall Chunks
+        future_to_chunk = {
+            executor.submit(fetch_chunk, start, end): (start, end) 
+            for start, end in chunks
+        }
+        
+        # 2. Process Multicall Results
+        for future in concurrent.futures.as_completed(future_to_chunk):
+            start_offset, _ = future_to_chunk[future]
+            chunk_results = future.result()
+            
+            for i, result_data in enumerate(chunk_results):
+                if start_offset + i < len(all_results):
+                    all_results[start_offset + i] = result_data
+
+    return all_results
+
+def _fetch_scan_batched(plan, chunks, call_kinds):
+    """
+    Every multicall chunk of the scan in ONE JSON-RPC array (one round trip).
+    Chunks the node rejects (e.g. eth_call gas cap) are retried with fetch_with_split.
+    Returns all_results.
+    """
+    total_calls = plan.calls
+    block = _block_param(plan.block)
+    batch = RpcBatch(RPC_URL, router=RPC_ROUTER, hedge=RPC_HEDGE_SCANS)
+    
+    chunk_handles = [
+        batch.eth_call(MULTICALL3_ADDRESS, encode_try_aggregate(total_calls[start:end]), block)
+        for start, end in chunks
+    ]
+    
+    results = batch.execute()
+    
+    all_results = [None] * len(total_calls)
+    for (start, end), handle in zip(chunks, chunk_handles):
+        chunk_result = None
+        raw = results[handle]
+        if not isinstance(raw, RpcError):
+            try:
+                chunk_result = decode_try_aggregate(raw, copy=False) # Decoded by the adapters before raw goes
+            except Exception:
+                chunk_result = None
+        if chunk_result is None or len(chunk_result) != end - start:
+            MULTICALL_PLANNER.record_chunk(MULTICALL_PLANNER.chunk_gas(call_kinds[start:end]), 0, False, n_calls=end - start)
+            chunk_result = fetch_with_split(lambda calls: call_try_aggregate(calls, block, copy=False), total_calls, call_kinds, MULTICALL_PLANNER, start, end)
+        all_results[start:end] = chunk_result
+    
+    return all_results
+
+def get_bulk_quotes(requests, return_by_index=False, dexes=None):
+    """
+    Executes a massive batch of pricing queries in a SINGLE Multicall (Parallel Chunks).
+    requests: List of dicts: {"tokenIn": address, "tokenOut": address, "amountIn": int}
+    return_by_index: If True, returns dict keyed by request index (int). If False, keyed by (tokenIn, tokenOut).
+    dexes: adapter names to quote on (default BULK_DEXES).
+    """
+    # 0. Adapter warm-up (local V3 snapshots, metadata for Kuru tokens needed for decimals)
+    prepare_bulk(requests, dexes)
+    
+    # 1. Build Calldata (pinned to one block; answers already cached for it are not re-read)
+    plan = build_bulk_calls(requests, block=get_scan_block(), dexes=dexes)
+    total_calls = plan.calls
+
+    if not plan.has_work():
+        return {}
+    
+    # 2. Chunk Execution (Adaptive: sized from measured gas + latency)
+    call_kinds = plan.call_kinds()
+    chunks = MULTICALL_PLANNER.plan(call_kinds)
+    
+    t0 = time.time()
+    all_results = None
+    if not total_calls:
+        all_results = [] # Whole scan served from this block's cache
+    elif BATCH_RPC:
+        print(f"    (Sending {len(total_calls)} calls as {len(chunks)} batched multicalls, 1 round trip...)")
+        try:
+            all_results = _fetch_scan_batched(plan, chunks, call_kinds)
+        except Exception as e:
+            print(f"⚠️ JSON-RPC batch failed ({e}), falling back to parallel requests.")
+    if all_results is None:
+        print(f"    (Splitting {len(total_calls)} calls into {len(chunks)} parallel batches...)")
+        all_results = _fetch_scan_threaded(plan, chunks, call_kinds)
+
+    t1 = time.time()
+    network_ms = (t1 - t0) * 1000
+    if total_calls: MULTICALL_PLANNER.finish_scan()
+    
+    # 3. Decode & Aggregate
+    return aggregate_bulk_results(requests, plan, all_results, return_by_index, network_ms)
+
+def get_quote_curves(edges, steps=CURVE_STEPS):
+    """
+    Quote-curve mode: quotes every edge at a geometric ladder of sizes in ONE bulk pass.
+    edges: list of dicts {"tokenIn", "tokenOut", "minAmount", "maxAmount"} (raw units).
+    Returns {"curves": [QuoteCurve per edge], "network_ms", "block"}.
+    """
+    requests, owners = expand_ladder_requests(edges, steps)
+    snapshot = get_bulk_quotes(requests, return_by_index=True) if requests else {}
+    return curves_from_snapshot(edges, requests, owners, snapshot)